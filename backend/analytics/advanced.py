@@ -1,108 +1,98 @@
 """
 Advanced Analytics Module - Para análises mais complexas
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.columnar import ColumnarStore
+from .trends import DailyTotals, rollup
+from .groupby import GroupKey, group_by, top_groups
+from .comparison import delta
+from .distribution import DEFAULT_PERCENTILES, build_sketch, fixed_width_histogram, sketch_histogram
+from .report import REPORT_FORMATS, summarize
+
+def _column_values(data: List[Dict], value_key: str):
+    """Retorna a coluna numérica diretamente quando os dados são colunares"""
+    if isinstance(data, ColumnarStore):
+        column = data.column(value_key)
+        if column is not None:
+            return column.floats()
+    return None
 
 class AdvancedAnalytics:
     """Análises avançadas e relatórios"""
 
     @staticmethod
-    def get_trend_analysis(data: List[Dict], value_key: str, date_key: str = 'data') -> Dict:
-        """Analisar tendências ao longo do tempo"""
+    def get_trend_analysis(data: List[Dict], value_key: str, date_key: str = 'data',
+                           granularity: str = 'day') -> Dict:
+        """Analisar tendências ao longo do tempo (totais por dia, semana, mês ou trimestre)"""
         if not data:
             return {}
 
-        # Agrupar por data
-        by_date = {}
-        for item in data:
-            date = item.get(date_key, 'unknown')
-            value = item.get(value_key, 0)
-
-            try:
-                value = float(value)
-            except (ValueError, TypeError):
-                continue
+        daily = DailyTotals.from_data(data, value_key, date_key)
+        trends = {bucket['period']: bucket['total'] for bucket in rollup(daily, granularity)}
 
-            if date not in by_date:
-                by_date[date] = []
-
-            by_date[date].append(value)
-
-        # Calcular totais por data
-        trends = {}
-        for date in sorted(by_date.keys()):
-            trends[date] = sum(by_date[date])
+        # Registros sem data válida ficam agrupados no fim
+        if daily.undated_count:
+            trends['unknown'] = daily.undated_total
 
         return trends
 
     @staticmethod
-    def get_distribution_histogram(data: List[Dict], value_key: str, bins: int = 10) -> Dict:
-        """Gerar histograma de distribuição"""
-        values = []
+    def _numeric_values(data: List[Dict], value_key: str):
+        """Coluna numérica (colunar) ou valores convertidos registro a registro"""
+        values = _column_values(data, value_key)
+        if values is not None:
+            return values
 
+        values = []
         for item in data:
             try:
-                value = float(item.get(value_key, 0))
-                values.append(value)
+                values.append(float(item.get(value_key, 0)))
             except (ValueError, TypeError):
                 continue
+        return values
 
-        if not values:
-            return {}
-
-        min_val = min(values)
-        max_val = max(values)
-        range_val = max_val - min_val
-
-        if range_val == 0:
-            return {str(min_val): len(values)}
-
-        # Criar bins
-        histogram = {}
-        bin_size = range_val / bins
-
-        for value in values:
-            bin_index = int((value - min_val) / bin_size)
-            if bin_index >= bins:
-                bin_index = bins - 1
+    @staticmethod
+    def get_distribution_histogram(data: List[Dict], value_key: str, bins: int = 10, mode: str = 'fixed') -> Dict:
+        """
+        Gerar histograma de distribuição
 
-            bin_key = f"{min_val + bin_index * bin_size:.2f}-{min_val + (bin_index + 1) * bin_size:.2f}"
+        mode 'fixed' conta exatamente em faixas de largura igual; 'quantile'
+        usa faixas com quantidades parecidas, estimadas pelo sketch KLL.
+        """
+        values = AdvancedAnalytics._numeric_values(data, value_key)
 
-            histogram[bin_key] = histogram.get(bin_key, 0) + 1
+        if mode == 'fixed':
+            return fixed_width_histogram(values, bins)
+        return sketch_histogram(build_sketch(values), bins, mode)
 
-        return histogram
+    @staticmethod
+    def get_percentiles(data: List[Dict], value_key: str, percents=DEFAULT_PERCENTILES) -> Dict:
+        """Percentis (p50/p90/p99 por padrão) sem ordenar todos os valores"""
+        values = AdvancedAnalytics._numeric_values(data, value_key)
+        if not values:
+            return {}
+        return build_sketch(values).percentiles(percents)
 
     @staticmethod
     def get_top_items(data: List[Dict], value_key: str, category_key: str, limit: int = 10) -> List[Dict]:
         """Obter top N itens por valor em uma categoria"""
-        # Agrupar por categoria
-        by_category = {}
+        keys = [GroupKey(category_key)]
+        groups = group_by(data, keys, value_key, missing='Sem categoria')
 
-        for item in data:
-            category = item.get(category_key, 'Sem categoria')
-            try:
-                value = float(item.get(value_key, 0))
-            except (ValueError, TypeError):
-                value = 0
-
-            if category not in by_category:
-                by_category[category] = 0
-
-            by_category[category] += value
-
-        # Ordenar e limitar
-        sorted_items = sorted(
-            [{'categoria': cat, 'total': val} for cat, val in by_category.items()],
-            key=lambda x: x['total'],
-            reverse=True
-        )
-
-        return sorted_items[:limit]
+        return [
+            {'categoria': row['keys'][category_key], 'total': row['total']}
+            for row in top_groups(groups, keys, limit)
+        ]
 
     @staticmethod
     def get_comparison_metrics(data1: List[Dict], data2: List[Dict], value_key: str) -> Dict:
         """Comparar dois conjuntos de dados"""
         def get_sum(data):
+            values = _column_values(data, value_key)
+            if values is not None:
+                return sum(values)
+
             total = 0
             for item in data:
                 try:
@@ -114,41 +104,18 @@ class AdvancedAnalytics:
         sum1 = get_sum(data1)
         sum2 = get_sum(data2)
 
-        difference = sum2 - sum1
-        percentage_change = (difference / sum1 * 100) if sum1 > 0 else 0
-
         return {
             'dataset1_sum': sum1,
             'dataset2_sum': sum2,
-            'difference': difference,
-            'percentage_change': percentage_change,
-            'trend': 'up' if difference > 0 else 'down' if difference < 0 else 'stable'
+            **delta(sum1, sum2)
         }
 
     @staticmethod
-    def generate_summary_report(data: List[Dict], title: str) -> str:
-        """Gerar relatório resumido em texto"""
-        if not data:
-            return f"{title}: Sem dados"
-
-        report = f"\n{'=' * 50}\n{title}\n{'=' * 50}\n\n"
-        report += f"Total de registros: {len(data)}\n"
-
-        # Tentar encontrar valores numéricos
-        numeric_values = []
-        for item in data:
-            for key, value in item.items():
-                try:
-                    numeric_values.append(float(value))
-                except (ValueError, TypeError):
-                    continue
-
-        if numeric_values:
-            import statistics
-            report += f"Soma: {sum(numeric_values):.2f}\n"
-            report += f"Média: {statistics.mean(numeric_values):.2f}\n"
-            report += f"Máximo: {max(numeric_values):.2f}\n"
-            report += f"Mínimo: {min(numeric_values):.2f}\n"
-
-        report += f"\n{'=' * 50}\n"
-        return report
+    def generate_summary_report(data: List[Dict], title: str, format: str = 'text',
+                                schema: Optional[Dict[str, str]] = None) -> str:
+        """Gerar relatório resumido (text, markdown ou csv) das colunas numéricas"""
+        render = REPORT_FORMATS.get(format)
+        if render is None:
+            raise ValueError(f"Formato de relatório inválido: {format}")
+
+        return render(summarize(data, title, schema))
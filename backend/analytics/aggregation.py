@@ -0,0 +1,76 @@
+"""
+Aggregation backends - summary statistics over numeric columns
+"""
+import math
+from array import array
+from typing import Any, Callable, Dict, Sequence
+
+from .distribution import DEFAULT_PERCENTILES, interpolate_quantile
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+
+def summarize_numpy(values: Sequence[float]) -> Dict[str, Any]:
+    """Summary statistics over a contiguous float64 buffer"""
+    if isinstance(values, array) and values.typecode == 'd':
+        arr = np.frombuffer(values, dtype=np.float64)
+    else:
+        arr = np.asarray(values, dtype=np.float64)
+
+    count = arr.size
+    total = float(arr.sum())
+
+    return {
+        'total': total,
+        'average': total / count,
+        'median': float(np.median(arr)),
+        'percentiles': {
+            f"p{percent}": float(value)
+            for percent, value in zip(DEFAULT_PERCENTILES, np.percentile(arr, DEFAULT_PERCENTILES))
+        },
+        'min': float(arr.min()),
+        'max': float(arr.max()),
+        'stdev': float(arr.std(ddof=1)) if count > 1 else 0
+    }
+
+
+def summarize_python(values: Sequence[float]) -> Dict[str, Any]:
+    """Summary statistics using only the standard library"""
+    count = len(values)
+    total = math.fsum(values)
+    mean = total / count
+    ordered = sorted(values)
+    middle = count // 2
+
+    if count % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+
+    if count > 1:
+        squares = math.fsum((value - mean) ** 2 for value in ordered)
+        stdev = math.sqrt(squares / (count - 1))
+    else:
+        stdev = 0
+
+    return {
+        'total': total,
+        'average': mean,
+        'median': median,
+        'percentiles': {f"p{percent}": interpolate_quantile(ordered, percent / 100) for percent in DEFAULT_PERCENTILES},
+        'min': ordered[0],
+        'max': ordered[-1],
+        'stdev': stdev
+    }
+
+
+BACKENDS: Dict[str, Callable[[Sequence[float]], Dict[str, Any]]] = {'python': summarize_python}
+if np is not None:
+    BACKENDS['numpy'] = summarize_numpy
+
+# Backend picked at import time: NumPy when installed, pure Python otherwise
+BACKEND = 'numpy' if np is not None else 'python'
+summarize = BACKENDS[BACKEND]
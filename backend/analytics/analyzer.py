@@ -2,21 +2,36 @@
 Data Analyzer - generates analytics and reports
 """
 from typing import List, Dict, Any
-import statistics
+
+from utils.columnar import ColumnarStore
+from utils.classifier import default_classifier
+from .aggregation import summarize
+
+_ABSENT = object()
 
 class Analyzer:
     """Analyze parsed data"""
 
-    def analyze(self, data: List[Dict], analysis_type: str) -> Dict[str, Any]:
-        """Main analysis method"""
+    # Key lists and per-shape lookups live in utils/classifier.py
+    classifier = default_classifier
+    NUMERIC_KEYS = classifier.numeric_keys
+    CATEGORY_KEYS = classifier.category_keys
+
+    def analyze(self, data: List[Dict], analysis_type: str, include_items: bool = False) -> Dict[str, Any]:
+        """
+        Main analysis method
+
+        Only summaries are returned unless include_items is set, in which
+        case the rows (and grouped rows) are embedded as well.
+        """
         if analysis_type == 'financeiro':
-            return self._analyze_financial(data)
+            return self._analyze_financial(data, include_items)
         elif analysis_type == 'organizacional':
-            return self._analyze_organizational(data)
+            return self._analyze_organizational(data, include_items)
         else:
             return {}
 
-    def _analyze_financial(self, data: List[Dict]) -> Dict[str, Any]:
+    def _analyze_financial(self, data: List[Dict], include_items: bool = False) -> Dict[str, Any]:
         """Analyze financial data"""
         if not data:
             return {
@@ -36,18 +51,15 @@ class Analyzer:
                 'summary': 'Nenhum valor numérico encontrado'
             }
 
-        return {
-            'total': sum(values),
-            'average': statistics.mean(values),
-            'median': statistics.median(values),
-            'min': min(values),
-            'max': max(values),
-            'count': len(data),
-            'stdev': statistics.stdev(values) if len(values) > 1 else 0,
-            'items': data
-        }
+        summary = summarize(values)
+        summary['count'] = len(data)
 
-    def _analyze_organizational(self, data: List[Dict]) -> Dict[str, Any]:
+        if include_items:
+            summary['items'] = self._as_records(data)
+
+        return summary
+
+    def _analyze_organizational(self, data: List[Dict], include_items: bool = False) -> Dict[str, Any]:
         """Analyze organizational data"""
         if not data:
             return {
@@ -56,45 +68,71 @@ class Analyzer:
                 'summary': 'Nenhum dado organizacional'
             }
 
-        categories = self._group_by_category(data)
+        if include_items:
+            categories = self._group_by_category(data)
+            distribution = {cat: len(items) for cat, items in categories.items()}
+        else:
+            # Counting only: no per-category copies of the rows
+            distribution = self._count_by_category(data)
 
-        return {
+        analysis = {
             'total': len(data),
-            'categories': list(categories.keys()),
-            'distribution': {cat: len(items) for cat, items in categories.items()},
-            'grouped_data': categories,
-            'items': data
+            'categories': list(distribution.keys()),
+            'distribution': distribution
         }
 
+        if include_items:
+            analysis['grouped_data'] = categories
+            analysis['items'] = self._as_records(data)
+
+        return analysis
+
+    def _as_records(self, data: List[Dict]) -> List[Dict]:
+        """Return data as a plain list of dicts"""
+        if isinstance(data, ColumnarStore):
+            return data.to_records()
+        return data
+
     def _extract_values(self, data: List[Dict]) -> List[float]:
         """Extract numeric values from data"""
+        if isinstance(data, ColumnarStore):
+            return data.first_numeric(self.classifier.numeric_keys)
+
+        value_of = self.classifier.value
         values = []
-        numeric_keys = ['valor', 'preco', 'custo', 'receita', 'despesa', 'amount', 'price']
 
         for item in data:
-            for key in numeric_keys:
-                if key in item:
-                    try:
-                        values.append(float(item[key]))
-                        break
-                    except (ValueError, TypeError):
-                        continue
+            value = value_of(item)
+            if value is not None:
+                values.append(value)
 
         return values
 
+    def _count_by_category(self, data: List[Dict]) -> Dict[str, int]:
+        """Count rows per category label (same labels as _group_by_category)"""
+        if isinstance(data, ColumnarStore):
+            categories = data.iter_first_present(self.classifier.category_keys, _ABSENT)
+        else:
+            category_of = self.classifier.category
+            categories = (category_of(item, _ABSENT) for item in data)
+
+        counts = {}
+        for category in categories:
+            label = str(category) if category is not _ABSENT else None
+            if not label:
+                label = 'Sem categoria'
+            counts[label] = counts.get(label, 0) + 1
+
+        return counts
+
     def _group_by_category(self, data: List[Dict]) -> Dict[str, List[Dict]]:
         """Group data by category"""
         grouped = {}
-
-        category_keys = ['categoria', 'tipo', 'category', 'type']
+        shape_of = self.classifier.shape
 
         for item in data:
-            category = None
-
-            for key in category_keys:
-                if key in item:
-                    category = str(item[key])
-                    break
+            category_key = shape_of(item).category_key
+            category = str(item[category_key]) if category_key is not None else None
 
             if not category:
                 category = 'Sem categoria'
@@ -0,0 +1,158 @@
+"""
+Period comparison - each period against the previous one or the same
+period a year earlier, overall and per category
+
+One grouped pass builds a (day, category) table. Every granularity and
+baseline is rolled up from it, so callers can cache the table per data
+version and rerun comparisons without rescanning the rows.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.dates import ISO_DATE, format_ordinal, to_ordinal
+from .groupby import GroupKey, ROWS, TOTAL, group_by, merge_entry, new_entry
+from .trends import GRANULARITIES, bucket_label, bucket_start
+
+BASELINES = ('previous', 'year')
+
+# Periods compared when no range is given
+DEFAULT_PERIODS = 12
+
+MISSING_CATEGORY = 'Sem categoria'
+
+
+def delta(previous: float, current: float) -> Dict[str, Any]:
+    """Difference, percentage change and direction from previous to current"""
+    difference = current - previous
+    return {
+        'difference': difference,
+        'percentage_change': (difference / previous * 100) if previous > 0 else 0,
+        'trend': 'up' if difference > 0 else 'down' if difference < 0 else 'stable'
+    }
+
+
+def daily_table(data: Iterable[Dict], value_key: Optional[str], date_key: str = 'data',
+                category_key: Optional[str] = 'categoria') -> Dict[Tuple[int, Any], List]:
+    """
+    Group accumulators per (day ordinal, category), in one pass
+
+    Rows without a valid date are left out; without a category_key every
+    row falls into MISSING_CATEGORY. Without a value_key every row counts
+    as 1, so totals become row counts (as in analytics.trends).
+    """
+    keys = [GroupKey(date_key, 'day')]
+    if category_key is not None:
+        keys.append(GroupKey(category_key))
+    table = {}
+
+    for group, entry in group_by(data, keys, value_key, MISSING_CATEGORY).items():
+        ordinal = to_ordinal(group[0])
+        if ordinal is not None:
+            if value_key is None:
+                entry[TOTAL] = float(entry[ROWS])
+            table[(ordinal, group[1] if category_key is not None else MISSING_CATEGORY)] = entry
+
+    return table
+
+
+def period_table(daily: Dict[Tuple[int, Any], List], granularity: str) -> Dict[int, Dict[Any, List]]:
+    """Roll a daily table up into {period start: {category: accumulator}}"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity}")
+
+    periods: Dict[int, Dict[Any, List]] = {}
+    starts: Dict[int, int] = {}
+
+    for (ordinal, category), entry in daily.items():
+        start = starts.get(ordinal)
+        if start is None:
+            start = starts[ordinal] = bucket_start(ordinal, granularity)
+
+        categories = periods.setdefault(start, {})
+        target = categories.get(category)
+        if target is None:
+            target = categories[category] = new_entry()
+        merge_entry(target, entry)
+
+    return periods
+
+
+def baseline_start(start: int, granularity: str, baseline: str) -> Optional[int]:
+    """Start of the period a period is compared with (None before year 1)"""
+    if baseline == 'previous':
+        return bucket_start(start - 1, granularity) if start > 1 else None
+    if baseline != 'year':
+        raise ValueError(f"Base de comparação inválida: {baseline}")
+
+    if granularity == 'week':
+        # 52 weeks back keeps the same weekday
+        return start - 364 if start > 364 else None
+
+    day = date.fromordinal(start)
+    if day.year == 1:
+        return None
+    if granularity == 'day':
+        # 29/02 is compared with 28/02 of the previous year
+        return date(day.year - 1, day.month, 28 if (day.month, day.day) == (2, 29) else day.day).toordinal()
+    return date(day.year - 1, day.month, 1).toordinal()
+
+
+def _totals(categories: Dict[Any, List]) -> Tuple[float, int]:
+    return sum(entry[TOTAL] for entry in categories.values()), sum(entry[ROWS] for entry in categories.values())
+
+
+def compare_periods(periods: Dict[int, Dict[Any, List]], granularity: str, baseline: str = 'previous',
+                    first: Optional[int] = None, last: Optional[int] = None,
+                    limit: int = DEFAULT_PERIODS) -> List[Dict[str, Any]]:
+    """
+    Compare each period with its baseline, overall and per category
+
+    first/last (day ordinals) bound the periods compared; at most the
+    latest limit periods with data are returned, oldest first.
+    """
+    if first is not None:
+        first = bucket_start(first, granularity)
+
+    starts = sorted(
+        start for start in periods
+        if (first is None or start >= first) and (last is None or start <= last)
+    )[-limit:]
+
+    results = []
+    for start in starts:
+        reference = baseline_start(start, granularity, baseline)
+        current = periods[start]
+        previous = periods.get(reference, {}) if reference is not None else {}
+
+        total, count = _totals(current)
+        baseline_total, baseline_count = _totals(previous)
+
+        categories = []
+        for category in sorted(set(current) | set(previous),
+                               key=lambda name: current[name][TOTAL] if name in current else 0, reverse=True):
+            now = current.get(category)
+            before = previous.get(category)
+            now_total = now[TOTAL] if now else 0.0
+            before_total = before[TOTAL] if before else 0.0
+            categories.append({
+                'category': category,
+                'total': now_total,
+                'count': now[ROWS] if now else 0,
+                'baseline_total': before_total,
+                'baseline_count': before[ROWS] if before else 0,
+                **delta(before_total, now_total)
+            })
+
+        results.append({
+            'period': bucket_label(start, granularity),
+            'start': format_ordinal(start, ISO_DATE),
+            'baseline_period': bucket_label(reference, granularity) if reference is not None else None,
+            'total': total,
+            'count': count,
+            'baseline_total': baseline_total,
+            'baseline_count': baseline_count,
+            **delta(baseline_total, total),
+            'categories': categories
+        })
+
+    return results
@@ -0,0 +1,307 @@
+"""
+Distribution module - streaming quantile sketch and histograms
+
+KLLSketch summarizes a value stream in O(k log n) memory and can be merged
+with sketches built elsewhere (other parse chunks, other processes), so
+percentiles never need the full sorted list.
+"""
+import math
+import random
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# Size of the top compactor; rank error is roughly 1.7 / k
+DEFAULT_K = 256
+# Each lower compactor is this fraction of the one above
+CAPACITY_DECAY = 2 / 3
+MIN_CAPACITY = 2
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+HISTOGRAM_MODES = ('fixed', 'quantile')
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang and Liberty)
+
+    Values enter level 0; a full level is sorted and every other value is
+    promoted to the level above with twice the weight. Results are exact
+    until the first compaction (about k values).
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        self.k = k
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._levels: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        # Coin flips deciding which half of a compacted level survives
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(int(math.ceil(self.k * CAPACITY_DECAY ** depth)), MIN_CAPACITY)
+
+    def add(self, value: float) -> None:
+        """Feed one value"""
+        self._levels[0].append(value)
+        self._size += 1
+        self.count += 1
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        """Feed many values, a sketch-sized batch at a time"""
+        iterator = iter(values)
+        level = self._levels
+
+        while True:
+            chunk = list(islice(iterator, self._max_size))
+            if not chunk:
+                break
+
+            low = min(chunk)
+            high = max(chunk)
+            if self.min is None or low < self.min:
+                self.min = low
+            if self.max is None or high > self.max:
+                self.max = high
+
+            level[0].extend(chunk)
+            self._size += len(chunk)
+            self.count += len(chunk)
+
+            if self._size >= self._max_size:
+                self._compress()
+
+    def merge(self, other: 'KLLSketch') -> None:
+        """Fold another sketch (same k) into this one"""
+        if other.count == 0:
+            return
+        if other.k != self.k:
+            raise ValueError(f"Sketches com k diferentes: {self.k} e {other.k}")
+
+        while len(self._levels) < len(other._levels):
+            self._grow()
+
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+
+        self.count += other.count
+        self._size = sum(len(items) for items in self._levels)
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def _compress(self) -> None:
+        """Compact levels bottom-up until the sketch is back under its size"""
+        for level in range(len(self._levels)):
+            items = self._levels[level]
+            if len(items) < self._capacity(level):
+                continue
+
+            if level + 1 == len(self._levels):
+                self._grow()
+
+            items.sort()
+            odd = len(items) % 2
+            promoted = items[odd + self._random.randrange(2)::2]
+            self._levels[level + 1].extend(promoted)
+            self._levels[level] = items[:odd]
+
+            self._size -= len(items) - odd - len(promoted)
+            if self._size < self._max_size:
+                break
+
+    def weighted(self) -> List[Tuple[float, int]]:
+        """(value, weight) pairs in value order; weights sum to count"""
+        pairs = [(value, 1 << level) for level, items in enumerate(self._levels) for value in items]
+        pairs.sort()
+        return pairs
+
+    @property
+    def exact(self) -> bool:
+        """True while no value has been compacted away"""
+        return len(self._levels) == 1
+
+    def quantiles(self, fractions: Sequence[float]) -> List[float]:
+        """Estimates for several quantiles (fractions in [0, 1]) at once"""
+        if not self.count:
+            return [0 for _ in fractions]
+
+        if self.exact:
+            ordered = sorted(self._levels[0])
+            return [interpolate_quantile(ordered, fraction) for fraction in fractions]
+
+        pairs = self.weighted()
+        results = []
+        for fraction in fractions:
+            target = fraction * self.count
+            seen = 0
+            estimate = pairs[-1][0]
+            for value, weight in pairs:
+                seen += weight
+                if seen >= target:
+                    estimate = value
+                    break
+            results.append(estimate)
+        return results
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate of one quantile (0.5 is the median)"""
+        return self.quantiles([fraction])[0]
+
+    def percentiles(self, percents: Sequence[int] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """{'p50': ..., 'p90': ..., 'p99': ...}"""
+        estimates = self.quantiles([percent / 100 for percent in percents])
+        return {f"p{percent}": estimate for percent, estimate in zip(percents, estimates)}
+
+
+def interpolate_quantile(ordered: Sequence[float], fraction: float) -> float:
+    """Linearly interpolated quantile of a sorted sequence"""
+    rank = (len(ordered) - 1) * fraction
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _labelled(edges: Sequence[float], counts: Sequence[int]) -> Dict[str, int]:
+    """Map one label per bin (built once) to its count"""
+    histogram: Dict[str, int] = {}
+    for low, high, count in zip(edges, edges[1:], counts):
+        label = f"{low:.2f}-{high:.2f}"
+        # Bins narrower than the label precision share a label
+        histogram[label] = histogram.get(label, 0) + count
+    return histogram
+
+
+def fixed_edges(low: float, high: float, bins: int) -> List[float]:
+    """bins + 1 evenly spaced edges from low to high"""
+    width = (high - low) / bins
+    return [low + index * width for index in range(bins)] + [high]
+
+
+def quantile_edges(sketch: KLLSketch, bins: int) -> List[float]:
+    """Edges holding about the same number of values per bin"""
+    inner = sketch.quantiles([index / bins for index in range(1, bins)])
+    return [sketch.min] + inner + [sketch.max]
+
+
+def fixed_width_histogram(values: Sequence[float], bins: int = 10) -> Dict[str, int]:
+    """
+    Exact fixed-width histogram in one binning pass
+
+    Bins are ordered and empty bins are kept; the last bin includes the
+    maximum. A constant column yields a single bin.
+    """
+    if not len(values):
+        return {}
+
+    low = min(values)
+    high = max(values)
+    if high == low:
+        return {str(low): len(values)}
+
+    scale = bins / (high - low)
+    last = bins - 1
+
+    if np is not None:
+        if isinstance(values, array) and values.typecode == 'd':
+            column = np.frombuffer(values, dtype=np.float64)
+        else:
+            column = np.asarray(values, dtype=np.float64)
+        indexes = ((column - low) * scale).astype(np.int64)
+        counts = np.bincount(np.minimum(indexes, last), minlength=bins).tolist()
+    else:
+        counts = [0] * bins
+        for value in values:
+            index = int((value - low) * scale)
+            counts[index if index < bins else last] += 1
+
+    return _labelled(fixed_edges(low, high, bins), counts)
+
+
+def sketch_histogram(sketch: KLLSketch, bins: int = 10, mode: str = 'fixed') -> Dict[str, int]:
+    """
+    Histogram estimated from a sketch (counts sum to sketch.count)
+
+    mode 'fixed' uses evenly spaced edges, 'quantile' edges that split the
+    values into bins of about equal size.
+    """
+    if mode not in HISTOGRAM_MODES:
+        raise ValueError(f"Modo de histograma inválido: {mode}")
+    if not sketch.count:
+        return {}
+    if sketch.min == sketch.max:
+        return {str(sketch.min): sketch.count}
+
+    if mode == 'fixed':
+        edges = fixed_edges(sketch.min, sketch.max, bins)
+    else:
+        # Repeated values can produce equal edges; keep each edge once
+        edges = sorted(set(quantile_edges(sketch, bins)))
+        bins = len(edges) - 1
+
+    inner = edges[1:-1]
+    counts = [0] * bins
+    last = bins - 1
+
+    for value, weight in sketch.weighted():
+        index = bisect_right(inner, value)
+        counts[index if index < bins else last] += weight
+
+    return _labelled(edges, counts)
+
+
+def build_sketch(values: Iterable[float], k: int = DEFAULT_K) -> KLLSketch:
+    """Sketch of a value stream"""
+    sketch = KLLSketch(k)
+    sketch.extend(values)
+    return sketch
+
+
+def describe(values: Sequence[float], bins: int = 10, mode: str = 'fixed',
+             percents: Sequence[int] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """Percentiles and histogram of an in-memory value column"""
+    if mode not in HISTOGRAM_MODES:
+        raise ValueError(f"Modo de histograma inválido: {mode}")
+
+    sketch = build_sketch(values)
+
+    if mode == 'fixed':
+        histogram = fixed_width_histogram(values, bins)
+    else:
+        histogram = sketch_histogram(sketch, bins, mode)
+
+    return {
+        'count': sketch.count,
+        'min': sketch.min,
+        'max': sketch.max,
+        'percentiles': sketch.percentiles(percents),
+        'histogram': histogram
+    }
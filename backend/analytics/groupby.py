@@ -0,0 +1,300 @@
+"""
+Group-by engine - per-group count/total/average/min/max in one pass
+
+Keys are record fields, optionally bucketed by date ('data:month'), so
+'categoria,data:month' or 'profissional,paciente' both work. Memory grows
+with the number of groups, never with the number of rows.
+"""
+import heapq
+from itertools import islice, repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from utils.columnar import ColumnarStore, ITER_BLOCK_SIZE
+from utils.dates import parse_date
+from .trends import GRANULARITIES, bucket_label, bucket_start, to_number
+
+SORT_FIELDS = ('total', 'count', 'average', 'min', 'max')
+
+# Values usable as-is in a group key
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+_INF = float('inf')
+
+# Per-group accumulator slots: [rows, numeric values, total, min, max]
+# (min/max start at +/-inf and are only reported when values > 0)
+ROWS, VALUES, TOTAL, MIN, MAX = range(5)
+
+
+class GroupKey(NamedTuple):
+    """A grouping field, optionally bucketed by date"""
+    field: str
+    granularity: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.field if self.granularity is None else f"{self.field}:{self.granularity}"
+
+
+def parse_keys(spec: Union[str, Sequence[str]]) -> List[GroupKey]:
+    """
+    Parse 'categoria,data:month' (or a list of such parts) into GroupKeys
+
+    Raises ValueError for an empty spec or an unknown granularity.
+    """
+    parts = spec.split(',') if isinstance(spec, str) else spec
+    keys = []
+
+    for part in parts:
+        field, _, granularity = part.strip().partition(':')
+        if not field:
+            continue
+        if granularity and granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidade inválida: {granularity}")
+        keys.append(GroupKey(field, granularity or None))
+
+    if not keys:
+        raise ValueError('Informe ao menos uma chave de agrupamento')
+
+    return keys
+
+
+class _DateLabels(dict):
+    """Raw date cell (or day ordinal) -> bucket label, computed once per distinct cell"""
+
+    def __init__(self, granularity: str, missing: Any, ordinals: bool = False):
+        super().__init__()
+        self.granularity = granularity
+        self.missing = missing
+        self.ordinals = ordinals
+
+    def __missing__(self, value: Any) -> Any:
+        if self.ordinals:
+            ordinal = value
+        else:
+            parsed = parse_date(value)
+            ordinal = parsed[0] if parsed else None
+
+        granularity = self.granularity
+        label = self.missing if ordinal is None else bucket_label(bucket_start(ordinal, granularity), granularity)
+        self[value] = label
+        return label
+
+    def resolve(self, values: Iterable[Any]) -> List[Any]:
+        """Labels for a block of raw cells"""
+        try:
+            return list(map(self.__getitem__, values))
+        except TypeError:
+            return [self.missing if type(value) not in _KEY_TYPES else self[value] for value in values]
+
+
+def _hashable(value: Any) -> Any:
+    """Stand-in for list/dict cells so they can be part of a group key"""
+    if isinstance(value, tuple):
+        return tuple(_hashable(part) for part in value)
+    return value if type(value) in _KEY_TYPES else str(value)
+
+
+def _column_reader(column, key: GroupKey, missing: Any) -> Tuple[Callable[[int, int], Iterable], Optional[List]]:
+    """
+    Block reader for one key column of a store, plus its code dictionary
+
+    Complete category columns are read as codes (translated back through
+    the dictionary once per group) and complete date columns as ordinals.
+    """
+    if column is None:
+        return (lambda start, stop: repeat(None, stop - start)), None
+
+    if key.granularity:
+        if column.kind == 'date' and column.complete:
+            labels = _DateLabels(key.granularity, missing, ordinals=True)
+            return (lambda start, stop: labels.resolve(column.data[start:stop])), None
+        labels = _DateLabels(key.granularity, missing)
+        return (lambda start, stop: labels.resolve(column.decode(start, stop))), None
+
+    dictionary = column.dictionary()
+    if dictionary is not None:
+        return (lambda start, stop: column.data[start:stop]), dictionary
+    return column.decode, None
+
+
+def _block_pairs(data: Iterable[Dict], keys: Sequence[GroupKey], value_key: Optional[str],
+                 missing: Any) -> Tuple[Iterator[Iterable[Tuple[Any, Any]]], List[Optional[List]]]:
+    """
+    Per block of ITER_BLOCK_SIZE rows, the (key, raw value) pairs
+
+    Also returns, per key, the dictionary its raw parts are codes into
+    (None when the parts are final values).
+    """
+    if isinstance(data, ColumnarStore):
+        readers = [_column_reader(data.column(key.field), key, missing) for key in keys]
+        return _store_blocks(data, [reader for reader, _ in readers], value_key), [codes for _, codes in readers]
+
+    return _record_blocks(data, keys, value_key, missing), [None] * len(keys)
+
+
+def _store_blocks(store: ColumnarStore, readers: List[Callable], value_key: Optional[str]) -> Iterator:
+    value_column = store.column(value_key) if value_key is not None else None
+    if value_column is not None and value_column.kind in ('int', 'float') and value_column.complete:
+        read_values = lambda start, stop: value_column.data[start:stop]
+    elif value_column is not None:
+        read_values = value_column.decode
+    else:
+        read_values = lambda start, stop: repeat(None, stop - start)
+
+    size = len(store)
+    for start in range(0, size, ITER_BLOCK_SIZE):
+        stop = min(start + ITER_BLOCK_SIZE, size)
+        columns = [read(start, stop) for read in readers]
+        group_keys = columns[0] if len(columns) == 1 else zip(*columns)
+        yield zip(group_keys, read_values(start, stop))
+
+
+def _record_blocks(data: Iterable[Dict], keys: Sequence[GroupKey], value_key: Optional[str],
+                   missing: Any) -> Iterator:
+    labels = [_DateLabels(key.granularity, missing) if key.granularity else None for key in keys]
+    rows = iter(data)
+
+    while True:
+        block = list(islice(rows, ITER_BLOCK_SIZE))
+        if not block:
+            return
+
+        columns = []
+        for key, label in zip(keys, labels):
+            column = [item.get(key.field) for item in block]
+            columns.append(column if label is None else label.resolve(column))
+
+        group_keys = columns[0] if len(columns) == 1 else zip(*columns)
+        values = [item.get(value_key) for item in block] if value_key is not None else repeat(None)
+        yield zip(group_keys, values)
+
+
+def _accumulate(groups: Dict[Any, List], pairs: Iterable[Tuple[Any, Any]]) -> None:
+    """Fold (key, value) pairs into per-key accumulators"""
+    # Literal slot indexes (ROWS, VALUES, TOTAL, MIN, MAX): this is the hot loop
+    for group, value in pairs:
+        try:
+            entry = groups.get(group)
+        except TypeError:
+            group = _hashable(group)
+            entry = groups.get(group)
+        if entry is None:
+            entry = groups[group] = [0, 0, 0.0, _INF, -_INF]
+        entry[0] += 1
+
+        if type(value) is not float:
+            value = to_number(value)
+            if value is None:
+                continue
+
+        entry[1] += 1
+        entry[2] += value
+        if value < entry[3]:
+            entry[3] = value
+        if value > entry[4]:
+            entry[4] = value
+
+
+def group_by(data: Iterable[Dict], keys: Sequence[GroupKey], value_key: Optional[str] = None,
+             missing: Any = None) -> Dict[Tuple, List]:
+    """
+    Aggregate rows per group in a single pass
+
+    Returns {group tuple: [rows, numeric values, total, min, max]}. Rows
+    lacking a key field fall into the group value missing; without a
+    value_key only rows are counted. Date keys are parsed and bucketed
+    once per distinct date string.
+    """
+    blocks, dictionaries = _block_pairs(data, keys, value_key, missing)
+    raw: Dict[Any, List] = {}
+    for pairs in blocks:
+        _accumulate(raw, pairs)
+
+    single = len(keys) == 1
+    coded = any(codes is not None for codes in dictionaries)
+
+    if single and missing is None and not coded:
+        return {(group,): entry for group, entry in raw.items()}
+
+    groups: Dict[Tuple, List] = {}
+
+    for raw_group, entry in raw.items():
+        parts = (raw_group,) if single else raw_group
+        if coded:
+            parts = [part if codes is None else codes[part] for part, codes in zip(parts, dictionaries)]
+        group = tuple(missing if part is None else part for part in parts)
+
+        current = groups.get(group)
+        if current is None:
+            groups[group] = entry
+        else:
+            merge_entry(current, entry)
+
+    return groups
+
+
+def merge_entry(target: List, entry: List) -> None:
+    """Fold one group accumulator into another"""
+    target[ROWS] += entry[ROWS]
+    target[VALUES] += entry[VALUES]
+    target[TOTAL] += entry[TOTAL]
+    target[MIN] = min(target[MIN], entry[MIN])
+    target[MAX] = max(target[MAX], entry[MAX])
+
+
+def new_entry() -> List:
+    """Empty group accumulator"""
+    return [0, 0, 0.0, _INF, -_INF]
+
+
+def _row(keys: Sequence[GroupKey], group: Tuple, entry: List) -> Dict[str, Any]:
+    has_values = entry[VALUES] > 0
+    return {
+        'keys': {key.name: value for key, value in zip(keys, group)},
+        'count': entry[ROWS],
+        'total': entry[TOTAL],
+        'average': entry[TOTAL] / entry[VALUES] if has_values else None,
+        'min': entry[MIN] if has_values else None,
+        'max': entry[MAX] if has_values else None
+    }
+
+
+def top_groups(groups: Dict[Tuple, List], keys: Sequence[GroupKey], limit: int = 10,
+               sort: str = 'total', descending: bool = True) -> List[Dict[str, Any]]:
+    """
+    The limit best groups by a sort field, selected with a heap
+
+    Groups without numeric values rank last for average/min/max.
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Campo de ordenação inválido: {sort}")
+
+    worst = float('-inf') if descending else float('inf')
+
+    if sort == 'total':
+        rank = lambda pair: pair[1][TOTAL]
+    elif sort == 'count':
+        rank = lambda pair: pair[1][ROWS]
+    elif sort == 'average':
+        rank = lambda pair: pair[1][TOTAL] / pair[1][VALUES] if pair[1][VALUES] else worst
+    else:
+        slot = MIN if sort == 'min' else MAX
+        rank = lambda pair: pair[1][slot] if pair[1][VALUES] else worst
+
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return [_row(keys, group, entry) for group, entry in select(limit, groups.items(), key=rank)]
+
+
+def group_summary(data: Iterable[Dict], keys: Sequence[GroupKey], value_key: Optional[str] = None,
+                  limit: int = 10, sort: str = 'total', descending: bool = True) -> Dict[str, Any]:
+    """Top groups plus the number of groups found"""
+    groups = group_by(data, keys, value_key)
+
+    return {
+        'keys': [key.name for key in keys],
+        'value_key': value_key,
+        'sort': sort,
+        'order': 'desc' if descending else 'asc',
+        'groups': len(groups),
+        'items': top_groups(groups, keys, limit, sort, descending)
+    }
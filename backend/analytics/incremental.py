@@ -0,0 +1,217 @@
+"""
+Incremental analytics - running aggregates updated as records arrive
+"""
+import math
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from utils.columnar import ColumnarStore
+from utils.classifier import default_classifier
+from .distribution import KLLSketch
+
+_ABSENT = object()
+
+
+class RunningStats:
+    """Count, total, min/max, Welford variance and a quantile sketch over a value stream"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.quantiles = KLLSketch()
+        # min/max/quantiles still count removed values (see remove)
+        self.stale = False
+
+    @classmethod
+    def from_values(cls, values: Sequence[float]) -> 'RunningStats':
+        """Build the running state for a full column at once (no sorting)"""
+        stats = cls()
+        if not len(values):
+            return stats
+
+        stats.count = len(values)
+        stats.total = math.fsum(values)
+        stats.mean = stats.total / stats.count
+        stats.m2 = math.fsum((value - stats.mean) ** 2 for value in values)
+        stats.min = min(values)
+        stats.max = max(values)
+        stats.quantiles.extend(values)
+        return stats
+
+    def add(self, value: float) -> None:
+        """Feed one value"""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        self.quantiles.add(value)
+
+    def remove(self, value: float) -> None:
+        """
+        Take back one value fed earlier
+
+        Count, total, mean and variance stay exact (reversed Welford step);
+        min, max and the sketch cannot forget a value, so they are flagged stale.
+        """
+        if self.count <= 1:
+            self.__init__()
+            return
+
+        count = self.count - 1
+        delta = value - self.mean
+        mean = self.mean - delta / count
+        self.m2 = max(self.m2 - delta * (value - mean), 0.0)
+        self.mean = mean
+        self.count = count
+        self.total -= value
+        self.stale = True
+
+    def merge(self, other: 'RunningStats') -> None:
+        """Fold in the stats of another stream (e.g. another parse chunk)"""
+        if not other.count:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.quantiles.merge(other.quantiles)
+        self.stale = self.stale or other.stale
+
+    @property
+    def stdev(self) -> float:
+        """Sample standard deviation"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0
+
+
+class IncrementalAnalytics:
+    """
+    Running analytics for one data type
+
+    Produces the same summary fields as Analyzer without rescanning the rows;
+    the median and percentiles become KLL sketch estimates for large datasets.
+    """
+
+    classifier = default_classifier
+
+    def __init__(self, analysis_type: str):
+        self.analysis_type = analysis_type
+        self.rows = 0
+        self.values = RunningStats()
+        self.categories: Dict[str, int] = {}
+        # Store the aggregates describe, rescanned when removals left them stale
+        self.source: Optional[ColumnarStore] = None
+
+    def reset(self, data: Iterable[Dict] = ()) -> None:
+        """Rebuild the aggregates from a complete dataset"""
+        self.rows = 0
+        self.values = RunningStats()
+        self.categories = {}
+
+        if isinstance(data, ColumnarStore):
+            self.source = data
+            self.rows = len(data)
+            if self.analysis_type == 'financeiro':
+                self.values = RunningStats.from_values(data.first_numeric(self.classifier.numeric_keys))
+            else:
+                for category in data.iter_first_present(self.classifier.category_keys, _ABSENT):
+                    self._count_category(category)
+            return
+
+        self.extend(data)
+
+    def add(self, item: Dict) -> None:
+        """Account for one appended record"""
+        self.rows += 1
+
+        if self.analysis_type == 'financeiro':
+            value = self.classifier.value(item)
+            if value is not None:
+                self.values.add(value)
+        else:
+            self._count_category(self.classifier.category(item, _ABSENT))
+
+    def extend(self, items: Iterable[Dict]) -> None:
+        """Account for several appended records"""
+        for item in items:
+            self.add(item)
+
+    def remove(self, item: Dict) -> None:
+        """Account for one deleted record (or the old version of a replaced one)"""
+        self.rows -= 1
+
+        if self.analysis_type == 'financeiro':
+            value = self.classifier.value(item)
+            if value is not None:
+                self.values.remove(value)
+        else:
+            label = self._category_label(self.classifier.category(item, _ABSENT))
+            count = self.categories.get(label, 0) - 1
+            if count > 0:
+                self.categories[label] = count
+            else:
+                self.categories.pop(label, None)
+
+    @staticmethod
+    def _category_label(category: Any) -> str:
+        label = str(category) if category is not _ABSENT else ''
+        return label or 'Sem categoria'
+
+    def _count_category(self, category: Any) -> None:
+        label = self._category_label(category)
+        self.categories[label] = self.categories.get(label, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current summary, in the same shape Analyzer returns"""
+        if self.analysis_type == 'financeiro':
+            return self._financial_snapshot()
+        if self.analysis_type == 'organizacional':
+            return self._organizational_snapshot()
+        return {}
+
+    def _financial_snapshot(self) -> Dict[str, Any]:
+        if not self.rows:
+            return {'total': 0, 'average': 0, 'count': 0, 'summary': 'Nenhum dado financeiro'}
+
+        if self.values.stale and self.source is not None:
+            # Removals left min/max/percentiles behind: rescan the values once
+            self.values = RunningStats.from_values(self.source.first_numeric(self.classifier.numeric_keys))
+
+        stats = self.values
+        if not stats.count:
+            return {'total': 0, 'average': 0, 'count': self.rows, 'summary': 'Nenhum valor numérico encontrado'}
+
+        return {
+            'total': stats.total,
+            'average': stats.mean,
+            'median': stats.quantiles.quantile(0.5),
+            'percentiles': stats.quantiles.percentiles(),
+            'min': stats.min,
+            'max': stats.max,
+            'stdev': stats.stdev,
+            'count': self.rows
+        }
+
+    def _organizational_snapshot(self) -> Dict[str, Any]:
+        if not self.rows:
+            return {'total': 0, 'categories': [], 'summary': 'Nenhum dado organizacional'}
+
+        return {
+            'total': self.rows,
+            'categories': list(self.categories),
+            'distribution': dict(self.categories)
+        }
@@ -0,0 +1,253 @@
+"""
+Summary reports - per-column numeric summaries rendered as text, Markdown or CSV
+
+Numeric columns come from the column schema (the columnar store's column
+kinds, or types inferred from a sample of records), so ids, dates and
+descriptions are never summed and no value is converted by trial.
+"""
+import csv
+import io
+import math
+import re
+from collections import Counter
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from parsers.schema import SAMPLE_ROWS, INT, DECIMAL, DATE, BOOL, STRING
+from utils.columnar import ColumnarStore, PRESENT
+from utils.dates import parse_date
+
+NUMERIC_TYPES = (INT, DECIMAL)
+
+# Identifier columns: id, paciente_id, pacienteId
+_IDENTIFIER = re.compile(r'(?:id|ID|Id|.*_(?:id|ID)|.*[a-z0-9]Id)')
+
+# Column kinds of utils.columnar mapped to schema types
+_KIND_TYPES = {'int': INT, 'float': DECIMAL, 'date': DATE}
+
+RULE = '=' * 50
+
+
+def is_identifier(name: str) -> bool:
+    """True for id-like column names, which are never summarized"""
+    return _IDENTIFIER.fullmatch(name) is not None
+
+
+def _value_type(value: Any) -> Optional[str]:
+    value_type = type(value)
+    if value is None:
+        return None
+    if value_type is bool:
+        return BOOL
+    if value_type is int:
+        return INT
+    if value_type is float:
+        return DECIMAL
+    if value_type is str and parse_date(value):
+        return DATE
+    return STRING
+
+
+def _column_type(counts: Counter) -> str:
+    """Schema type from per-type value counts of a sample"""
+    if len(counts) == 1:
+        return next(iter(counts))
+
+    # Mostly numbers: a few malformed cells do not hide the column
+    numbers = counts[INT] + counts[DECIMAL]
+    if numbers * 2 > sum(counts.values()):
+        return DECIMAL if counts[DECIMAL] else INT
+    return STRING
+
+
+def record_schema(data: Iterable[Dict], sample: int = SAMPLE_ROWS) -> Dict[str, str]:
+    """
+    Column types of a dataset
+
+    A columnar store answers from its column kinds (sampling only its
+    category and mixed-type columns); a list of records from its first sample records.
+    Columns that are mostly numbers are numeric, otherwise any mix is string.
+    """
+    if isinstance(data, ColumnarStore):
+        schema = {}
+        for name, kind in data.schema().items():
+            if kind in _KIND_TYPES:
+                schema[name] = _KIND_TYPES[kind]
+            else:
+                counts = Counter(filter(None, map(_value_type, data.column(name).decode(0, min(sample, len(data))))))
+                schema[name] = _column_type(counts) if counts else STRING
+        return schema
+
+    seen: Dict[str, Counter] = {}
+    for item in islice(data, sample):
+        for key, value in item.items():
+            counts = seen.get(key)
+            if counts is None:
+                counts = seen[key] = Counter()
+            value_type = _value_type(value)
+            if value_type is not None:
+                counts[value_type] += 1
+
+    return {key: _column_type(counts) if counts else STRING for key, counts in seen.items()}
+
+
+def _summarize_store(store: ColumnarStore, names: List[str]) -> Dict[str, List]:
+    """[count, total, min, max] per column, straight from the column buffers"""
+    summaries = {}
+
+    for name in names:
+        column = store.column(name)
+        if column.kind not in ('int', 'float'):
+            summaries.update(_summarize_records(({name: value} for value in column.decode()), [name]))
+            continue
+        if column.complete:
+            values = column.data
+        else:
+            values = [value for value, state in zip(column.data, column.mask) if state == PRESENT]
+
+        if len(values):
+            summaries[name] = [len(values), math.fsum(values), min(values), max(values)]
+        else:
+            summaries[name] = [0, 0.0, None, None]
+
+    return summaries
+
+
+def _summarize_records(data: Iterable[Dict], names: List[str]) -> Dict[str, List]:
+    """[count, total, min, max] per column in one pass over the records"""
+    summaries = {name: [0, 0.0, None, None] for name in names}
+    targets = list(summaries.items())
+
+    for item in data:
+        for name, summary in targets:
+            value = item.get(name)
+            value_type = type(value)
+            # Only real numbers count; bools and numeric-looking text do not
+            if value_type is not int and value_type is not float:
+                continue
+
+            if summary[0]:
+                if value < summary[2]:
+                    summary[2] = value
+                elif value > summary[3]:
+                    summary[3] = value
+            else:
+                summary[2] = summary[3] = value
+            summary[0] += 1
+            summary[1] += value
+
+    return summaries
+
+
+def summarize(data: Iterable[Dict], title: str, schema: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Aggregate a dataset once for every report format
+
+    schema overrides the inferred column types (e.g. DataParser.schema).
+    """
+    schema = schema or record_schema(data)
+    names = [name for name, column_type in schema.items()
+             if column_type in NUMERIC_TYPES and not is_identifier(name)]
+
+    if isinstance(data, ColumnarStore):
+        summaries = _summarize_store(data, [name for name in names if data.column(name) is not None])
+    else:
+        summaries = _summarize_records(data, names)
+
+    columns = []
+    for name, (count, total, low, high) in summaries.items():
+        columns.append({
+            'name': name,
+            'type': schema[name],
+            'count': count,
+            'total': total,
+            'average': total / count if count else None,
+            'min': low,
+            'max': high
+        })
+
+    return {
+        'title': title,
+        'records': len(data),
+        'columns': columns
+    }
+
+
+def _number(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.2f}"
+
+
+def render_text(summary: Dict[str, Any]) -> str:
+    """Plain text report"""
+    if not summary['records']:
+        return f"{summary['title']}: Sem dados"
+
+    lines = ['', RULE, summary['title'], RULE, '', f"Total de registros: {summary['records']}"]
+
+    for column in summary['columns']:
+        lines += [
+            '',
+            f"[{column['name']}]",
+            f"Valores: {column['count']}",
+            f"Soma: {_number(column['total'])}",
+            f"Média: {_number(column['average'])}",
+            f"Máximo: {_number(column['max'])}",
+            f"Mínimo: {_number(column['min'])}"
+        ]
+
+    lines += ['', RULE, '']
+    return '\n'.join(lines)
+
+
+def render_markdown(summary: Dict[str, Any]) -> str:
+    """Markdown report with one table row per numeric column"""
+    lines = [f"# {summary['title']}", '']
+
+    if not summary['records']:
+        return '\n'.join(lines + ['Sem dados', ''])
+
+    lines.append(f"Total de registros: **{summary['records']}**")
+
+    if summary['columns']:
+        lines += [
+            '',
+            '| Coluna | Valores | Soma | Média | Mínimo | Máximo |',
+            '| --- | ---: | ---: | ---: | ---: | ---: |'
+        ]
+        for column in summary['columns']:
+            name = column['name'].replace('|', '\\|')
+            lines.append(
+                f"| {name} | {column['count']} | {_number(column['total'])} | {_number(column['average'])} "
+                f"| {_number(column['min'])} | {_number(column['max'])} |"
+            )
+
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def render_csv(summary: Dict[str, Any]) -> str:
+    """CSV report: one row per numeric column"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['coluna', 'tipo', 'registros', 'valores', 'soma', 'media', 'minimo', 'maximo'])
+
+    for column in summary['columns']:
+        writer.writerow([
+            column['name'], column['type'], summary['records'], column['count'],
+            column['total'], column['average'], column['min'], column['max']
+        ])
+
+    return buffer.getvalue()
+
+
+REPORT_FORMATS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'text': render_text,
+    'markdown': render_markdown,
+    'csv': render_csv
+}
+
+REPORT_MIMETYPES = {
+    'text': 'text/plain',
+    'markdown': 'text/markdown',
+    'csv': 'text/csv'
+}
@@ -0,0 +1,248 @@
+"""
+Trend engine - date-bucketed totals and rolling windows
+
+Dates are parsed once into day ordinals (YYYY-MM-DD and DD/MM/YYYY land on
+the same day), totalled per day in a single pass and then rolled up into
+calendar buckets.
+"""
+from datetime import date
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.columnar import ColumnarStore
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+from utils.dates import ISO_DATE, format_ordinal, parse_date
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter')
+
+# Moving-sum windows (days) reported by default
+DEFAULT_WINDOWS = (7, 30)
+
+
+class DailyTotals:
+    """
+    Per-day sums and row counts, keyed by day ordinal
+
+    Rows without a parseable date are summed into undated_total. Without a
+    value_key every dated row counts as 1, so totals become row counts.
+    """
+
+    def __init__(self):
+        self.totals: Dict[int, float] = {}
+        self.counts: Dict[int, int] = {}
+        self.undated_total = 0.0
+        self.undated_count = 0
+
+    @classmethod
+    def from_data(cls, data: Iterable[Dict], value_key: Optional[str], date_key: str = 'data') -> 'DailyTotals':
+        """Total a dataset per day in one pass"""
+        daily = cls()
+
+        if isinstance(data, ColumnarStore) and daily._add_columns(data, value_key, date_key):
+            return daily
+
+        # Sum per raw date string first; each distinct string is parsed once
+        by_raw: Dict[Any, List] = {}
+        for item in data:
+            if value_key is None:
+                value = 1.0
+            else:
+                value = item.get(value_key)
+                if type(value) is not float:
+                    value = to_number(value)
+                    if value is None:
+                        continue
+
+            raw = item.get(date_key)
+            if type(raw) is not str:
+                daily.undated_total += value
+                daily.undated_count += 1
+                continue
+
+            entry = by_raw.get(raw)
+            if entry is None:
+                entry = by_raw[raw] = [0.0, 0]
+            entry[0] += value
+            entry[1] += 1
+
+        totals = daily.totals
+        counts = daily.counts
+        for raw, (total, count) in by_raw.items():
+            parsed = parse_date(raw)
+            if parsed is None:
+                daily.undated_total += total
+                daily.undated_count += count
+                continue
+            ordinal = parsed[0]
+            totals[ordinal] = totals.get(ordinal, 0.0) + total
+            counts[ordinal] = counts.get(ordinal, 0) + count
+
+        return daily
+
+    def _add_columns(self, store: ColumnarStore, value_key: Optional[str], date_key: str) -> bool:
+        """
+        Fast path over a date column's ordinal buffer
+
+        Returns False (nothing added) when the columns are not a complete
+        date column plus a complete numeric column.
+        """
+        dates = store.column(date_key)
+        if dates is None or dates.kind != 'date' or not dates.complete:
+            return False
+
+        if value_key is None:
+            values = None
+        else:
+            column = store.column(value_key)
+            values = column.floats() if column is not None else None
+            if values is None:
+                return False
+
+        if np is not None:
+            self._add_bincount(dates.data, values)
+            return True
+
+        totals = self.totals
+        counts = self.counts
+        for ordinal, value in zip(dates.data, repeat(1.0) if values is None else values):
+            totals[ordinal] = totals.get(ordinal, 0.0) + value
+            counts[ordinal] = counts.get(ordinal, 0) + 1
+
+        return True
+
+    def _add_bincount(self, ordinals, values) -> None:
+        """NumPy version of the per-day sums (one bin per day in the date span)"""
+        days = np.frombuffer(ordinals, dtype=np.int32)
+        if not days.size:
+            return
+
+        first = int(days.min())
+        offsets = days - first
+        counts = np.bincount(offsets)
+        weights = None if values is None else np.frombuffer(values, dtype=np.float64)
+        totals = counts.astype(np.float64) if weights is None else np.bincount(offsets, weights=weights)
+
+        for offset in np.flatnonzero(counts).tolist():
+            ordinal = first + offset
+            self.totals[ordinal] = self.totals.get(ordinal, 0.0) + float(totals[offset])
+            self.counts[ordinal] = self.counts.get(ordinal, 0) + int(counts[offset])
+
+    def days(self) -> List[Tuple[int, float, int]]:
+        """(ordinal, total, count) per day with data, in date order"""
+        counts = self.counts
+        return [(ordinal, total, counts[ordinal]) for ordinal, total in sorted(self.totals.items())]
+
+
+def to_number(value: Any) -> Optional[float]:
+    """Float value of a cell, or None when it is not numeric"""
+    if type(value) is float or type(value) is int:
+        return float(value)
+    if value is None or type(value) is bool:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def bucket_start(ordinal: int, granularity: str) -> int:
+    """Ordinal of the first day of the bucket containing ordinal"""
+    if granularity == 'day':
+        return ordinal
+    if granularity == 'week':
+        # Ordinal 1 (0001-01-01) is a Monday
+        return ordinal - (ordinal - 1) % 7
+
+    day = date.fromordinal(ordinal)
+    if granularity == 'month':
+        return date(day.year, day.month, 1).toordinal()
+    if granularity == 'quarter':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1).toordinal()
+
+    raise ValueError(f"Granularidade inválida: {granularity}")
+
+
+def bucket_label(start: int, granularity: str) -> str:
+    """Display label of a bucket (2024-03-15, 2024-W11, 2024-03, 2024-Q1)"""
+    day = date.fromordinal(start)
+
+    if granularity == 'week':
+        year, week, _ = day.isocalendar()
+        return f"{year:04d}-W{week:02d}"
+    if granularity == 'month':
+        return f"{day.year:04d}-{day.month:02d}"
+    if granularity == 'quarter':
+        return f"{day.year:04d}-Q{(day.month - 1) // 3 + 1}"
+
+    return format_ordinal(start, ISO_DATE)
+
+
+def rollup(daily: DailyTotals, granularity: str = 'day') -> List[Dict[str, Any]]:
+    """Bucket the daily totals, oldest bucket first"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity}")
+
+    buckets: Dict[int, List] = {}
+    for ordinal, total, count in daily.days():
+        start = bucket_start(ordinal, granularity)
+        bucket = buckets.get(start)
+        if bucket is None:
+            buckets[start] = [total, count]
+        else:
+            bucket[0] += total
+            bucket[1] += count
+
+    return [
+        {
+            'period': bucket_label(start, granularity),
+            'start': format_ordinal(start, ISO_DATE),
+            'total': total,
+            'count': count,
+            'average': total / count
+        }
+        for start, (total, count) in buckets.items()
+    ]
+
+
+def rolling_sums(daily: DailyTotals, window: int) -> List[Dict[str, Any]]:
+    """
+    Moving sum over the last window calendar days, for each day with data
+
+    Days enter and leave the running sum once each, so the cost does not
+    depend on the window size.
+    """
+    if window < 1:
+        raise ValueError(f"Janela inválida: {window}")
+
+    days = daily.days()
+    result = []
+    running = 0.0
+    oldest = 0
+
+    for ordinal, total, _ in days:
+        running += total
+        while days[oldest][0] <= ordinal - window:
+            running -= days[oldest][1]
+            oldest += 1
+        result.append({'date': format_ordinal(ordinal, ISO_DATE), 'total': running})
+
+    return result
+
+
+def trend_analysis(data: Iterable[Dict], value_key: Optional[str], date_key: str = 'data',
+                   granularity: str = 'day', windows: Sequence[int] = DEFAULT_WINDOWS) -> Dict[str, Any]:
+    """Bucketed totals plus daily moving sums for each window"""
+    daily = DailyTotals.from_data(data, value_key, date_key)
+
+    return {
+        'granularity': granularity,
+        'value_key': value_key,
+        'date_key': date_key,
+        'periods': rollup(daily, granularity),
+        'rolling': {str(window): rolling_sums(daily, window) for window in windows},
+        'undated': {'total': daily.undated_total, 'count': daily.undated_count}
+    }
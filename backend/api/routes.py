@@ -1,76 +1,225 @@
 """
 API Routes
 """
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response
 import sys
 import os
+import base64
+import threading
 from datetime import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from config import Config
+from ingest import ingest_text, resolve_input_path, check_encoding
 from parsers.parser import DataParser
 from parsers.formats import FormatDetector
+from parsers.streaming import iter_text_chunks, map_text, map_file_text, FILE_ENCODING
 from analytics.analyzer import Analyzer
+from analytics.incremental import IncrementalAnalytics
+from analytics.trends import GRANULARITIES, DEFAULT_WINDOWS, trend_analysis
+from analytics.distribution import HISTOGRAM_MODES, describe
+from analytics.groupby import SORT_FIELDS, group_summary, parse_keys
+from analytics.comparison import BASELINES, DEFAULT_PERIODS, compare_periods, daily_table, period_table
+from analytics.report import REPORT_FORMATS, REPORT_MIMETYPES, summarize
 from utils.validators import Validator
 from utils.storage import DataStore
+from utils.columnar import ColumnarStore
+from utils.cache import ResultCache, VersionedCache
+from utils.sql_store import SQLiteRecordStore
+from utils.state_mirror import StateMirror
+from utils.classifier import default_classifier
+from utils.dates import DEFAULT_DATE_KEYS, to_ordinal
+from utils.export import EXPORTERS, EXPORT_FORMATS, gzip_chunks
 from utils.logger import logger
 
 api_bp = Blueprint('api', __name__)
 
-# Global data storage
+# Global data storage (columnar, see utils/columnar.py)
 app_data = {
-    'financeiro': [],
-    'organizacional': []
+    'financeiro': ColumnarStore(),
+    'organizacional': ColumnarStore()
 }
 
+# Running aggregates kept in sync with app_data
+live_analytics = {
+    'financeiro': IncrementalAnalytics('financeiro'),
+    'organizacional': IncrementalAnalytics('organizacional')
+}
+
+# Serialized analytics responses, invalidated whenever app_data changes
+analytics_cache = ResultCache()
+
+# (day, category) tables behind /analytics/<type>/compare, per data version
+period_cache = VersionedCache()
+
+# State collections app_data currently holds, patched delta by delta;
+# state_lock orders journal appends with their in-memory application
+state_mirror = StateMirror()
+state_lock = threading.Lock()
+
+# Persisted state collections mirrored into app_data
+STATE_COLLECTIONS = {
+    'evolucoes': 'organizacional',
+    'financeiro_records': 'financeiro'
+}
+
+# Page size bounds for /data/<type>/items
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Longest moving-sum window accepted by /analytics/<type>/trends (days)
+MAX_TREND_WINDOW = 366
+
+# Histogram bins for /analytics/<type>/distribution
+DEFAULT_HISTOGRAM_BINS = 10
+MAX_HISTOGRAM_BINS = 100
+
+# Grouping keys accepted by /analytics/groupby
+MAX_GROUP_KEYS = 4
+
+# Periods returned by /analytics/<type>/compare
+MAX_COMPARE_PERIODS = 120
+
 data_store = DataStore()
 
+# Optional indexed copy of app_data for filtered queries (/query/<type>)
+record_store = None
+if Config.RECORD_STORE == 'sqlite':
+    record_store = SQLiteRecordStore(
+        os.path.join(data_store.storage_dir, 'records.sqlite3'),
+        default_classifier
+    )
 
-def _update_app_data_from_state(state: dict) -> None:
-    """Hydrate in-memory cache using persisted state"""
+
+def _set_app_data(data_type: str, store: ColumnarStore, analytics: IncrementalAnalytics = None) -> None:
+    """Replace a dataset together with the running analytics summarizing it"""
+    if analytics is None:
+        analytics = IncrementalAnalytics(data_type)
+        analytics.reset(store)
+    analytics.source = store
+
+    for collection, mirrored_type in STATE_COLLECTIONS.items():
+        if mirrored_type == data_type:
+            state_mirror.forget(collection)
+
+    app_data[data_type] = store
+    live_analytics[data_type] = analytics
+    analytics_cache.bump()
+
+    if record_store is not None:
+        record_store.replace(data_type, store)
+
+
+def _state_collections(state: dict) -> list:
+    """Mirrored collections a persisted state holds"""
+    return [collection for collection in STATE_COLLECTIONS if isinstance(state.get(collection), list)]
+
+
+def _update_app_data_from_state(state: dict, seq: int = None) -> None:
+    """Hydrate in-memory cache using persisted state (as of journal sequence seq)"""
     if not isinstance(state, dict):
         return
 
-    evolucoes = state.get('evolucoes')
-    financeiro_records = state.get('financeiro_records')
+    loaded = _state_collections(state)
+    for collection in loaded:
+        _set_app_data(STATE_COLLECTIONS[collection], ColumnarStore(state[collection]))
+
+    state_mirror.reset(seq, loaded)
 
-    if isinstance(evolucoes, list):
-        app_data['organizacional'] = evolucoes
 
-    if isinstance(financeiro_records, list):
-        app_data['financeiro'] = financeiro_records
+def _apply_state_delta(delta: dict, seq: int) -> None:
+    """
+    Bring app_data up to date with a delta just journaled as seq
+
+    When app_data mirrors the touched collections at seq - 1 the delta is
+    applied to the stores and running analytics in place; otherwise (a parse
+    replaced them, or another process wrote to the state) they are reloaded.
+    """
+    replaced = delta.get('set') or {}
+    touched = ({delta.get('collection')} | replaced.keys()) & STATE_COLLECTIONS.keys()
+
+    if not state_mirror.follows(seq, touched) or \
+            any(not isinstance(replaced[collection], list) for collection in touched & replaced.keys()):
+        if touched:
+            _update_app_data_from_state(*data_store.load_state_versioned())
+        else:
+            state_mirror.invalidate()
+        return
+
+    for collection in touched:
+        data_type = STATE_COLLECTIONS[collection]
+        if collection in replaced:
+            _set_app_data(data_type, ColumnarStore(replaced[collection]))
+            state_mirror.add(collection)
+
+        if collection == delta.get('collection'):
+            state_mirror.apply(collection, app_data[data_type], live_analytics[data_type], delta)
+            analytics_cache.bump()
+            if record_store is not None:
+                record_store.apply_delta(data_type, delta)
+
+    state_mirror.seq = seq
+
+def _ingest(chunks, source: str = None):
+    """Parse a text stream into app_data and a saved session, without echoing the rows"""
+    ingested = ingest_text(chunks, data_store, source)
+
+    if ingested is None:
+        return jsonify({'success': False, 'message': 'Nenhum dado fornecido'}), 400
+
+    for data_type, store in ingested['stores'].items():
+        _set_app_data(data_type, store, ingested['analytics'][data_type])
+
+    return jsonify({
+        'success': True,
+        'message': 'Dados processados com sucesso',
+        **ingested['summary']
+    })
+
+def _parse_stream():
+    """Parse a raw request body incrementally"""
+    try:
+        return _ingest(iter_text_chunks(request.stream))
+    except ValueError as e:
+        # Malformed input (e.g. a single invalid JSON object)
+        return jsonify({'success': False, 'message': str(e)}), 400
 
 @api_bp.route('/parse', methods=['POST'])
 def parse_data():
     """Parse incoming data"""
     try:
+        # Raw bodies (text/csv, text/plain, ...) are parsed as a stream
+        if not request.is_json:
+            return _parse_stream()
+
         payload = request.get_json()
         data_input = payload.get('data', '')
 
         if not data_input:
             return jsonify({'success': False, 'message': 'Nenhum dado fornecido'}), 400
 
-        # Detect format
-        detected_format = FormatDetector.detect_format(data_input)
-        logger.info(f"Formato detectado: {detected_format}")
+        # Detect format (once; the parser reuses it)
+        detection = FormatDetector.detect(data_input)
+        logger.info(f"Formato detectado: {detection.format} (confiança {detection.confidence:.2f})")
 
-        parser = DataParser()
-        parsed_data = parser.parse(data_input)
+        parser = DataParser(Config.PARSE_WORKERS, Config.PARALLEL_PARSE_BYTES)
+        parsed_data = parser.parse(data_input, detection)
 
         # Validate
         is_valid_fin, msg_fin = Validator.validate_data_array(parsed_data.get('financeiro', []))
         is_valid_org, msg_org = Validator.validate_data_array(parsed_data.get('organizacional', []))
 
         # Store parsed data
-        app_data['financeiro'] = parsed_data.get('financeiro', [])
-        app_data['organizacional'] = parsed_data.get('organizacional', [])
+        _set_app_data('financeiro', ColumnarStore(parsed_data.get('financeiro', [])))
+        _set_app_data('organizacional', ColumnarStore(parsed_data.get('organizacional', [])))
 
         logger.info(f"Dados parseados: {len(app_data['financeiro'])} financeiro, {len(app_data['organizacional'])} organizacional")
 
         # Save session
         session_file = data_store.save_session('analise', {
             'timestamp': datetime.now().isoformat(),
-            'format': detected_format,
+            'format': detection.format,
             'data': parsed_data
         })
 
@@ -82,7 +231,10 @@ def parse_data():
                 'financeiro': len(parsed_data.get('financeiro', [])),
                 'organizacional': len(parsed_data.get('organizacional', []))
             },
-            'format': detected_format,
+            'format': detection.format,
+            'confidence': detection.confidence,
+            'schema': parser.schema,
+            'errors': parser.errors,
             'session_id': os.path.basename(session_file)
         })
 
@@ -90,6 +242,66 @@ def parse_data():
         logger.error(f"Erro ao processar dados: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@api_bp.route('/ingest', methods=['POST'])
+def ingest_file():
+    """
+    Import a file without sending it as a JSON string
+
+    Either a multipart upload ('file') or {"path": ...} naming a file under
+    data/input; the file is read through a memory map.
+    """
+    try:
+        upload = request.files.get('file')
+        payload = {} if upload is not None else (request.get_json(silent=True) or {})
+        encoding = request.form.get('encoding') or payload.get('encoding') or FILE_ENCODING
+
+        try:
+            check_encoding(encoding)
+
+            if upload is not None:
+                with map_text(upload.stream, encoding) as chunks:
+                    return _ingest(chunks, upload.filename)
+
+            name = payload.get('path')
+            if not name:
+                return jsonify({'success': False, 'message': 'Informe um arquivo (file) ou caminho (path)'}), 400
+
+            filepath = resolve_input_path(name)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        with map_file_text(filepath, encoding) as chunks:
+            return _ingest(chunks, name)
+
+    except Exception as e:
+        logger.error(f"Erro ao importar arquivo: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _cached_response(cache_key: tuple, build):
+    """
+    Serve a JSON body from analytics_cache, honouring If-None-Match
+
+    build() is only called on a miss; its dict is serialized and cached
+    for the current data version.
+    """
+    version = analytics_cache.version
+    etag = analytics_cache.etag_for(cache_key, version)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    cached = analytics_cache.get(cache_key)
+
+    if cached is None:
+        body = jsonify(build()).get_data()
+        cached = analytics_cache.put(cache_key, body, version)
+
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    return response
+
 @api_bp.route('/analytics/<analysis_type>', methods=['GET'])
 def get_analytics(analysis_type):
     """Get analytics for a specific type"""
@@ -97,19 +309,357 @@ def get_analytics(analysis_type):
         if analysis_type not in app_data:
             return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
 
-        analyzer = Analyzer()
-        analysis = analyzer.analyze(app_data[analysis_type], analysis_type)
+        def build():
+            # Full recompute with embedded rows only on request (?items=1)
+            if request.args.get('items'):
+                analyzer = Analyzer()
+                analysis = analyzer.analyze(app_data[analysis_type], analysis_type, include_items=True)
+            else:
+                analysis = live_analytics[analysis_type].snapshot()
+
+            logger.info(f"Análise gerada para: {analysis_type}")
+
+            return {
+                'success': True,
+                'type': analysis_type,
+                'analysis': analysis
+            }
+
+        return _cached_response((analysis_type, tuple(sorted(request.args.items()))), build)
+
+    except Exception as e:
+        logger.error(f"Erro na análise: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _first_column(store: ColumnarStore, keys) -> str:
+    """First of keys that is a column of store, or None"""
+    columns = set(store.columns)
+    return next((key for key in keys if key in columns), None)
+
+@api_bp.route('/analytics/<data_type>/trends', methods=['GET'])
+def get_trends(data_type):
+    """
+    Totals per day, week, month or quarter plus moving sums
+
+    ?granularity=day|week|month|quarter, ?window= (days, repeatable or
+    comma-separated, default 7 and 30), ?value_key=, ?date_key=.
+    Without a numeric column the totals count records.
+    """
+    try:
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return jsonify({'success': False, 'message': f"Granularidade inválida: {granularity}"}), 400
+
+        try:
+            windows = sorted({
+                int(value)
+                for arg in request.args.getlist('window')
+                for value in arg.split(',') if value
+            }) or list(DEFAULT_WINDOWS)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Janela inválida'}), 400
+
+        if windows[0] < 1 or windows[-1] > MAX_TREND_WINDOW:
+            return jsonify({'success': False, 'message': f"Janela deve estar entre 1 e {MAX_TREND_WINDOW} dias"}), 400
+
+        store = app_data[data_type]
+        value_key = request.args.get('value_key') or _first_column(store, default_classifier.numeric_keys)
+        date_key = request.args.get('date_key') or _first_column(store, DEFAULT_DATE_KEYS) or 'data'
+
+        def build():
+            return {
+                'success': True,
+                'type': data_type,
+                'trends': trend_analysis(store, value_key, date_key, granularity, windows)
+            }
+
+        cache_key = ('trends', data_type, value_key, date_key, granularity, tuple(windows))
+        return _cached_response(cache_key, build)
+
+    except Exception as e:
+        logger.error(f"Erro na análise de tendências: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@api_bp.route('/analytics/<data_type>/distribution', methods=['GET'])
+def get_distribution(data_type):
+    """
+    Percentiles (p50/p90/p99) and histogram of a numeric column
+
+    ?bins= (default 10), ?mode=fixed|quantile, ?value_key= (default: the
+    first numeric key present).
+    """
+    try:
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        mode = request.args.get('mode', 'fixed')
+        if mode not in HISTOGRAM_MODES:
+            return jsonify({'success': False, 'message': f"Modo de histograma inválido: {mode}"}), 400
+
+        bins = request.args.get('bins', DEFAULT_HISTOGRAM_BINS, type=int)
+        if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+            return jsonify({'success': False, 'message': f"bins deve estar entre 1 e {MAX_HISTOGRAM_BINS}"}), 400
+
+        store = app_data[data_type]
+        value_key = request.args.get('value_key') or _first_column(store, default_classifier.numeric_keys)
+
+        def build():
+            values = store.first_numeric([value_key]) if value_key else []
+            return {
+                'success': True,
+                'type': data_type,
+                'value_key': value_key,
+                'distribution': describe(values, bins, mode)
+            }
+
+        return _cached_response(('distribution', data_type, value_key, bins, mode), build)
+
+    except Exception as e:
+        logger.error(f"Erro na distribuição: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@api_bp.route('/analytics/groupby', methods=['GET'])
+def get_groupby():
+    """
+    Top groups by one or more keys
+
+    ?type=financeiro|organizacional, ?keys=categoria,data:month (a date key
+    may be bucketed by day/week/month/quarter), ?value_key= (default: the
+    first numeric key present), ?sort=total|count|average|min|max,
+    ?order=desc|asc, ?limit= (default 10).
+    """
+    try:
+        data_type = request.args.get('type', 'financeiro')
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        sort = request.args.get('sort', 'total')
+        order = request.args.get('order', 'desc')
+        if sort not in SORT_FIELDS or order not in ('asc', 'desc'):
+            return jsonify({'success': False, 'message': 'Ordenação inválida'}), 400
+
+        try:
+            keys = parse_keys(request.args.get('keys', 'categoria'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
 
-        logger.info(f"Análise gerada para: {analysis_type}")
+        if len(keys) > MAX_GROUP_KEYS:
+            return jsonify({'success': False, 'message': f"Use no máximo {MAX_GROUP_KEYS} chaves"}), 400
+
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_PAGE_SIZE)
+
+        store = app_data[data_type]
+        value_key = request.args.get('value_key') or _first_column(store, default_classifier.numeric_keys)
+
+        def build():
+            return {
+                'success': True,
+                'type': data_type,
+                'groupby': group_summary(store, keys, value_key, limit, sort, order == 'desc')
+            }
+
+        cache_key = ('groupby', data_type, tuple(keys), value_key, sort, order, limit)
+        return _cached_response(cache_key, build)
+
+    except Exception as e:
+        logger.error(f"Erro no agrupamento: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _parse_date_arg(name: str):
+    """Day ordinal of a date query argument (None when absent), ValueError if invalid"""
+    value = request.args.get(name)
+    if not value:
+        return None
+
+    ordinal = to_ordinal(value)
+    if ordinal is None:
+        raise ValueError(f"Data inválida em '{name}': {value}")
+    return ordinal
+
+@api_bp.route('/analytics/<data_type>/compare', methods=['GET'])
+def compare_periods_endpoint(data_type):
+    """
+    Compare periods with the previous period or the same period last year
+
+    ?granularity=day|week|month|quarter (default month),
+    ?baseline=previous|year, ?from=&to= (dates), ?periods= (latest N with
+    data, default 12), ?value_key=, ?date_key=, ?category_key=. Rows are
+    counted when the data has no value column. The (day, category) table behind it is built in one pass and reused
+    until the data changes.
+    """
+    try:
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        granularity = request.args.get('granularity', 'month')
+        baseline = request.args.get('baseline', 'previous')
+        if granularity not in GRANULARITIES or baseline not in BASELINES:
+            return jsonify({'success': False, 'message': 'Granularidade ou base de comparação inválida'}), 400
+
+        try:
+            first = _parse_date_arg('from')
+            last = _parse_date_arg('to')
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        limit = min(max(request.args.get('periods', DEFAULT_PERIODS, type=int), 1), MAX_COMPARE_PERIODS)
+
+        store = app_data[data_type]
+        value_key = request.args.get('value_key') or _first_column(store, default_classifier.numeric_keys)
+        date_key = request.args.get('date_key') or _first_column(store, DEFAULT_DATE_KEYS) or 'data'
+        category_key = request.args.get('category_key') or _first_column(store, default_classifier.category_keys)
+
+        def build():
+            version = analytics_cache.version
+            table_key = (data_type, value_key, date_key, category_key)
+            daily = period_cache.get(table_key, version)
+            if daily is None:
+                daily = daily_table(store, value_key, date_key, category_key)
+                period_cache.put(table_key, daily, version)
+
+            periods = period_table(daily, granularity)
+
+            return {
+                'success': True,
+                'type': data_type,
+                'granularity': granularity,
+                'baseline': baseline,
+                'value_key': value_key,
+                'category_key': category_key,
+                'periods': compare_periods(periods, granularity, baseline, first, last, limit)
+            }
+
+        cache_key = ('compare', data_type, value_key, date_key, category_key,
+                     granularity, baseline, first, last, limit)
+        return _cached_response(cache_key, build)
+
+    except Exception as e:
+        logger.error(f"Erro na comparação: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@api_bp.route('/analytics/<data_type>/report', methods=['GET'])
+def get_report(data_type):
+    """
+    Summary report of the numeric columns (ids excluded)
+
+    ?format=text|markdown|csv (default text), ?title=.
+    """
+    try:
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        report_format = request.args.get('format', 'text')
+        if report_format not in REPORT_FORMATS:
+            return jsonify({'success': False, 'message': f"Formato de relatório inválido: {report_format}"}), 400
+
+        title = request.args.get('title') or f"Relatório {data_type}"
+        report = REPORT_FORMATS[report_format](summarize(app_data[data_type], title))
+
+        return Response(report, mimetype=f"{REPORT_MIMETYPES[report_format]}; charset=utf-8")
+
+    except Exception as e:
+        logger.error(f"Erro no relatório: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _encode_cursor(version: int, offset: int) -> str:
+    """Opaque pagination cursor bound to a data version"""
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode('ascii')).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Return (version, offset) from a cursor, raising ValueError if malformed"""
+    version, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+    return int(version), int(offset)
+
+@api_bp.route('/data/<data_type>/items', methods=['GET'])
+def get_items(data_type):
+    """Page through stored rows, optionally projecting a subset of fields"""
+    try:
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        version = analytics_cache.version
+        store = app_data[data_type]
+
+        try:
+            limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            cursor = request.args.get('cursor')
+            offset = 0
+
+            if cursor:
+                cursor_version, offset = _decode_cursor(cursor)
+                if cursor_version != version:
+                    return jsonify({'success': False, 'message': 'Cursor expirado: os dados foram alterados'}), 409
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Parâmetros de paginação inválidos'}), 400
+
+        fields = request.args.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+        items = list(store.iter_records(offset, offset + limit, fields))
+        next_offset = offset + len(items)
 
         return jsonify({
             'success': True,
-            'type': analysis_type,
-            'analysis': analysis
+            'type': data_type,
+            'total': len(store),
+            'items': items,
+            'next_cursor': _encode_cursor(version, next_offset) if next_offset < len(store) else None
         })
 
     except Exception as e:
-        logger.error(f"Erro na análise: {str(e)}", exc_info=True)
+        logger.error(f"Erro ao listar itens: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@api_bp.route('/query/<data_type>', methods=['GET'])
+def query_records(data_type):
+    """
+    Filtered analytics answered by SQLite
+
+    ?from=&to= (date range), ?categoria= (repeatable), ?min_valor=&max_valor=,
+    ?limit=&offset= to also return matching rows.
+    """
+    try:
+        if record_store is None:
+            return jsonify({
+                'success': False,
+                'message': 'Consultas indisponíveis: defina ZENFISIO_RECORD_STORE=sqlite'
+            }), 400
+
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = min(max(limit, 1), MAX_PAGE_SIZE)
+
+        categories = [
+            value
+            for arg in request.args.getlist('categoria')
+            for value in arg.split(',') if value
+        ]
+
+        try:
+            result = record_store.query(
+                data_type,
+                date_from=request.args.get('from'),
+                date_to=request.args.get('to'),
+                categories=categories,
+                min_value=request.args.get('min_valor', type=float),
+                max_value=request.args.get('max_valor', type=float),
+                limit=limit,
+                offset=max(request.args.get('offset', 0, type=int), 0)
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({'success': True, 'type': data_type, **result})
+
+    except Exception as e:
+        logger.error(f"Erro na consulta: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @api_bp.route('/export', methods=['POST'])
@@ -144,12 +694,53 @@ def export_data():
         logger.error(f"Erro na exportação: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@api_bp.route('/export/<data_type>', methods=['GET'])
+def download_export(data_type):
+    """
+    Stream an export to the client (chunked; never built whole in memory)
+
+    ?format=csv|jsonl|json, ?gzip=1 to compress, ?fields=a,b to choose
+    columns. The CSV header is the union of every record's keys.
+    """
+    try:
+        if data_type not in app_data:
+            return jsonify({'success': False, 'message': 'Tipo inválido'}), 400
+
+        file_format = request.args.get('format', 'csv')
+        if file_format not in EXPORTERS:
+            return jsonify({'success': False, 'message': 'Formato inválido'}), 400
+
+        data = app_data[data_type]
+        if not data:
+            return jsonify({'success': False, 'message': 'Nenhum dado para exportar'}), 400
+
+        fields = [name for name in request.args.get('fields', '').split(',') if name] or None
+        # Rows appended while streaming are left out
+        chunks = EXPORTERS[file_format](data, fields, len(data))
+
+        filename = f"export_{data_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+        mimetype = EXPORT_FORMATS[file_format]
+        if request.args.get('gzip') in ('1', 'true'):
+            chunks = gzip_chunks(chunks)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+
+        logger.info(f"Exportação em fluxo: {filename}")
+
+        return Response(chunks, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+
+    except Exception as e:
+        logger.error(f"Erro na exportação: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @api_bp.route('/clear', methods=['POST'])
 def clear_data():
     """Clear all data"""
     try:
-        app_data['financeiro'] = []
-        app_data['organizacional'] = []
+        _set_app_data('financeiro', ColumnarStore())
+        _set_app_data('organizacional', ColumnarStore())
 
         logger.info("Dados limpos")
 
@@ -164,28 +755,71 @@ def clear_data():
 
 @api_bp.route('/sessions', methods=['GET'])
 def list_sessions():
-    """List all saved sessions"""
+    """List saved sessions (?limit=&offset=&from=&to= to page and filter)"""
     try:
-        sessions = data_store.list_sessions()
+        try:
+            limit = request.args.get('limit', type=int)
+            offset = request.args.get('offset', 0, type=int)
+            date_from = request.args.get('from')
+            date_to = request.args.get('to')
+
+            for value in (date_from, date_to):
+                if value:
+                    datetime.fromisoformat(value)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Parâmetros de filtro inválidos'}), 400
+
+        result = data_store.query_sessions(limit, max(offset, 0), date_from, date_to)
 
         return jsonify({
             'success': True,
-            'sessions': sessions
+            'sessions': [entry['id'] for entry in result['sessions']],
+            'entries': result['sessions'],
+            'total': result['total']
         })
 
     except Exception as e:
         logger.error(f"Erro ao listar sessões: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@api_bp.route('/sessions/prune', methods=['POST'])
+def prune_sessions():
+    """Delete sessions by retention (older_than_days and/or keep_last)"""
+    try:
+        payload = request.get_json() or {}
+        older_than_days = payload.get('older_than_days')
+        keep_last = payload.get('keep_last')
+
+        if older_than_days is None and keep_last is None:
+            return jsonify({'success': False, 'message': 'Informe older_than_days ou keep_last'}), 400
+
+        for value in (older_than_days, keep_last):
+            if value is not None and (not isinstance(value, int) or value < 0):
+                return jsonify({'success': False, 'message': 'Valores de retenção inválidos'}), 400
+
+        removed = data_store.prune_sessions(older_than_days, keep_last)
+        logger.info(f"Sessões removidas por retenção: {len(removed)}")
+
+        return jsonify({
+            'success': True,
+            'removed': removed
+        })
+
+    except Exception as e:
+        logger.error(f"Erro ao remover sessões: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 
 @api_bp.route('/state', methods=['GET'])
 def get_state():
     """Return latest persisted application state"""
     try:
-        state = data_store.load_state()
+        with state_lock:
+            state, seq = data_store.load_state_versioned()
 
-        if state:
-            _update_app_data_from_state(state)
+            # Unchanged since app_data last mirrored it: keep stores and caches
+            if state and not state_mirror.is_current(seq, _state_collections(state)):
+                _update_app_data_from_state(state, seq)
 
         return jsonify({
             'success': True,
@@ -207,8 +841,9 @@ def save_state():
         if not isinstance(state, dict):
             return jsonify({'success': False, 'message': 'Estado inválido para salvamento'}), 400
 
-        filepath = data_store.save_state(state)
-        _update_app_data_from_state(state)
+        with state_lock:
+            filepath, seq = data_store.save_state_versioned(state)
+            _update_app_data_from_state(state, seq)
 
         logger.info(f"Estado da aplicação salvo em: {filepath}")
 
@@ -223,13 +858,43 @@ def save_state():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@api_bp.route('/state/delta', methods=['POST'])
+def save_state_delta():
+    """Append a state delta to the journal instead of rewriting the state"""
+    try:
+        payload = request.get_json() or {}
+        delta = payload.get('delta')
+
+        is_valid, message = Validator.validate_state_delta(delta)
+        if not is_valid:
+            return jsonify({'success': False, 'message': message}), 400
+
+        with state_lock:
+            seq = data_store.append_state_delta(delta)
+            _apply_state_delta(delta, seq)
+
+        logger.info(f"Delta de estado registrado: seq {seq}")
+
+        return jsonify({
+            'success': True,
+            'message': 'Alterações registradas com sucesso',
+            'seq': seq
+        })
+
+    except Exception as e:
+        logger.error(f"Erro ao registrar delta de estado: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @api_bp.route('/state/clear', methods=['POST'])
 def clear_state():
     """Remove persisted application state"""
     try:
-        data_store.clear_state()
-        app_data['financeiro'] = []
-        app_data['organizacional'] = []
+        with state_lock:
+            data_store.clear_state()
+            _set_app_data('financeiro', ColumnarStore())
+            _set_app_data('organizacional', ColumnarStore())
+            state_mirror.invalidate()
 
         logger.info("Estado persistido removido")
 
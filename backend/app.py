@@ -5,6 +5,7 @@ import os
 import sys
 import logging
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 # Add backend to path
@@ -13,12 +14,27 @@ sys.path.insert(0, os.path.dirname(__file__))
 from api.routes import api_bp
 from parsers.parser import DataParser
 from analytics.analyzer import Analyzer
+from utils import serialization
 
 # Suppress all Flask logs completely
 logging.getLogger('werkzeug').setLevel(logging.CRITICAL)
 logging.getLogger('flask').setLevel(logging.CRITICAL)
 
+class FastJSONProvider(DefaultJSONProvider):
+    """Route Flask JSON encoding through utils.serialization (compact output)"""
+
+    def dumps(self, obj, **kwargs):
+        return serialization.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serialization.dumps(obj), mimetype=self.mimetype)
+
 app = Flask(__name__, static_folder='../frontend', static_url_path='')
+app.json = FastJSONProvider(app)
 app.config['ENV'] = 'production'
 app.config['DEBUG'] = False
 app.logger.disabled = True
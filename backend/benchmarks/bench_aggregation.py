@@ -0,0 +1,31 @@
+"""
+Benchmark: summary statistics backends for Analyzer._analyze_financial
+
+Usage: python -m benchmarks.bench_aggregation [sizes...]   (from backend/)
+"""
+import random
+import sys
+from array import array
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from analytics.aggregation import BACKENDS
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    names = sorted(BACKENDS)
+    rows = []
+
+    for size in sizes:
+        rng = random.Random(size)
+        values = array('d', (round(rng.uniform(0, 500), 2) for _ in range(size)))
+        timings = [best_of(lambda name=name: BACKENDS[name](values)) for name in names]
+        speedup = timings[names.index('python')] / min(timings)
+        rows.append([f"{size:,}"] + timings + [f"{speedup:.1f}x"])
+
+    headers = ['rows'] + names + ['speedup vs python']
+    print_table('Aggregation backends (best of 3)', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: csv-module DelimitedParser vs the former str.split reader
+
+Usage: python -m benchmarks.bench_delimited [sizes...]   (from backend/)
+"""
+import os
+import sys
+from typing import Dict, List
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from parsers.formats import CSVParser
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'input', 'exemplo.csv')
+
+
+def _legacy_parse(data: str) -> List[Dict]:
+    """CSV reading as it was before the csv module (baseline, no quoting)"""
+    lines = data.strip().split('\n')
+    headers = [h.strip() for h in lines[0].split(',')]
+    items = []
+
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        values = [v.strip() for v in line.split(',')]
+        if len(values) != len(headers):
+            continue
+
+        item = {}
+        for key, value in zip(headers, values):
+            if value.isdigit():
+                item[key] = int(value)
+            else:
+                try:
+                    item[key] = float(value)
+                except ValueError:
+                    item[key] = value
+        items.append(item)
+
+    return items
+
+
+def load_csv(size: int) -> str:
+    """exemplo.csv with its rows repeated up to size rows"""
+    with open(SAMPLE_PATH, encoding='utf-8') as handle:
+        header, *rows = [line for line in handle.read().split('\n') if line.strip()]
+    return '\n'.join([header] + (rows * (size // len(rows) + 1))[:size])
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    rows = []
+
+    for size in sizes:
+        data = load_csv(size)
+        legacy = best_of(lambda: _legacy_parse(data))
+        current = best_of(lambda: CSVParser().parse(data))
+        rows.append([
+            f"{size:,}", legacy, current,
+            f"{size / legacy:,.0f}", f"{size / current:,.0f}", f"{legacy / current:.1f}x"
+        ])
+
+    headers = ['rows', 'split', 'csv module', 'split rows/s', 'csv rows/s', 'speedup']
+    print_table('CSV reading on exemplo.csv (best of 3)', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: histogram and percentiles, legacy passes vs the distribution module
+
+Usage: python -m benchmarks.bench_distribution [sizes...]   (from backend/)
+"""
+import random
+import sys
+from array import array
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from analytics.distribution import build_sketch, fixed_width_histogram, interpolate_quantile
+
+
+def legacy_histogram(values, bins=10):
+    """AdvancedAnalytics.get_distribution_histogram binning before the distribution module"""
+    min_val = min(values)
+    max_val = max(values)
+    bin_size = (max_val - min_val) / bins
+    histogram = {}
+
+    for value in values:
+        bin_index = int((value - min_val) / bin_size)
+        if bin_index >= bins:
+            bin_index = bins - 1
+        bin_key = f"{min_val + bin_index * bin_size:.2f}-{min_val + (bin_index + 1) * bin_size:.2f}"
+        histogram[bin_key] = histogram.get(bin_key, 0) + 1
+
+    return histogram
+
+
+def sorted_percentiles(values):
+    ordered = sorted(values)
+    return [interpolate_quantile(ordered, fraction) for fraction in (0.5, 0.9, 0.99)]
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    rows = []
+
+    for size in sizes:
+        rng = random.Random(size)
+        values = array('d', (rng.lognormvariate(4, 0.8) for _ in range(size)))
+
+        rows.append([
+            f"{size:,}",
+            best_of(lambda: legacy_histogram(values)),
+            best_of(lambda: fixed_width_histogram(values)),
+            best_of(lambda: sorted_percentiles(values)),
+            best_of(lambda: build_sketch(values).percentiles())
+        ])
+
+    headers = ['rows', 'histogram (legacy)', 'histogram (new)', 'p50/p90/p99 (sort)', 'p50/p90/p99 (KLL)']
+    print_table('Distribution (best of 3)', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
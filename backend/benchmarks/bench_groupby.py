@@ -0,0 +1,78 @@
+"""
+Benchmark: top-N per category, legacy sort vs the heap-based group-by engine
+
+Usage: python -m benchmarks.bench_groupby [sizes...]   (from backend/)
+"""
+import random
+import sys
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from analytics.groupby import group_summary, parse_keys
+from utils.columnar import ColumnarStore
+
+PATIENTS = 5_000
+
+
+def legacy_top_items(data, value_key, category_key, limit=10):
+    """AdvancedAnalytics.get_top_items before the group-by engine"""
+    by_category = {}
+
+    for item in data:
+        category = item.get(category_key, 'Sem categoria')
+        try:
+            value = float(item.get(value_key, 0))
+        except (ValueError, TypeError):
+            value = 0
+
+        if category not in by_category:
+            by_category[category] = 0
+
+        by_category[category] += value
+
+    sorted_items = sorted(
+        [{'categoria': cat, 'total': val} for cat, val in by_category.items()],
+        key=lambda x: x['total'],
+        reverse=True
+    )
+
+    return sorted_items[:limit]
+
+
+def make_rows(size: int):
+    rng = random.Random(size)
+    return [
+        {
+            'data': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'paciente': f"P{rng.randrange(PATIENTS)}",
+            'valor': round(rng.uniform(50, 300), 2)
+        }
+        for _ in range(size)
+    ]
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    single = parse_keys('paciente')
+    compound = parse_keys('paciente,data:month')
+    rows = []
+
+    for size in sizes:
+        records = make_rows(size)
+        store = ColumnarStore(records)
+
+        rows.append([
+            f"{size:,}",
+            best_of(lambda: legacy_top_items(records, 'valor', 'paciente')),
+            best_of(lambda: group_summary(records, single, 'valor')),
+            best_of(lambda: group_summary(store, single, 'valor')),
+            best_of(lambda: group_summary(records, compound, 'valor')),
+            best_of(lambda: group_summary(store, compound, 'valor'))
+        ])
+
+    headers = ['rows', 'legacy top-10', 'engine (dicts)', 'engine (columnar)',
+               'paciente x month (dicts)', 'paciente x month (columnar)']
+    print_table(f"Top 10 of {PATIENTS:,} patients by total (best of 3)", headers, rows)
+
+
+if __name__ == '__main__':
+    main()
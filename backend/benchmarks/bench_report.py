@@ -0,0 +1,82 @@
+"""
+Benchmark: summary report, legacy float() trial scan vs the schema-driven report
+
+Usage: python -m benchmarks.bench_report [sizes...]   (from backend/)
+"""
+import random
+import statistics
+import sys
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from analytics.report import REPORT_FORMATS, summarize
+from utils.columnar import ColumnarStore
+
+CATEGORIES = ['Consulta', 'Sessão', 'Avaliação', 'Retorno', 'Pacote']
+
+
+def legacy_summary_report(data, title):
+    """AdvancedAnalytics.generate_summary_report before the report module"""
+    if not data:
+        return f"{title}: Sem dados"
+
+    report = f"\n{'=' * 50}\n{title}\n{'=' * 50}\n\n"
+    report += f"Total de registros: {len(data)}\n"
+
+    numeric_values = []
+    for item in data:
+        for key, value in item.items():
+            try:
+                numeric_values.append(float(value))
+            except (ValueError, TypeError):
+                continue
+
+    if numeric_values:
+        report += f"Soma: {sum(numeric_values):.2f}\n"
+        report += f"Média: {statistics.mean(numeric_values):.2f}\n"
+        report += f"Máximo: {max(numeric_values):.2f}\n"
+        report += f"Mínimo: {min(numeric_values):.2f}\n"
+
+    report += f"\n{'=' * 50}\n"
+    return report
+
+
+def make_rows(size: int):
+    rng = random.Random(size)
+    return [
+        {
+            'id': row,
+            'data': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+            'descricao': f"Atendimento {rng.randrange(1000)}",
+            'valor': round(rng.uniform(50, 300), 2),
+            'categoria': rng.choice(CATEGORIES)
+        }
+        for row in range(size)
+    ]
+
+
+def all_formats(data):
+    summary = summarize(data, 'Relatório')
+    return [render(summary) for render in REPORT_FORMATS.values()]
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    rows = []
+
+    for size in sizes:
+        records = make_rows(size)
+        store = ColumnarStore(records)
+
+        rows.append([
+            f"{size:,}",
+            best_of(lambda: legacy_summary_report(records, 'Relatório')),
+            best_of(lambda: all_formats(records)),
+            best_of(lambda: all_formats(store))
+        ])
+
+    headers = ['rows', 'legacy (text)', 'schema (dicts, 3 formats)', 'schema (columnar, 3 formats)']
+    print_table('Summary report (best of 3)', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: JSON encoding of app_state.json-shaped payloads
+
+Usage: python -m benchmarks.bench_serialization [sizes...]   (from backend/)
+"""
+import json
+import random
+import sys
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from utils import serialization
+
+STATUSES = ['Presença confirmada', 'Atendido']
+CONVENIOS = ['Particular', 'Isento', 'IPE Saúde', 'Unimed']
+
+
+def build_state(size: int) -> dict:
+    """Synthetic state with size evolucoes and size financeiro_records"""
+    rng = random.Random(size)
+    evolucoes = []
+    records = []
+
+    for index in range(size):
+        day = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025"
+        professional = f"Fisioterapeuta {rng.randint(1, 25)}"
+        patient = f"Paciente {rng.randint(1, size // 4 + 1)}"
+
+        evolucoes.append({
+            'id': index + 1,
+            'horario': f"{rng.randint(7, 19):02d}:00 - {rng.randint(7, 19):02d}:50",
+            'fisioterapeuta': professional,
+            'paciente': patient,
+            'celular': f"+55 (51) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            'convenio': rng.choice(CONVENIOS),
+            'status': rng.choice(STATUSES),
+            'procedimentos': 'Fisioterapia Traumato-Ortopédica',
+            'dataProcessamento': day
+        })
+        records.append({
+            'horario': evolucoes[-1]['horario'],
+            'fisioterapeuta': professional,
+            'paciente': patient,
+            'convenio': evolucoes[-1]['convenio'],
+            'status': evolucoes[-1]['status'],
+            'dataAtendimento': day,
+            'valor': rng.choice([0, 15.0, 30.0, 45.5])
+        })
+
+    return {'evolucoes': evolucoes, 'financeiro': {}, 'financeiro_records': records, 'timestamp': '2025-11-12T00:00:00'}
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv, (1_000, 10_000, 100_000))
+    codecs = {
+        'json indent=2': (lambda state: json.dumps(state, ensure_ascii=False, indent=2).encode('utf-8'), json.loads),
+        'json compact': (lambda state: serialization._stdlib_dumps(state, False), json.loads),
+        f"{serialization.BACKEND} compact": (serialization.dumps, serialization.loads)
+    }
+    rows = []
+
+    for size in sizes:
+        state = build_state(size)
+        for name, (encode, decode) in codecs.items():
+            payload = encode(state)
+            encode_time = best_of(lambda: encode(state))
+            decode_time = best_of(lambda: decode(payload))
+            rows.append([f"{size:,}", name, encode_time, decode_time, f"{len(payload) / 1024:,.0f} KB"])
+
+    print_table('app_state.json serialization (best of 3)', ['records', 'encoder', 'encode', 'decode', 'size'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: TextParser throughput on data/input/exemplo.txt scaled up
+
+Usage: python -m benchmarks.bench_text_parser [sizes...]   (from backend/)
+"""
+import os
+import re
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from parsers.formats import TextParser
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'input', 'exemplo.txt')
+
+
+def _legacy_parse_line(line: str) -> Dict:
+    """Tokenizer as it was before the single-scan rewrite (baseline)"""
+    line = line.strip()
+    item = {}
+
+    for pair in re.split(r',(?![^()]*\))', line):
+        if ':' in pair:
+            key, value = pair.split(':', 1)
+            item[key.strip()] = _legacy_convert_value(value.strip().strip('"').strip("'"))
+
+    return item if item else None
+
+
+def _legacy_convert_value(value: str) -> Any:
+    if value.isdigit():
+        return int(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.lower() in ('true', 'verdadeiro', 'sim', 'yes'):
+        return True
+    if value.lower() in ('false', 'falso', 'não', 'no'):
+        return False
+    return value
+
+
+def load_lines(size: int) -> List[str]:
+    """exemplo.txt repeated up to size lines"""
+    with open(SAMPLE_PATH, encoding='utf-8') as handle:
+        sample = [line for line in handle.read().split('\n') if line.strip()]
+    return (sample * (size // len(sample) + 1))[:size]
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    parser = TextParser()
+    rows = []
+
+    for size in sizes:
+        lines = load_lines(size)
+        legacy = best_of(lambda: [_legacy_parse_line(line) for line in lines])
+        current = best_of(lambda: list(parser.iter_parse(lines)))
+        rows.append([
+            f"{size:,}", legacy, current,
+            f"{size / legacy:,.0f}", f"{size / current:,.0f}", f"{legacy / current:.1f}x"
+        ])
+
+    headers = ['lines', 'legacy', 'current', 'legacy lines/s', 'current lines/s', 'speedup']
+    print_table('TextParser on exemplo.txt (best of 3)', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
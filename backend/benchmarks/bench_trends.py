@@ -0,0 +1,75 @@
+"""
+Benchmark: trend analysis, legacy string grouping vs the ordinal trend engine
+
+Rows span five years with mixed YYYY-MM-DD / DD/MM/YYYY dates.
+
+Usage: python -m benchmarks.bench_trends [sizes...]   (from backend/)
+"""
+import random
+import sys
+from datetime import date
+
+from benchmarks.common import best_of, parse_sizes, print_table
+from analytics.trends import trend_analysis
+from utils.columnar import ColumnarStore
+from utils.dates import BR_DATE, ISO_DATE, format_ordinal
+
+YEARS = 5
+
+
+def legacy_trend_analysis(data, value_key, date_key='data'):
+    """AdvancedAnalytics.get_trend_analysis before the trend engine"""
+    by_date = {}
+    for item in data:
+        day = item.get(date_key, 'unknown')
+        value = item.get(value_key, 0)
+
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            continue
+
+        if day not in by_date:
+            by_date[day] = []
+
+        by_date[day].append(value)
+
+    trends = {}
+    for day in sorted(by_date.keys()):
+        trends[day] = sum(by_date[day])
+
+    return trends
+
+
+def make_rows(size: int):
+    rng = random.Random(size)
+    first = date(2020, 1, 1).toordinal()
+    rows = []
+
+    for _ in range(size):
+        ordinal = first + rng.randrange(365 * YEARS)
+        layout = BR_DATE if rng.random() < 0.5 else ISO_DATE
+        rows.append({'data': format_ordinal(ordinal, layout), 'valor': round(rng.uniform(50, 400), 2)})
+
+    return rows
+
+
+def main(argv=None) -> None:
+    sizes = parse_sizes(sys.argv[1:] if argv is None else argv)
+    rows = []
+
+    for size in sizes:
+        records = make_rows(size)
+        store = ColumnarStore(records)
+
+        legacy = best_of(lambda: legacy_trend_analysis(records, 'valor'))
+        engine = best_of(lambda: trend_analysis(records, 'valor', granularity='month'))
+        columnar = best_of(lambda: trend_analysis(store, 'valor', granularity='month'))
+        rows.append([f"{size:,}", legacy, engine, columnar, f"{legacy / columnar:.1f}x"])
+
+    headers = ['rows', 'legacy (by string)', 'engine (dicts)', 'engine (columnar)', 'speedup']
+    print_table('Trend analysis, monthly buckets + 7/30-day windows (best of 3)', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import os
+import sys
+import time
+from typing import Any, Callable, List, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def best_of(func: Callable[[], Any], repeat: int = 3) -> float:
+    """Return the best wall-clock time (seconds) over repeat runs"""
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def parse_sizes(argv: Sequence[str], default: Sequence[int] = DEFAULT_SIZES) -> List[int]:
+    """Read row counts from the command line (e.g. 10000 100000)"""
+    sizes = [int(arg.replace('_', '')) for arg in argv if arg.replace('_', '').isdigit()]
+    return sizes or list(default)
+
+
+def print_table(title: str, headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    """Print results as an aligned text table"""
+    cells = [[str(h) for h in headers]] + [[_format(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+
+    print(f"\n{title}")
+    print('=' * len(title))
+    for index, row in enumerate(cells):
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print('  '.join('-' * width for width in widths))
+
+
+def _format(cell: Any) -> str:
+    if isinstance(cell, float):
+        return f"{cell * 1000:.2f} ms" if cell < 1 else f"{cell:.3f} s"
+    return str(cell)
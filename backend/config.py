@@ -11,6 +11,11 @@ class Config:
     DEBUG = False
     TESTING = False
     JSON_SORT_KEYS = False
+    # 'sqlite' mirrors parsed records into data/output/records.sqlite3
+    RECORD_STORE = os.getenv('ZENFISIO_RECORD_STORE', 'memory')
+    # Parallel parsing of large inputs (1 worker = always sequential)
+    PARSE_WORKERS = int(os.getenv('ZENFISIO_PARSE_WORKERS', os.cpu_count() or 1))
+    PARALLEL_PARSE_BYTES = int(os.getenv('ZENFISIO_PARALLEL_PARSE_BYTES', 8 * 1024 * 1024))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -0,0 +1,143 @@
+"""
+Data ingestion - parse a stream of text into datasets and a saved session
+
+Also a command line tool for importing files without the browser:
+
+    python backend/ingest.py data/input/exemplo.csv
+"""
+import argparse
+import codecs
+import os
+import sys
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from parsers.parser import DataParser
+from parsers.formats import DETECTION_BYTES, FormatDetector
+from parsers.streaming import FILE_ENCODING, map_file_text
+from analytics.incremental import IncrementalAnalytics
+from utils.columnar import ColumnarStore
+from utils.storage import DataStore
+from utils.logger import logger
+from utils import serialization
+
+# Server-side files accepted by /api/ingest
+INPUT_DIR = 'data/input'
+
+DATA_TYPES = ('financeiro', 'organizacional')
+
+
+def resolve_input_path(name: str, input_dir: str = INPUT_DIR) -> str:
+    """Real path of a file inside input_dir (ValueError if missing or outside it)"""
+    base = os.path.realpath(input_dir)
+    filepath = os.path.realpath(os.path.join(base, name))
+
+    if os.path.commonpath([base, filepath]) != base or not os.path.isfile(filepath):
+        raise ValueError(f"Arquivo não encontrado em {input_dir}: {name}")
+
+    return filepath
+
+
+def check_encoding(encoding: str) -> None:
+    """ValueError for an unknown text encoding"""
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise ValueError(f"Codificação desconhecida: {encoding}")
+
+
+def _read_head(chunks: Iterator[str]) -> str:
+    """Text blocks until just past DETECTION_BYTES characters (or the end)"""
+    parts = []
+    size = 0
+
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if size > DETECTION_BYTES:
+            break
+
+    return ''.join(parts)
+
+
+def ingest_text(chunks: Iterable[str], data_store: DataStore,
+                source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Detect, parse and save a stream of text blocks (see parsers.streaming)
+
+    Returns None when there is no data. Otherwise returns the parsed
+    datasets ('stores'), their running analytics ('analytics') and a
+    summary for the API response ('summary').
+    """
+    chunks = iter(chunks)
+    head = _read_head(chunks)
+
+    if not head.strip():
+        return None
+
+    detection = FormatDetector.detect(head)
+    logger.info(f"Formato detectado (stream): {detection.format} (confiança {detection.confidence:.2f})")
+
+    parser = DataParser()
+    stores = {data_type: ColumnarStore() for data_type in DATA_TYPES}
+    analytics = {data_type: IncrementalAnalytics(data_type) for data_type in DATA_TYPES}
+
+    metadata = {
+        'timestamp': datetime.now().isoformat(),
+        'format': detection.format
+    }
+    if source:
+        metadata['source'] = source
+
+    with data_store.open_session_stream('analise', metadata) as session:
+        for category, item in parser.iter_parse_text(chain((head,), chunks), detection):
+            stores[category].append(item)
+            analytics[category].add(item)
+            session.write(category, item)
+
+    logger.info(f"Dados parseados (stream): {session.count['financeiro']} financeiro, {session.count['organizacional']} organizacional")
+
+    return {
+        'stores': stores,
+        'analytics': analytics,
+        'summary': {
+            'count': session.count,
+            'format': detection.format,
+            'confidence': detection.confidence,
+            'schema': parser.schema,
+            'errors': parser.errors,
+            'source': source,
+            'session_id': os.path.basename(session.filepath)
+        }
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Importa um arquivo de dados e salva a sessão')
+    parser.add_argument('path', help='arquivo CSV, TSV, texto ou JSON')
+    parser.add_argument('--encoding', default=FILE_ENCODING, help=f"codificação (padrão: {FILE_ENCODING})")
+    parser.add_argument('--storage-dir', default='data/output', help='diretório das sessões')
+    args = parser.parse_args(argv)
+
+    try:
+        check_encoding(args.encoding)
+        with map_file_text(args.path, args.encoding) as chunks:
+            ingested = ingest_text(chunks, DataStore(args.storage_dir), os.path.basename(args.path))
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    if ingested is None:
+        print('Erro: nenhum dado encontrado', file=sys.stderr)
+        return 1
+
+    print(serialization.dumps(ingested['summary'], pretty=True).decode('utf-8'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,47 @@
 """
 Different format parsers
 """
+import csv
 import json
 import re
-from typing import List, Dict, Any
+from collections import Counter
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional
+
+from utils import serialization
+from .streaming import DETECTION_LINES, iter_string_lines
+from .schema import (
+    SAMPLE_ROWS, DECIMAL_PATTERN, NUMBER_LEADS, BOOLEANS, BOOLEAN_MAX_LENGTH,
+    infer_schema, compile_converters
+)
+
+# Format detection looks at most at this prefix of the input
+DETECTION_BYTES = 64 * 1024
+# Candidate delimiters, in order of preference on equal scores
+DELIMITERS = (',', '\t', ';', '|')
+
+_NON_SPACE = re.compile(r'\S')
+# "key: value" at the start of a field (free-text format)
+_KEY_VALUE_LINE = re.compile(r'\s*[^,;:\t|"]{1,64}:')
+
+# Malformed rows kept (with line numbers) by RowErrors parsers
+MAX_ROW_ERRORS = 100
+
+# Characters of input a streamed JSON array is read by
+JSON_READ_SIZE = 64 * 1024
+_JSON_DECODER = json.JSONDecoder()
+# Strings (complete or cut short) and structural characters
+_JSON_STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{},]')
+
+# TextParser pair separator, compiled once
+_TEXT_PAIR_SEPARATOR = re.compile(r',(?![^()]*\))')
+
+class Detection(NamedTuple):
+    """Detected input format, its delimiter (delimited formats) and confidence (0-1)"""
+    format: str
+    delimiter: Optional[str]
+    confidence: float
+
 
 class FormatDetector:
     """Detect and route to appropriate parser"""
@@ -11,176 +49,482 @@ class FormatDetector:
     @staticmethod
     def detect_format(data: str) -> str:
         """Detect input format"""
-        data = data.strip()
-
-        if data.startswith('[') or data.startswith('{'):
-            return 'json'
-        elif '\t' in data:
-            return 'tsv'
-        elif ',' in data:
-            return 'csv'
-        else:
-            return 'text'
+        return FormatDetector.detect(data).format
+
+    @staticmethod
+    def detect(data: str) -> Detection:
+        """
+        Detect the input format from a bounded prefix
+
+        Only the first DETECTION_BYTES characters (at most DETECTION_LINES
+        lines) are inspected, so the cost does not grow with the payload.
+        Each delimiter is scored by how many sampled lines share its most
+        common count per line, as csv.Sniffer does.
+        """
+        first = _NON_SPACE.search(data)
+        if first is None:
+            return Detection('text', None, 0.0)
+
+        start = first.start()
+        if data[start] == '[':
+            return Detection('json', None, 1.0)
+
+        prefix = data[start:start + DETECTION_BYTES]
+        lines = prefix.split('\n', DETECTION_LINES)
+        if len(lines) > DETECTION_LINES or start + DETECTION_BYTES < len(data):
+            # Drop the unsampled remainder or a line cut at the prefix boundary
+            lines = lines[:-1] or lines
+        lines = [line for line in lines[:DETECTION_LINES] if line.strip()]
+
+        if data[start] == '{':
+            return FormatDetector._detect_json_lines(lines)
+
+        text_score = sum(1 for line in lines if FormatDetector._is_key_value_line(line)) / len(lines)
+        if text_score >= 0.5:
+            return Detection('text', None, text_score)
+
+        best = None
+        for delimiter in DELIMITERS:
+            score = FormatDetector._delimiter_score(lines, delimiter)
+            if score and (best is None or score > best[0]):
+                best = (score, delimiter)
+
+        if best is None:
+            return Detection('text', None, text_score)
+
+        score, delimiter = best
+        return Detection('tsv' if delimiter == '\t' else 'csv', delimiter, score[0])
+
+    @staticmethod
+    def _is_key_value_line(line: str) -> bool:
+        """
+        True when every comma-separated field is a "key: value" pair
+
+        Checking only the start of the line would take CSV rows whose first
+        cell holds a colon (10:30, 2024-01-01 10:00) for free text.
+        """
+        # Split as TextParser does, so commas inside parentheses stay in the value
+        fields = _TEXT_PAIR_SEPARATOR.split(line) if ')' in line else line.split(',')
+        fields = [field for field in fields if field.strip()]
+        return bool(fields) and all(_KEY_VALUE_LINE.match(field) for field in fields)
+
+    @staticmethod
+    def _detect_json_lines(lines: List[str]) -> Detection:
+        """NDJSON when the sampled lines are objects of their own, else JSON"""
+        if len(lines) < 2:
+            return Detection('json', None, 1.0)
+
+        is_object = []
+        for line in lines:
+            try:
+                is_object.append(isinstance(serialization.loads(line), dict))
+            except ValueError:
+                is_object.append(False)
+
+        # A pretty-printed document does not start with a complete object line
+        if not is_object[0]:
+            return Detection('json', None, 1.0)
+        return Detection('ndjson', None, sum(is_object) / len(lines))
 
     @staticmethod
-    def get_parser(format_type: str):
+    def _delimiter_score(lines: List[str], delimiter: str) -> Optional[tuple]:
+        """(consistency, fields per line) for a delimiter, None if absent"""
+        counts = Counter(line.count(delimiter) for line in lines)
+        mode, frequency = max(counts.items(), key=lambda entry: (entry[1], entry[0]))
+        if mode == 0:
+            return None
+        return frequency / len(lines), mode
+
+    @staticmethod
+    def get_parser(format_type: str, delimiter: Optional[str] = None):
         """Get appropriate parser for format"""
+        if format_type == 'csv':
+            return CSVParser(delimiter)
+        if format_type == 'tsv':
+            return TSVParser(delimiter)
+
         parsers = {
-            'json': JSONParser(),
-            'csv': CSVParser(),
-            'tsv': TSVParser(),
-            'text': TextParser()
+            'json': JSONParser,
+            'ndjson': NDJSONParser,
+            'text': TextParser
         }
-        return parsers.get(format_type, TextParser())
+        return parsers.get(format_type, TextParser)()
+
+class RowErrors:
+    """
+    Malformed records skipped by a parser
+
+    The first MAX_ROW_ERRORS are kept in self.errors (with their line
+    number, when known); all of them are counted in self.error_count.
+    """
+
+    def __init__(self):
+        self.errors: List[Dict[str, Any]] = []
+        self.error_count = 0
+
+    def merge_errors(self, errors: List[Dict[str, Any]], count: int) -> None:
+        """Add row errors reported by another parser (e.g. a parallel chunk)"""
+        self.error_count += count
+        self.errors.extend(errors[:MAX_ROW_ERRORS - len(self.errors)])
+
+    def _row_error(self, line: Optional[int], message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ROW_ERRORS:
+            self.errors.append({'line': line, 'message': message})
+
+class JSONParser(RowErrors):
+    """
+    Parse JSON format (an array of records or a single record)
 
-class JSONParser:
-    """Parse JSON format"""
+    Arrays are read element by element: iter_parse_text never holds the
+    whole document (iter_parse does for a document on a single line), and
+    elements that fail to decode or are not objects are reported as row
+    errors instead of failing the import.
+    """
 
     def parse(self, data: str) -> List[Dict]:
         """Parse JSON data"""
         try:
-            parsed = json.loads(data)
-            if isinstance(parsed, list):
-                return parsed
-            elif isinstance(parsed, dict):
-                return [parsed]
-            else:
-                return []
-        except json.JSONDecodeError as e:
-            raise ValueError(f"JSON inválido: {str(e)}")
-
-class CSVParser:
-    """Parse CSV format"""
+            parsed = serialization.loads(data)
+        except ValueError:
+            # Keep the valid records of a damaged array
+            return list(self._iter_document(iter_string_lines(data)))
 
-    def parse(self, data: str) -> List[Dict]:
-        """Parse CSV data"""
-        lines = data.strip().split('\n')
-        if not lines:
+        if isinstance(parsed, dict):
+            return [parsed]
+        if not isinstance(parsed, list):
             return []
 
-        headers = [h.strip() for h in lines[0].split(',')]
-        results = []
-
-        for line in lines[1:]:
-            if not line.strip():
+        records = [item for item in parsed if isinstance(item, dict)]
+        for _ in range(len(parsed) - len(records)):
+            self._row_error(None, 'Registro não é um objeto JSON')
+        return records
+
+    def iter_parse(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield JSON records one at a time"""
+        return self._iter_document(line + '\n' for line in lines)
+
+    def iter_parse_text(self, chunks: Iterable[str]) -> Iterator[Dict]:
+        """Yield JSON records from blocks of text cut anywhere (see streaming.iter_text_chunks)"""
+        return self._iter_document(chunks)
+
+    def _iter_document(self, chunks: Iterable[str]) -> Iterator[Dict]:
+        reader = _JSONReader(chunks)
+        first = reader.skip_space()
+
+        if first is None:
+            return
+
+        if first != '[':
+            # A single record is decoded whole
+            try:
+                parsed = serialization.loads(reader.read_rest())
+            except ValueError as e:
+                raise ValueError(f"JSON inválido: {str(e)}")
+            if isinstance(parsed, dict):
+                yield parsed
+            return
+
+        reader.pos += 1
+        while True:
+            char = reader.skip_space()
+            if char is None:
+                self._row_error(reader.line_at(reader.pos), 'Array JSON não terminado')
+                return
+            if char == ']':
+                return
+            if char == ',':
+                reader.pos += 1
                 continue
 
-            values = [v.strip() for v in line.split(',')]
+            # Fast path: one complete element followed by a separator
+            start = reader.pos
+            try:
+                value, end = _JSON_DECODER.raw_decode(reader.text, start)
+                following = _NON_SPACE.search(reader.text, end)
+            except json.JSONDecodeError:
+                following = None
 
-            if len(values) != len(headers):
-                continue
+            if following is not None and following.group() in ',]':
+                reader.pos = end
+            else:
+                # Find where the element ends (reading more input if needed)
+                end = reader.element_end()
+                start = reader.pos
+                if end is None:
+                    self._row_error(reader.line_at(start), 'Registro JSON incompleto no fim dos dados')
+                    return
+
+                reader.pos = end
+                try:
+                    value = serialization.loads(reader.text[start:end])
+                except ValueError as e:
+                    self._row_error(reader.line_at(start), f"Registro JSON inválido: {e}")
+                    continue
 
-            item = dict(zip(headers, values))
-            results.append(self._convert_types(item))
+            if isinstance(value, dict):
+                yield value
+            else:
+                self._row_error(reader.line_at(start), 'Registro não é um objeto JSON')
 
-        return results
+class _JSONReader:
+    """Text of a JSON document read in blocks; consumed text is dropped"""
 
-    def _convert_types(self, item: Dict) -> Dict:
-        """Convert string values to appropriate types"""
-        converted = {}
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self.text = ''
+        self.pos = 0
+        self.line = 1  # line number of text[0]
+        self.exhausted = False
+
+    def more(self) -> bool:
+        """Append the next block of input; False once it is exhausted"""
+        if self.exhausted:
+            return False
 
-        for key, value in item.items():
-            if value.isdigit():
-                converted[key] = int(value)
+        if self.pos:
+            self.line += self.text.count('\n', 0, self.pos)
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+        parts = []
+        size = 0
+        for chunk in self._chunks:
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= JSON_READ_SIZE:
+                break
+        else:
+            self.exhausted = True
+
+        self.text += ''.join(parts)
+        return bool(parts)
+
+    def read_rest(self) -> str:
+        """All remaining input"""
+        while self.more():
+            pass
+        return self.text[self.pos:]
+
+    def skip_space(self) -> Optional[str]:
+        """Move to the next non-space character and return it (None at the end)"""
+        while True:
+            match = _NON_SPACE.search(self.text, self.pos)
+            if match:
+                self.pos = match.start()
+                return match.group()
+            self.pos = len(self.text)
+            if not self.more():
+                return None
+
+    def element_end(self) -> Optional[int]:
+        """
+        Index where the array element at pos ends (its ',' or the closing ']')
+
+        None when the input ends first.
+        """
+        while True:
+            depth = 0
+            for match in _JSON_STRUCTURE.finditer(self.text, self.pos):
+                token = match.group()
+                if token == '"':
+                    # String cut at the end of the buffer
+                    break
+                if token[0] == '"':
+                    continue
+                if token in '[{':
+                    depth += 1
+                elif token in ']}':
+                    depth -= 1
+                    if depth < 0:
+                        return match.start()
+                elif depth == 0:
+                    return match.start()
+
+            if not self.more():
+                return None
+
+    def line_at(self, index: int) -> int:
+        """Line number of text[index]"""
+        return self.line + self.text.count('\n', 0, index)
+
+class NDJSONParser(RowErrors):
+    """Parse JSON Lines (one record per line)"""
+
+    def parse(self, data: str, first_line: int = 1) -> List[Dict]:
+        """Parse NDJSON data (first_line numbers the lines in row errors)"""
+        return list(self._iter_lines(data.split('\n'), first_line))
+
+    def iter_parse(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield records one line at a time"""
+        return self._iter_lines(lines, 1)
+
+    def _iter_lines(self, lines: Iterable[str], first_line: int) -> Iterator[Dict]:
+        loads = serialization.loads
+
+        for number, line in enumerate(lines, first_line):
+            if not line or line.isspace():
+                continue
+
+            try:
+                value = loads(line)
+            except ValueError as e:
+                self._row_error(number, f"Registro JSON inválido: {e}")
+                continue
+
+            if isinstance(value, dict):
+                yield value
             else:
-                try:
-                    converted[key] = float(value)
-                except ValueError:
-                    converted[key] = value
+                self._row_error(number, 'Registro não é um objeto JSON')
 
-        return converted
+class DelimitedParser(RowErrors):
+    """
+    Parse delimiter-separated values (RFC 4180 quoting, via the csv module)
 
-class TSVParser:
-    """Parse TSV (Tab-Separated Values) format"""
+    The first SAMPLE_ROWS rows decide one type per column (see
+    parsers/schema.py); every row is then converted column by column. The
+    inferred schema is kept in self.schema. Malformed rows are not yielded
+    but reported as row errors. Blank lines are skipped, while rows of
+    empty cells are kept as records.
+    """
 
-    def parse(self, data: str) -> List[Dict]:
-        """Parse TSV data"""
-        lines = data.strip().split('\n')
-        if not lines:
-            return []
+    delimiter = ','
 
-        headers = [h.strip() for h in lines[0].split('\t')]
-        results = []
+    def __init__(self, delimiter: Optional[str] = None):
+        if delimiter is not None:
+            self.delimiter = delimiter
+        super().__init__()
+        self.headers: Optional[List[str]] = None
+        self.schema: Optional[Dict[str, str]] = None
 
-        for line in lines[1:]:
-            if not line.strip():
+    def parse(self, data: str) -> List[Dict]:
+        """Parse delimited data"""
+        return list(self.iter_records(data))
+
+    def iter_records(self, data: str) -> Iterator[Dict]:
+        """Yield the rows of an in-memory string one at a time"""
+        return self._iter_records(iter_string_lines(data))
+
+    def iter_parse(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield rows one at a time (lines come without line terminators)"""
+        return self._iter_records(line + '\n' for line in lines)
+
+    def parse_chunk(self, data: str, headers: List[str], schema: Dict[str, str],
+                    first_line: int = 1) -> List[Dict]:
+        """Parse header-less rows with a known header and schema (parallel chunks)"""
+        self.headers = headers
+        self.schema = schema
+        rows = self._iter_rows(iter_string_lines(data), len(headers), first_line)
+        return list(self._convert(rows))
+
+    def _iter_records(self, source: Iterable[str]) -> Iterator[Dict]:
+        rows = self._iter_rows(source)
+        headers = next(rows, None)
+        if headers is None:
+            return
+
+        sample = list(islice(rows, SAMPLE_ROWS))
+
+        self.headers = headers
+        self.schema = infer_schema(headers, sample)
+        yield from self._convert(chain(sample, rows))
+
+    def _convert(self, rows: Iterable[List[str]]) -> Iterator[Dict]:
+        """Apply the per-column converters of self.schema"""
+        converters = compile_converters(self.schema, self.headers)
+        columns = list(zip(self.headers, converters))
+
+        for row in rows:
+            yield {header: convert(value) for (header, convert), value in zip(columns, row)}
+
+    def _iter_rows(self, source: Iterable[str], width: Optional[int] = None,
+                   first_line: int = 1) -> Iterator[List[str]]:
+        """
+        Every well-formed row with the same column count
+
+        Without a width the first row (the header) sets it. Error line
+        numbers are counted from first_line.
+        """
+        reader = csv.reader(source, delimiter=self.delimiter, strict=True)
+        line_offset = first_line - 1
+
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                self._row_error(line_offset + reader.line_num, f"Linha malformada: {e}")
                 continue
 
-            values = [v.strip() for v in line.split('\t')]
+            values = [v.strip() for v in row]
+            # Blank lines are skipped; rows of empty cells (',,,') are records
+            if len(values) <= 1 and not any(values):
+                continue
 
-            if len(values) != len(headers):
+            if width is None:
+                width = len(values)
+            elif len(values) != width:
+                self._row_error(line_offset + reader.line_num, f"Esperadas {width} colunas, encontradas {len(values)}")
                 continue
 
-            item = dict(zip(headers, values))
-            results.append(self._convert_types(item))
+            yield values
 
-        return results
+class CSVParser(DelimitedParser):
+    """Parse CSV format"""
 
-    def _convert_types(self, item: Dict) -> Dict:
-        """Convert string values to appropriate types"""
-        converted = {}
+    delimiter = ','
 
-        for key, value in item.items():
-            if value.isdigit():
-                converted[key] = int(value)
-            else:
-                try:
-                    converted[key] = float(value)
-                except ValueError:
-                    converted[key] = value
+class TSVParser(DelimitedParser):
+    """Parse TSV (Tab-Separated Values) format"""
 
-        return converted
+    delimiter = '\t'
 
 class TextParser:
     """Parse free-form text format"""
 
     def parse(self, data: str) -> List[Dict]:
         """Parse free-form text data"""
-        lines = data.strip().split('\n')
-        results = []
+        return list(self.iter_parse(data.strip().split('\n')))
 
+    def iter_parse(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield parsed text lines one at a time"""
         for line in lines:
             if not line.strip():
                 continue
 
             item = self._parse_line(line)
             if item:
-                results.append(item)
-
-        return results
+                yield item
 
     def _parse_line(self, line: str) -> Dict:
         """Parse a single line"""
-        line = line.strip()
-        item = {}
-
         # Pattern: key1: value1, key2: value2, ...
-        pairs = re.split(r',(?![^()]*\))', line)
+        # Commas followed by a ')' (with no '(' between) belong to the value;
+        # without a ')' the regex splits like str.split, so plain lines take
+        # the single scan
+        pairs = _TEXT_PAIR_SEPARATOR.split(line) if ')' in line else line.split(',')
+        item = {}
+        convert = self._convert_value
 
         for pair in pairs:
-            if ':' in pair:
-                key, value = pair.split(':', 1)
-                key = key.strip()
-                value = value.strip().strip('"').strip("'")
-
-                item[key] = self._convert_value(value)
+            key, colon, value = pair.partition(':')
+            if colon:
+                item[key.strip()] = convert(value.strip().strip('"').strip("'"))
 
         return item if item else None
 
     def _convert_value(self, value: str) -> Any:
-        """Convert value to appropriate type"""
-        if value.isdigit():
+        """Convert value to appropriate type (no exceptions raised)"""
+        if value.isdecimal():
             return int(value)
 
-        try:
+        if value[:1] in NUMBER_LEADS and DECIMAL_PATTERN.fullmatch(value):
             return float(value)
-        except ValueError:
-            pass
 
-        if value.lower() in ('true', 'verdadeiro', 'sim', 'yes'):
-            return True
-
-        if value.lower() in ('false', 'falso', 'não', 'no'):
-            return False
+        if len(value) <= BOOLEAN_MAX_LENGTH:
+            flag = BOOLEANS.get(value.lower())
+            if flag is not None:
+                return flag
 
         return value
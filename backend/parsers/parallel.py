@@ -0,0 +1,57 @@
+"""
+Parallel parsing helpers - newline-aligned chunks of large inputs
+"""
+import os
+from typing import List, Tuple
+
+# Formats whose records can be parsed independently, chunk by chunk
+PARALLEL_FORMATS = ('csv', 'tsv', 'text', 'ndjson')
+# Formats with a header row and quoting
+DELIMITED_FORMATS = ('csv', 'tsv')
+
+# Inputs below this size are parsed sequentially
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Chunks handed out per worker (smooths uneven chunk costs)
+CHUNKS_PER_WORKER = 2
+MIN_CHUNK_SIZE = 1024 * 1024
+
+
+def default_workers() -> int:
+    """One worker per CPU"""
+    return os.cpu_count() or 1
+
+
+def chunk_bounds(data: str, count: int, quoted: bool = False) -> List[Tuple[int, int]]:
+    """
+    Split data into about count (start, end) ranges ending on a newline
+
+    With quoted set (CSV/TSV), a boundary is only placed where the number of
+    double quotes seen so far is even, so quoted fields spanning lines stay
+    in one chunk.
+    """
+    size = len(data)
+    target = max(size // max(count, 1), MIN_CHUNK_SIZE)
+    bounds = []
+    start = 0
+
+    while start < size:
+        end = _line_end(data, start + target)
+
+        if quoted:
+            odd = data.count('"', start, end) % 2
+            while odd and end < size:
+                next_end = _line_end(data, end)
+                odd ^= data.count('"', end, next_end) % 2
+                end = next_end
+
+        bounds.append((start, end))
+        start = end
+
+    return bounds
+
+
+def _line_end(data: str, position: int) -> int:
+    """Offset just past the first newline at or after position (or the end)"""
+    end = data.find('\n', position)
+    return len(data) if end < 0 else end + 1
@@ -3,31 +3,127 @@ Data Parser - handles different data formats
 """
 import json
 import re
-from typing import Dict, List, Any
-from .formats import FormatDetector
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from utils.classifier import default_classifier
+from .formats import Detection, FormatDetector
+from .streaming import iter_chunk_lines
+from .parallel import PARALLEL_FORMATS, DELIMITED_FORMATS, PARALLEL_MIN_BYTES, CHUNKS_PER_WORKER, chunk_bounds
 
 class DataParser:
-    """Parse structured text data into JSON"""
+    """
+    Parse structured text data into JSON
+
+    With workers > 1, line-oriented inputs of at least parallel_min_bytes
+    are split into newline-aligned chunks parsed in a process pool.
+    """
+
+    # Financeiro/organizacional decisions, cached per key shape
+    classifier = default_classifier
+
+    # Detection and format parser used by the last parse/iter_parse call
+    detection: Optional[Detection] = None
+    _format_parser = None
+
+    def __init__(self, workers: int = 1, parallel_min_bytes: int = PARALLEL_MIN_BYTES):
+        self.workers = workers
+        self.parallel_min_bytes = parallel_min_bytes
+
+    @property
+    def schema(self) -> Optional[Dict[str, str]]:
+        """Column types inferred by the last delimited parse, if any"""
+        return getattr(self._format_parser, 'schema', None)
+
+    @property
+    def errors(self) -> Optional[Dict[str, Any]]:
+        """Malformed rows skipped by the last delimited parse, if any"""
+        parser = self._format_parser
+        if not getattr(parser, 'error_count', 0):
+            return None
+        return {'count': parser.error_count, 'rows': parser.errors}
 
-    def parse(self, data_input: str) -> Dict[str, List[Dict]]:
+    def parse(self, data_input: str, detection: Optional[Detection] = None) -> Dict[str, List[Dict]]:
         """
         Parse input data and categorize as financeiro or organizacional
+
+        The format is detected unless the caller already did so.
         """
-        # Detect format and parse accordingly
-        detected_format = FormatDetector.detect_format(data_input)
-        parser = FormatDetector.get_parser(detected_format)
+        if detection is None:
+            detection = FormatDetector.detect(data_input)
+        self.detection = detection
+
+        parser = FormatDetector.get_parser(detection.format, detection.delimiter)
+        self._format_parser = parser
 
         try:
+            if (self.workers > 1 and detection.format in PARALLEL_FORMATS
+                    and len(data_input) >= self.parallel_min_bytes):
+                return self._parse_parallel(data_input, parser)
+
             parsed_items = parser.parse(data_input)
         except Exception as e:
             # Fallback to line-by-line parsing
+            self._format_parser = None
             parsed_items = self._parse_line_by_line(data_input)
 
+        return self._categorize(parsed_items)
+
+    def _parse_parallel(self, data_input: str, parser) -> Dict[str, List[Dict]]:
+        """
+        Parse chunks in worker processes, keeping the input order
+
+        The first chunk is parsed here while the workers run; for CSV/TSV its
+        header and sampled schema are shared with every other chunk.
+        """
+        delimited = self.detection.format in DELIMITED_FORMATS
+        bounds = chunk_bounds(data_input, self.workers * CHUNKS_PER_WORKER, quoted=delimited)
+        if len(bounds) < 2:
+            return self._categorize(parser.parse(data_input))
+
+        first_end = bounds[0][1]
+        if delimited:
+            records = parser.iter_records(data_input[:first_end])
+            # Reading the first row fixes the header and the schema
+            head = list(islice(records, 1))
+            if parser.headers is None:
+                return self._categorize(parser.parse(data_input))
+            records = chain(head, records)
+            headers, schema = parser.headers, parser.schema
+        else:
+            records = None
+            headers = schema = None
+
+        tasks = []
+        line = 1 + data_input.count('\n', 0, first_end)
+        for start, end in bounds[1:]:
+            tasks.append((self.detection.format, self.detection.delimiter,
+                          data_input[start:end], headers, schema, line))
+            line += data_input.count('\n', start, end)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(_parse_chunk, tasks)
+
+            if records is None:
+                records = parser.parse(data_input[:first_end])
+            categorized = self._categorize(records)
+
+            for chunk, errors, error_count in results:
+                categorized['financeiro'].extend(chunk['financeiro'])
+                categorized['organizacional'].extend(chunk['organizacional'])
+                if error_count:
+                    parser.merge_errors(errors, error_count)
+
+        return categorized
+
+    def _categorize(self, items: Iterable[Dict]) -> Dict[str, List[Dict]]:
+        """Split items into financeiro and organizacional"""
         financeiro = []
         organizacional = []
+        is_financial = self.classifier.is_financial
 
-        for item in parsed_items:
-            if self._is_financial(item):
+        for item in items:
+            if is_financial(item):
                 financeiro.append(item)
             else:
                 organizacional.append(item)
@@ -37,6 +133,38 @@ class DataParser:
             'organizacional': organizacional
         }
 
+    def iter_parse(self, lines: Iterable[str], detection: Detection) -> Iterator[Tuple[str, Dict]]:
+        """
+        Lazily parse input lines, yielding (category, item) pairs
+        """
+        parser = self._start_stream(detection)
+        return self._iter_categorized(parser.iter_parse(lines))
+
+    def iter_parse_text(self, chunks: Iterable[str], detection: Detection) -> Iterator[Tuple[str, Dict]]:
+        """
+        Lazily parse blocks of text cut anywhere, yielding (category, item) pairs
+
+        JSON documents are read block by block, so a minified array is never
+        buffered as one long line; other formats are split into lines.
+        """
+        parser = self._start_stream(detection)
+        if hasattr(parser, 'iter_parse_text'):
+            return self._iter_categorized(parser.iter_parse_text(chunks))
+        return self._iter_categorized(parser.iter_parse(iter_chunk_lines(chunks)))
+
+    def _start_stream(self, detection: Detection):
+        self.detection = detection
+        parser = FormatDetector.get_parser(detection.format, detection.delimiter)
+        self._format_parser = parser
+        return parser
+
+    def _iter_categorized(self, items: Iterable[Dict]) -> Iterator[Tuple[str, Dict]]:
+        is_financial = self.classifier.is_financial
+
+        for item in items:
+            category = 'financeiro' if is_financial(item) else 'organizacional'
+            yield category, item
+
     def _parse_line_by_line(self, data_input: str) -> List[Dict]:
         """Fallback: parse line by line"""
         lines = data_input.strip().split('\n')
@@ -108,48 +236,30 @@ class DataParser:
 
     def _is_financial(self, item: Dict) -> bool:
         """Determine if item is financial data"""
-        financial_keys = ['valor', 'preco', 'custo', 'receita', 'despesa', 'amount', 'price']
-        keys_lower = [k.lower() for k in item.keys()]
+        return self.classifier.is_financial(item)
 
-        return any(fkey in keys_lower for fkey in financial_keys)
 
+def _parse_chunk(task: tuple) -> Tuple[Dict[str, List[Dict]], List[Dict], int]:
+    """Worker: parse and categorize one chunk of a parallel parse"""
+    format_type, delimiter, data, headers, schema, first_line = task
+    parser = FormatDetector.get_parser(format_type, delimiter)
 
-class CSVParser(DataParser):
-    """Parse CSV data"""
+    if headers is not None:
+        items = parser.parse_chunk(data, headers, schema, first_line)
+    elif format_type == 'ndjson':
+        items = parser.parse(data, first_line)
+    else:
+        items = parser.parse(data)
 
-    def parse(self, data_input: str) -> Dict[str, List[Dict]]:
-        """Parse CSV format"""
-        lines = data_input.strip().split('\n')
-
-        if not lines:
-            return {'financeiro': [], 'organizacional': []}
-
-        # First line is header
-        headers = [h.strip() for h in lines[0].split(',')]
-        financeiro = []
-        organizacional = []
-
-        for line in lines[1:]:
-            if not line.strip():
-                continue
-
-            values = [v.strip() for v in line.split(',')]
-
-            if len(values) != len(headers):
-                continue
+    return DataParser()._categorize(items), getattr(parser, 'errors', []), getattr(parser, 'error_count', 0)
 
-            item = dict(zip(headers, values))
 
-            # Convert values
-            for key in item:
-                item[key] = self._convert_value(item[key])
+class CSVParser(DataParser):
+    """Parse CSV data"""
 
-            if self._is_financial(item):
-                financeiro.append(item)
-            else:
-                organizacional.append(item)
+    def parse(self, data_input: str) -> Dict[str, List[Dict]]:
+        """Parse CSV format (shared reader in formats.CSVParser)"""
+        parser = FormatDetector.get_parser('csv')
+        self._format_parser = parser
 
-        return {
-            'financeiro': financeiro,
-            'organizacional': organizacional
-        }
+        return self._categorize(parser.parse(data_input))
@@ -0,0 +1,117 @@
+"""
+Schema inference for delimited data - one type and one converter per column
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.dates import parse_date
+
+# Rows inspected before the column types are fixed
+SAMPLE_ROWS = 100
+
+INT = 'int'
+DECIMAL = 'decimal'
+DATE = 'date'
+BOOL = 'bool'
+STRING = 'string'
+
+DECIMAL_PATTERN = re.compile(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?')
+# Brazilian layout: 1.234,56 / 1234,56
+BR_DECIMAL_PATTERN = re.compile(r'[+-]?(?:[0-9]{1,3}(?:\.[0-9]{3})+|[0-9]+),[0-9]+')
+NUMBER_LEADS = frozenset('0123456789+-.')
+BOOLEANS = {
+    'true': True, 'verdadeiro': True, 'sim': True, 'yes': True,
+    'false': False, 'falso': False, 'não': False, 'no': False
+}
+BOOLEAN_MAX_LENGTH = max(len(word) for word in BOOLEANS)
+
+
+def parse_decimal(value: str) -> Optional[float]:
+    """Decimal in either 1234.56 or 1.234,56 layout, or None"""
+    if value[:1] not in NUMBER_LEADS:
+        return None
+    if DECIMAL_PATTERN.fullmatch(value):
+        return float(value)
+    if BR_DECIMAL_PATTERN.fullmatch(value):
+        return float(value.replace('.', '').replace(',', '.'))
+    return None
+
+
+def classify(value: str) -> str:
+    """Type of a single non-empty cell"""
+    if value.isdecimal():
+        return INT
+    if parse_decimal(value) is not None:
+        return DECIMAL
+    if len(value) <= BOOLEAN_MAX_LENGTH and value.lower() in BOOLEANS:
+        return BOOL
+    if parse_date(value) is not None:
+        return DATE
+    return STRING
+
+
+def _merge(types: set) -> str:
+    """Narrowest type able to hold every sampled cell of a column"""
+    if not types:
+        return STRING
+    if len(types) == 1:
+        return next(iter(types))
+    if types == {INT, DECIMAL}:
+        return DECIMAL
+    return STRING
+
+
+def infer_schema(headers: Sequence[str], rows: Sequence[Sequence[str]]) -> Dict[str, str]:
+    """Pick a type per column from sampled rows (empty cells are ignored)"""
+    seen = [set() for _ in headers]
+
+    for row in rows:
+        for types, value in zip(seen, row):
+            if value:
+                types.add(classify(value))
+
+    return {header: _merge(types) for header, types in zip(headers, seen)}
+
+
+def _to_decimal(value: str) -> Any:
+    if not value:
+        return None
+    number = parse_decimal(value)
+    # Cell outside the sampled type: kept as text
+    return value if number is None else number
+
+
+def _to_int(value: str) -> Any:
+    if value.isdecimal():
+        return int(value)
+    return _to_decimal(value)
+
+
+def _to_bool(value: str) -> Any:
+    if not value:
+        return None
+    flag = BOOLEANS.get(value.lower())
+    return value if flag is None else flag
+
+
+def _to_date(value: str) -> Optional[str]:
+    # Dates stay in their original layout, as elsewhere in the app
+    return value or None
+
+
+def _to_string(value: str) -> str:
+    return value
+
+
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    INT: _to_int,
+    DECIMAL: _to_decimal,
+    DATE: _to_date,
+    BOOL: _to_bool,
+    STRING: _to_string
+}
+
+
+def compile_converters(schema: Dict[str, str], headers: Sequence[str]) -> List[Callable[[str], Any]]:
+    """Converter for each header position"""
+    return [CONVERTERS[schema[header]] for header in headers]
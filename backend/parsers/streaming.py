@@ -0,0 +1,123 @@
+"""
+Streaming helpers - incremental reading of large inputs
+"""
+import codecs
+import io
+import mmap
+from contextlib import contextmanager
+from itertools import chain
+from typing import BinaryIO, Iterable, Iterator
+
+# Bytes read from the underlying stream per iteration
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Files may start with a byte order mark (e.g. spreadsheet exports)
+FILE_ENCODING = 'utf-8-sig'
+
+# Characters of an in-memory string turned into lines at a time
+STRING_BLOCK_SIZE = 1024 * 1024
+
+# Lines inspected to detect the input format
+DETECTION_LINES = 50
+
+
+def iter_text_chunks(stream: BinaryIO, encoding: str = 'utf-8',
+                     chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield decoded blocks of text from a binary stream, in input order"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def iter_chunk_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Yield the lines (without terminators) of a sequence of text blocks"""
+    # Pieces of a line spanning several blocks, joined once it ends
+    tail = []
+
+    for text in chunks:
+        end = text.rfind('\n')
+        if end < 0:
+            tail.append(text)
+            continue
+
+        # Only the new text is scanned; a long line is never re-split
+        lines = text[:end].split('\n')
+        if tail:
+            tail.append(lines[0])
+            lines[0] = ''.join(tail)
+            tail = []
+
+        yield from lines
+
+        if end + 1 < len(text):
+            tail.append(text[end + 1:])
+
+    pending = ''.join(tail)
+    if pending:
+        yield pending
+
+
+def iter_text_lines(stream: BinaryIO, encoding: str = 'utf-8',
+                    chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield decoded lines from a binary stream without reading it whole"""
+    return iter_chunk_lines(iter_text_chunks(stream, encoding, chunk_size))
+
+
+def iter_string_lines(data: str, block_size: int = STRING_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Yield the lines of a string, line terminators included
+
+    Lines are cut block by block, so no full-size copy of data is made (an
+    io.StringIO over the whole string would hold it as 4 bytes per char).
+    """
+    return chain.from_iterable(_string_blocks(data, block_size))
+
+
+def _string_blocks(data: str, block_size: int) -> Iterator[io.StringIO]:
+    start = 0
+    size = len(data)
+
+    while start < size:
+        end = data.find('\n', start + block_size)
+        end = size if end < 0 else end + 1
+        yield io.StringIO(data[start:end])
+        start = end
+
+
+@contextmanager
+def map_text(handle: BinaryIO, encoding: str = FILE_ENCODING) -> Iterator[Iterator[str]]:
+    """
+    Decoded text blocks of an open binary file, read through a read-only memory map
+
+    The mapped pages are decoded incrementally as blocks are consumed, so the
+    file is never held in memory as a whole bytes or str object. Handles
+    that cannot be mapped (in-memory buffers, empty files) are read as a
+    plain stream instead. iter_chunk_lines turns the blocks into lines.
+    """
+    try:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, io.UnsupportedOperation, OSError, ValueError):
+        handle.seek(0)
+        yield iter_text_chunks(handle, encoding)
+        return
+
+    with mapped:
+        yield iter_text_chunks(mapped, encoding)
+
+
+@contextmanager
+def map_file_text(filepath: str, encoding: str = FILE_ENCODING) -> Iterator[Iterator[str]]:
+    """Decoded text blocks of the file at filepath (see map_text)"""
+    with open(filepath, 'rb') as handle, map_text(handle, encoding) as chunks:
+        yield chunks
@@ -0,0 +1,27 @@
+"""
+Test setup - backend/ on sys.path, as when the app runs, and shared fixtures
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Test client and routes module, with storage in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    from app import app
+    from api import routes
+    from utils.columnar import ColumnarStore
+    from utils.storage import DataStore
+
+    monkeypatch.setattr(routes, 'data_store', DataStore(str(tmp_path / 'output')))
+    for data_type in routes.app_data:
+        routes._set_app_data(data_type, ColumnarStore())
+    routes.state_mirror.invalidate()
+
+    return app.test_client(), routes
+
@@ -0,0 +1,184 @@
+"""
+Tests for the API routes (Flask test client)
+"""
+
+
+def test_parse_raw_invalid_json_is_client_error(api):
+    client, _ = api
+    response = client.post('/api/parse', data='{"valor": 1,', content_type='text/plain')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_delta_with_unhashable_id_is_not_journaled(api):
+    client, routes = api
+    response = client.post('/api/state/delta', json={
+        'delta': {'collection': 'evolucoes', 'updated': [{'id': [1]}]}
+    })
+    assert response.status_code == 400
+    assert not routes.data_store._journal.exists()
+    assert client.get('/api/state').status_code == 200
+
+
+def _live_total(client):
+    return client.get('/api/analytics/financeiro').get_json()['analysis']['total']
+
+
+def test_set_delta_refreshes_app_data(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': [{'id': 1, 'valor': 70.0}]}})
+    client.get('/api/state')
+    assert _live_total(client) == 70.0
+
+    response = client.post('/api/state/delta', json={
+        'delta': {'set': {'financeiro_records': [{'id': 2, 'valor': 1000.0}]}}
+    })
+    assert response.status_code == 200
+    assert _live_total(client) == 1000.0
+
+
+def test_added_delta_applies_to_state_not_last_parse(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': [{'id': 1, 'valor': 70.0}]}})
+    client.post('/api/parse', json={'data': 'valor: 5'})
+
+    client.post('/api/state/delta', json={
+        'delta': {'collection': 'financeiro_records', 'added': [{'id': 2, 'valor': 30.0}]}
+    })
+    assert _live_total(client) == 100.0
+
+
+def test_parse_raw_minified_json_array(api):
+    client, routes = api
+    body = '[' + ','.join(f'{{"id": {i}, "valor": {i}.5, "paciente": "P{i}"}}' for i in range(5000)) + ']'
+    response = client.post('/api/parse', data=body, content_type='text/plain')
+
+    assert response.status_code == 200
+    assert response.get_json()['format'] == 'json'
+    assert len(routes.app_data['financeiro']) + len(routes.app_data['organizacional']) == 5000
+
+
+def test_parse_raw_csv(api):
+    client, routes = api
+    response = client.post('/api/parse', data='data,valor,paciente\n2024-01-01 10:00,50,Ana\n',
+                           content_type='text/csv')
+
+    assert response.status_code == 200
+    assert response.get_json()['format'] == 'csv'
+    assert routes.app_data['financeiro'].column('valor').decode() == [50]
+
+
+def test_deltas_patch_app_data_without_replaying_the_journal(api, monkeypatch):
+    client, routes = api
+    records = [{'id': i, 'valor': float(i)} for i in range(1, 101)]
+    client.post('/api/state', json={'state': {'financeiro_records': records}})
+
+    def replay():
+        raise AssertionError('estado relido do disco')
+    monkeypatch.setattr(routes.data_store, 'load_state_versioned', replay)
+
+    for delta in [
+        {'collection': 'financeiro_records', 'added': [{'id': 101, 'valor': 101.0}]},
+        {'collection': 'financeiro_records', 'updated': [{'id': 1, 'valor': 1000.0}]},
+        {'collection': 'financeiro_records', 'removed': [2, 3]},
+        {'set': {'tema': 'escuro'}}
+    ]:
+        assert client.post('/api/state/delta', json={'delta': delta}).status_code == 200
+
+    expected = sum(range(1, 102)) - 1 - 2 - 3 + 1000
+    analysis = client.get('/api/analytics/financeiro').get_json()['analysis']
+    assert analysis['total'] == expected
+    assert analysis['max'] == 1000.0
+    assert analysis['min'] == 4.0
+    assert len(routes.app_data['financeiro']) == 99
+
+
+def test_deltas_reach_the_sqlite_store(api, monkeypatch, tmp_path):
+    client, routes = api
+    from utils.classifier import default_classifier
+    from utils.sql_store import SQLiteRecordStore
+    monkeypatch.setattr(routes, 'record_store',
+                        SQLiteRecordStore(str(tmp_path / 'records.sqlite3'), default_classifier))
+
+    client.post('/api/state', json={'state': {'financeiro_records': [
+        {'id': 1, 'valor': 10.0, 'categoria': 'Aluguel'},
+        {'id': 2, 'valor': 20.0}
+    ]}})
+    client.post('/api/state/delta', json={'delta': {
+        'collection': 'financeiro_records',
+        'updated': [{'id': 1, 'valor': 15.0, 'categoria': 'Aluguel'}],
+        'removed': [2],
+        'added': [{'id': 3, 'valor': 5.0, 'categoria': ''}]
+    }})
+
+    result = client.get('/api/query/financeiro').get_json()
+    assert result['summary']['total'] == 20.0
+    assert result['by_category'] == {'Aluguel': {'count': 1, 'total': 15.0},
+                                     'Sem categoria': {'count': 1, 'total': 5.0}}
+
+
+def test_analytics_etag_and_not_modified(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': [{'id': 1, 'valor': 70.0}]}})
+
+    first = client.get('/api/analytics/financeiro')
+    assert first.status_code == 200 and first.headers['ETag']
+
+    again = client.get('/api/analytics/financeiro', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+def test_data_changes_invalidate_cached_analytics(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': [{'id': 1, 'valor': 70.0}]}})
+    etag = client.get('/api/analytics/financeiro').headers['ETag']
+
+    client.post('/api/state/delta', json={
+        'delta': {'collection': 'financeiro_records', 'added': [{'id': 2, 'valor': 30.0}]}
+    })
+
+    response = client.get('/api/analytics/financeiro', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['analysis']['total'] == 100.0
+
+
+def test_reading_unchanged_state_keeps_the_cache(api):
+    client, routes = api
+    client.post('/api/state', json={'state': {'financeiro_records': [{'id': 1, 'valor': 70.0}]}})
+    client.get('/api/state')
+    etag = client.get('/api/analytics/financeiro').headers['ETag']
+    store = routes.app_data['financeiro']
+
+    for _ in range(3):
+        assert client.get('/api/state').get_json()['state']['financeiro_records'] == [{'id': 1, 'valor': 70.0}]
+
+    assert routes.app_data['financeiro'] is store
+    assert client.get('/api/analytics/financeiro', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_reading_state_after_a_parse_restores_it(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': [{'id': 1, 'valor': 70.0}]}})
+    client.post('/api/parse', json={'data': 'valor: 5'})
+    assert _live_total(client) == 5
+
+    client.get('/api/state')
+    assert _live_total(client) == 70.0
+
+
+def test_compare_counts_rows_without_value_column(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'evolucoes': [
+        {'id': 1, 'data': '2024-01-10', 'tipo': 'sessao'},
+        {'id': 2, 'data': '2024-02-10', 'tipo': 'sessao'},
+        {'id': 3, 'data': '2024-02-11', 'tipo': 'avaliacao'}
+    ]}})
+
+    periods = client.get('/api/analytics/organizacional/compare').get_json()['periods']
+
+    assert [(period['period'], period['total'], period['trend']) for period in periods] == [
+        ('2024-01', 1.0, 'up'),
+        ('2024-02', 2.0, 'up')
+    ]
@@ -0,0 +1,64 @@
+"""
+Tests for utils/columnar.py
+"""
+import pytest
+
+from utils.columnar import CATEGORY_SAMPLE_ROWS, ColumnarStore
+
+
+@pytest.mark.parametrize('records', [
+    [{'valor': 1}, {'valor': 2.5}, {'valor': 3}],
+    [{'valor': 1}, {'valor': 'um'}, {'valor': True}, {'valor': 1.0}],
+    [{'data': '01/02/2024'}, {'data': '2024-02-02'}, {'data': 'ontem'}],
+    [{'x': 2 ** 70}, {'x': -1}],
+    [{'a': 1}, {'b': None}, {'a': {'nested': [1]}}, {}]
+])
+def test_round_trip_through_widening(records):
+    assert ColumnarStore(records).to_records() == records
+    # Widened values keep their Python type
+    for original, stored in zip(records, ColumnarStore(records)):
+        assert [type(value) for value in stored.values()] == [type(value) for value in original.values()]
+
+
+def test_column_kinds():
+    store = ColumnarStore([
+        {'id': 1, 'valor': 1, 'data': '01/02/2024', 'tipo': 'a'},
+        {'id': 2, 'valor': 2.5, 'data': '02/02/2024', 'tipo': 'b'}
+    ])
+    assert store.schema() == {'id': 'int', 'valor': 'float', 'data': 'date', 'tipo': 'category'}
+
+
+def test_high_cardinality_strings_are_not_dictionary_encoded():
+    rows = 3 * CATEGORY_SAMPLE_ROWS
+    records = [{'descricao': f'item {row}', 'tipo': 'abc'[row % 3]} for row in range(rows)]
+    store = ColumnarStore(records)
+
+    assert store.schema() == {'descricao': 'object', 'tipo': 'category'}
+    assert store.column('tipo').dictionary() == ['a', 'b', 'c']
+    assert store.to_records() == records
+
+
+def test_repeated_strings_stay_dictionary_encoded_past_the_sample():
+    records = [{'tipo': f'tipo {row % 400}'} for row in range(3 * CATEGORY_SAMPLE_ROWS)]
+    assert ColumnarStore(records).schema() == {'tipo': 'category'}
+
+
+def test_replace_and_delete_rows():
+    records = [
+        {'id': 1, 'valor': 10, 'data': '01/02/2024', 'tipo': 'a'},
+        {'id': 2, 'valor': 20.5, 'data': '02/02/2024'},
+        {'id': 3, 'valor': None, 'tipo': 'b'}
+    ]
+    store = ColumnarStore(records)
+
+    store.replace(1, {'id': 2, 'valor': 'vinte', 'extra': [1]})
+    store.delete(0)
+    store.append({'id': 4, 'tipo': 'c'})
+
+    expected = [
+        {'id': 2, 'valor': 'vinte', 'extra': [1]},
+        {'id': 3, 'valor': None, 'tipo': 'b'},
+        {'id': 4, 'tipo': 'c'}
+    ]
+    assert store.to_records() == expected
+    assert len(store) == 3
@@ -0,0 +1,69 @@
+"""
+Tests for analytics/comparison.py
+"""
+from datetime import date
+
+from analytics.comparison import baseline_start, compare_periods, daily_table, period_table
+from utils.columnar import ColumnarStore
+
+RECORDS = [
+    {'data': '2023-03-10', 'valor': 50.0, 'categoria': 'Aluguel'},
+    {'data': '2024-02-05', 'valor': 100.0, 'categoria': 'Aluguel'},
+    {'data': '2024-02-20', 'valor': 20.0, 'categoria': 'Luz'},
+    {'data': '2024-03-01', 'valor': 80.0, 'categoria': 'Aluguel'},
+    {'data': '2024-03-15', 'valor': 40.0, 'categoria': 'Luz'},
+    {'data': 'sem data', 'valor': 999.0, 'categoria': 'Luz'}
+]
+
+
+def _compare(data, value_key='valor', baseline='previous', **kwargs):
+    periods = period_table(daily_table(data, value_key), 'month')
+    return compare_periods(periods, 'month', baseline, **kwargs)
+
+
+def test_compare_with_previous_period():
+    march = _compare(RECORDS)[-1]
+
+    assert (march['period'], march['baseline_period']) == ('2024-03', '2024-02')
+    assert (march['total'], march['baseline_total']) == (120.0, 120.0)
+    assert march['trend'] == 'stable'
+    assert [(c['category'], c['total'], c['baseline_total'], c['trend']) for c in march['categories']] == [
+        ('Aluguel', 80.0, 100.0, 'down'),
+        ('Luz', 40.0, 20.0, 'up')
+    ]
+    assert march['categories'][1]['percentage_change'] == 100.0
+
+
+def test_compare_with_same_period_last_year():
+    march = _compare(RECORDS, baseline='year')[-1]
+
+    assert march['baseline_period'] == '2023-03'
+    assert march['baseline_total'] == 50.0
+    assert march['difference'] == 70.0
+
+
+def test_columnar_store_and_records_agree():
+    assert _compare(ColumnarStore(RECORDS)) == _compare(RECORDS)
+
+
+def test_range_and_limit():
+    periods = _compare(RECORDS, first=date(2024, 2, 10).toordinal(), limit=1)
+    assert [period['period'] for period in periods] == ['2024-03']
+
+
+def test_without_value_column_rows_are_counted():
+    rows = [{key: value for key, value in record.items() if key != 'valor'} for record in RECORDS]
+    rows.append({'data': '2024-03-20', 'categoria': 'Luz'})
+
+    march = _compare(rows, value_key=None)[-1]
+
+    assert (march['total'], march['count'], march['baseline_total']) == (3.0, 3, 2.0)
+    assert march['trend'] == 'up'
+    assert march['percentage_change'] == 50.0
+    assert march['categories'][0]['category'] == 'Luz'
+
+
+def test_leap_day_baseline():
+    leap_day = date(2024, 2, 29).toordinal()
+    assert baseline_start(leap_day, 'day', 'year') == date(2023, 2, 28).toordinal()
+    assert baseline_start(date(2024, 3, 4).toordinal(), 'week', 'year') == date(2023, 3, 6).toordinal()
@@ -0,0 +1,116 @@
+"""
+Tests for analytics/distribution.py
+"""
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+
+import pytest
+
+from analytics.distribution import (
+    DEFAULT_K, KLLSketch, build_sketch, describe, fixed_width_histogram, interpolate_quantile, sketch_histogram
+)
+
+FRACTIONS = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+# Observed rank error is about 1.7 / k; allow some slack for the coin flips
+MAX_RANK_ERROR = 3 / DEFAULT_K
+
+
+def _values(size, seed=0):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(4, 1) for _ in range(size)]
+
+
+def _rank_error(ordered, estimate, fraction):
+    """Distance from fraction to the closest rank estimate can take, as a fraction of n"""
+    low = bisect_left(ordered, estimate) / len(ordered)
+    high = bisect_right(ordered, estimate) / len(ordered)
+    return 0 if low <= fraction <= high else min(abs(low - fraction), abs(high - fraction))
+
+
+def _assert_rank_error(sketch, ordered):
+    for fraction, estimate in zip(FRACTIONS, sketch.quantiles(FRACTIONS)):
+        assert _rank_error(ordered, estimate, fraction) <= MAX_RANK_ERROR, fraction
+
+
+def test_exact_until_first_compaction():
+    values = _values(100)
+    sketch = build_sketch(values)
+    ordered = sorted(values)
+
+    assert sketch.exact
+    assert sketch.quantiles(FRACTIONS) == [interpolate_quantile(ordered, fraction) for fraction in FRACTIONS]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rank_error_is_bounded(seed):
+    values = _values(100_000, seed)
+    sketch = KLLSketch(seed=seed)
+    sketch.extend(values)
+
+    assert not sketch.exact
+    assert (sketch.count, sketch.min, sketch.max) == (len(values), min(values), max(values))
+    assert sum(weight for _, weight in sketch.weighted()) == len(values)
+    # O(k log n) memory, not O(n)
+    assert len(sketch.weighted()) < 4 * DEFAULT_K
+    _assert_rank_error(sketch, sorted(values))
+
+
+def test_add_and_extend_agree_on_accuracy():
+    values = _values(20_000, 7)
+    sketch = KLLSketch(seed=7)
+    for value in values:
+        sketch.add(value)
+    _assert_rank_error(sketch, sorted(values))
+
+
+def test_merged_sketches_match_the_whole_stream():
+    values = _values(100_000, 3)
+    merged = KLLSketch(seed=3)
+    for start in range(0, len(values), 7_000):
+        part = KLLSketch(seed=start)
+        part.extend(values[start:start + 7_000])
+        merged.merge(part)
+    merged.merge(KLLSketch())
+
+    assert (merged.count, merged.min, merged.max) == (len(values), min(values), max(values))
+    assert sum(weight for _, weight in merged.weighted()) == len(values)
+    assert len(merged.weighted()) < 4 * DEFAULT_K
+    _assert_rank_error(merged, sorted(values))
+
+
+def test_merge_rejects_a_different_k():
+    sketch = build_sketch([1.0, 2.0], k=64)
+    with pytest.raises(ValueError):
+        build_sketch([1.0]).merge(sketch)
+
+
+def test_empty_and_constant_inputs():
+    assert KLLSketch().percentiles() == {'p50': 0, 'p90': 0, 'p99': 0}
+    assert fixed_width_histogram([]) == {}
+    assert sketch_histogram(build_sketch([5.0] * 10)) == {'5.0': 10}
+
+
+def test_fixed_width_histogram_is_exact():
+    histogram = fixed_width_histogram(array('d', [0, 1, 2, 3, 4, 5, 6, 7, 8, 10]), bins=5)
+    assert histogram == {'0.00-2.00': 2, '2.00-4.00': 2, '4.00-6.00': 2, '6.00-8.00': 2, '8.00-10.00': 2}
+
+
+@pytest.mark.parametrize('mode', ['fixed', 'quantile'])
+def test_sketch_histogram_counts_every_value(mode):
+    values = _values(50_000, 11)
+    histogram = sketch_histogram(build_sketch(values), bins=10, mode=mode)
+
+    assert sum(histogram.values()) == len(values)
+    if mode == 'quantile':
+        # Equal-frequency bins hold about a tenth of the values each
+        assert all(abs(count - len(values) / 10) <= len(values) * MAX_RANK_ERROR * 2 for count in histogram.values())
+
+
+def test_describe():
+    summary = describe([1.0, 2.0, 3.0, 4.0], bins=2)
+    assert summary['percentiles'] == pytest.approx({'p50': 2.5, 'p90': 3.7, 'p99': 3.97})
+    assert (summary['count'], summary['min'], summary['max']) == (4, 1.0, 4.0)
+    assert summary['histogram'] == {'1.00-2.50': 2, '2.50-4.00': 2}
+    with pytest.raises(ValueError):
+        describe([1.0], mode='log')
@@ -0,0 +1,100 @@
+"""
+Tests for utils/export.py and the streaming export route
+"""
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from utils import export
+from utils.columnar import ColumnarStore
+from utils.export import EXPORTERS, gzip_chunks, iter_csv, iter_json, iter_jsonl
+
+RECORDS = [
+    {'id': 1, 'valor': 10.5, 'descricao': 'Aluguel, março'},
+    {'id': 2, 'categoria': 'Luz', 'valor': None},
+    {'id': 3, 'descricao': 'ção "citada"\nsegunda linha'}
+]
+
+
+def _text(chunks):
+    return b''.join(chunks).decode('utf-8')
+
+
+@pytest.fixture(params=[list, ColumnarStore], ids=['records', 'columnar'])
+def data(request):
+    return request.param(RECORDS)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_CHUNK_SIZE', 16)
+
+
+def test_csv_header_is_the_union_of_keys(data, small_chunks):
+    rows = list(csv.DictReader(io.StringIO(_text(iter_csv(data)))))
+
+    assert list(rows[0]) == ['id', 'valor', 'descricao', 'categoria']
+    assert rows[1] == {'id': '2', 'valor': '', 'descricao': '', 'categoria': 'Luz'}
+    assert rows[2]['descricao'] == RECORDS[2]['descricao']
+
+
+def test_jsonl_and_json_round_trip(data, small_chunks):
+    lines = _text(iter_jsonl(data)).splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+    assert json.loads(_text(iter_json(data))) == RECORDS
+
+
+def test_empty_json_export_is_an_array():
+    assert json.loads(_text(iter_json([]))) == []
+
+
+def test_fields_and_stop(data):
+    assert list(csv.reader(io.StringIO(_text(iter_csv(data, ['valor', 'id'], 2))))) == [
+        ['valor', 'id'], ['10.5', '1'], ['', '2']
+    ]
+    if isinstance(data, ColumnarStore):
+        # Columnar exports only decode the projected columns
+        assert json.loads(_text(iter_json(data, ['id'], 2))) == [{'id': 1}, {'id': 2}]
+
+
+def test_chunks_are_bounded(small_chunks):
+    records = [{'id': row, 'descricao': 'x' * 10} for row in range(100)]
+    for exporter in EXPORTERS.values():
+        chunks = list(exporter(ColumnarStore(records)))
+        assert len(chunks) > 10
+        assert max(len(chunk) for chunk in chunks) < 16 + 64
+
+
+def test_gzip_chunks_decompress_to_the_input():
+    chunks = [f'linha {row}\n'.encode('utf-8') for row in range(1000)]
+    assert gzip.decompress(b''.join(gzip_chunks(iter(chunks)))) == b''.join(chunks)
+
+
+@pytest.fixture
+def client(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': RECORDS}})
+    return client
+
+
+def test_export_route_gzip_and_fields(client):
+    response = client.get('/api/export/financeiro?format=jsonl&gzip=1&fields=id,descricao')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    assert '.jsonl.gz' in response.headers['Content-Disposition']
+    lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'id': 1, 'descricao': 'Aluguel, março'},
+        {'id': 2},
+        {'id': 3, 'descricao': RECORDS[2]['descricao']}
+    ]
+
+
+def test_export_route_rejects_bad_requests(client):
+    assert client.get('/api/export/financeiro?format=xml').status_code == 400
+    assert client.get('/api/export/outro').status_code == 400
+    assert client.get('/api/export/organizacional').status_code == 400
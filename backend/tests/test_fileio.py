@@ -0,0 +1,32 @@
+"""
+Tests for utils/fileio.py
+"""
+import os
+import stat
+
+from utils.fileio import atomic_write
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_honors_umask(tmp_path):
+    mask = os.umask(0)
+    os.umask(mask)
+
+    path = tmp_path / 'new.json'
+    atomic_write(str(path), b'{}')
+
+    assert _mode(path) == 0o666 & ~mask
+
+
+def test_replace_keeps_existing_mode(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_bytes(b'old')
+    os.chmod(path, 0o640)
+
+    atomic_write(str(path), b'new')
+
+    assert path.read_bytes() == b'new'
+    assert _mode(path) == 0o640
@@ -0,0 +1,69 @@
+"""
+Tests for parsers/formats.py
+"""
+import re
+
+import pytest
+
+from parsers.formats import CSVParser, FormatDetector, TextParser
+from parsers.parser import DataParser
+
+
+def _baseline_pairs(line):
+    """TextParser tokenization before the single-scan fast path"""
+    item = {}
+    for pair in re.split(r',(?![^()]*\))', line.strip()):
+        if ':' in pair:
+            key, value = pair.split(':', 1)
+            item[key.strip()] = value.strip().strip('"').strip("'")
+    return item
+
+
+@pytest.mark.parametrize('line', [
+    'nome: Ana, valor: 50',
+    'obs: retorno (joelho, ombro), valor: 80',
+    'obs: sem parêntese de abertura, nota: 1) fim',
+    'a: 1, b: 2), c: 3',
+    'a: x) , b: y',
+    'hora: 10:30, sala: 2'
+])
+def test_text_tokenization_matches_baseline(line):
+    parser = TextParser()
+    parser._convert_value = lambda value: value
+    assert parser._parse_line(line) == _baseline_pairs(line)
+
+
+def test_delimiter_only_rows_are_kept():
+    parser = CSVParser()
+    records = parser.parse('nome,valor,obs\nAna,10,x\n,,\n\n   \nBia,20,y\n')
+    assert records == [
+        {'nome': 'Ana', 'valor': 10, 'obs': 'x'},
+        {'nome': '', 'valor': None, 'obs': ''},
+        {'nome': 'Bia', 'valor': 20, 'obs': 'y'}
+    ]
+    assert parser.error_count == 0
+
+
+@pytest.mark.parametrize('data', [
+    'data,valor,paciente\n2024-01-01 10:00,50,Ana\n2024-01-02 11:30,80,Bia',
+    'data,valor,paciente\n2024-01-01 10:00,50,Ana',
+    'hora,valor\n10:30,50\n11:00,80',
+    'tipo,valor\nConsulta: retorno,50\nConsulta: avaliação,80'
+])
+def test_csv_with_colon_in_first_column(data):
+    assert FormatDetector.detect(data)[:2] == ('csv', ',')
+
+
+def test_timestamp_first_csv_parses_as_financeiro():
+    parsed = DataParser().parse('data,valor,paciente\n2024-01-01 10:00,50,Ana')
+    assert parsed['financeiro'] == [{'data': '2024-01-01 10:00', 'valor': 50, 'paciente': 'Ana'}]
+    assert parsed['organizacional'] == []
+
+
+@pytest.mark.parametrize('data', [
+    'nome: Ana, valor: 50\nnome: Bia, valor: 80',
+    'paciente: Ana, obs: joelho (dor, inchaço), valor: 50',
+    'paciente: Ana\nvalor: 50'
+])
+def test_key_value_text_is_text(data):
+    assert FormatDetector.detect(data).format == 'text'
@@ -0,0 +1,165 @@
+"""
+Tests for analytics/groupby.py against a plain dict-of-lists reference
+"""
+import random
+from datetime import date
+
+import pytest
+
+from analytics.groupby import GroupKey, group_by, group_summary, parse_keys, top_groups
+from analytics.trends import to_number
+from utils.columnar import ITER_BLOCK_SIZE, ColumnarStore
+
+CATEGORIES = ['Aluguel', 'Luz', 'Água', None, '']
+
+
+def _records(size, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for row in range(size):
+        record = {
+            'paciente': f'P{rng.randint(1, 30)}',
+            'data': date(2024, rng.randint(1, 12), rng.randint(1, 28)).isoformat(),
+            'valor': rng.choice([rng.randint(1, 500), round(rng.uniform(1, 500), 2), None, '12.5', 'n/d'])
+        }
+        category = rng.choice(CATEGORIES)
+        if category is not None:
+            record['categoria'] = category
+        if row % 97 == 0:
+            record['data'] = 'sem data'
+        records.append(record)
+    return records
+
+
+def _reference(records, key_of, value_key='valor'):
+    groups = {}
+    for record in records:
+        groups.setdefault(key_of(record), []).append(to_number(record.get(value_key)))
+
+    result = {}
+    for group, values in groups.items():
+        numbers = [value for value in values if value is not None]
+        result[group] = [len(values), len(numbers), sum(numbers),
+                         min(numbers, default=float('inf')), max(numbers, default=float('-inf'))]
+    return result
+
+
+def _month(record):
+    try:
+        date.fromisoformat(record['data'])
+    except ValueError:
+        return 'Sem data'
+    return record['data'][:7]
+
+
+def _assert_groups(actual, expected):
+    assert actual.keys() == expected.keys()
+    for group, entry in expected.items():
+        assert actual[group][:2] == entry[:2]
+        assert actual[group][2] == pytest.approx(entry[2])
+        assert actual[group][3:] == entry[3:]
+
+
+@pytest.fixture(params=[list, ColumnarStore], ids=['records', 'columnar'])
+def wrap(request):
+    return request.param
+
+
+def test_parse_keys():
+    assert parse_keys('categoria, data:month,') == [GroupKey('categoria'), GroupKey('data', 'month')]
+    assert parse_keys(['paciente']) == [GroupKey('paciente')]
+    with pytest.raises(ValueError):
+        parse_keys('data:decade')
+    with pytest.raises(ValueError):
+        parse_keys(' , ')
+
+
+def test_single_key_matches_reference(wrap):
+    records = _records(3 * ITER_BLOCK_SIZE + 5)
+    groups = group_by(wrap(records), parse_keys('categoria'), 'valor', missing='Sem categoria')
+
+    expected = _reference(records, lambda record: record.get('categoria', 'Sem categoria'))
+    _assert_groups({group[0]: entry for group, entry in groups.items()}, expected)
+
+
+def test_key_and_date_bucket_match_reference(wrap):
+    records = _records(2 * ITER_BLOCK_SIZE, seed=1)
+    groups = group_by(wrap(records), parse_keys('paciente,data:month'), 'valor', missing='Sem data')
+
+    _assert_groups(groups, _reference(records, lambda record: (record['paciente'], _month(record))))
+
+
+def test_without_value_key_rows_are_counted(wrap):
+    records = _records(500, seed=2)
+    groups = group_by(wrap(records), parse_keys('paciente'))
+
+    assert {group[0]: entry[0] for group, entry in groups.items()} == {
+        group: entry[0] for group, entry in _reference(records, lambda record: record['paciente']).items()
+    }
+    assert all(entry[1] == 0 for entry in groups.values())
+
+
+def test_unhashable_cells_still_group():
+    records = [{'tags': ['a'], 'valor': 1}, {'tags': ['a'], 'valor': 2}, {'tags': 'b', 'valor': 4}]
+    groups = group_by(records, parse_keys('tags'), 'valor')
+    assert {group[0]: entry[2] for group, entry in groups.items()} == {"['a']": 3.0, 'b': 4.0}
+
+
+@pytest.mark.parametrize('sort', ['total', 'count', 'average', 'min', 'max'])
+@pytest.mark.parametrize('descending', [True, False])
+def test_top_groups_match_a_full_sort(sort, descending):
+    records = _records(2000, seed=3)
+    # A group with no numeric value ranks last for average/min/max
+    records += [{'paciente': 'P99', 'valor': 'n/d'}]
+    keys = parse_keys('paciente')
+    groups = group_by(records, keys, 'valor')
+
+    rows = top_groups(groups, keys, len(groups), sort, descending)
+    top = top_groups(groups, keys, 5, sort, descending)
+
+    ranked = [row for row in rows if row[sort] is not None]
+    values = [row[sort] for row in ranked]
+    assert values == sorted(values, reverse=descending)
+    assert [row['keys'] for row in rows[len(ranked):]] == ([{'paciente': 'P99'}] if sort in ('average', 'min', 'max') else [])
+    assert [row[sort] for row in top] == values[:5]
+
+
+def test_top_groups_rejects_unknown_sort():
+    with pytest.raises(ValueError):
+        top_groups({}, parse_keys('paciente'), sort='mediana')
+
+
+def test_group_summary(wrap):
+    records = [
+        {'categoria': 'Aluguel', 'valor': 100},
+        {'categoria': 'Aluguel', 'valor': 50.5},
+        {'categoria': 'Luz', 'valor': 30},
+        {'categoria': 'Água', 'valor': None}
+    ]
+    summary = group_summary(wrap(records), parse_keys('categoria'), 'valor', limit=2)
+
+    assert (summary['groups'], summary['sort'], summary['order']) == (3, 'total', 'desc')
+    assert summary['items'] == [
+        {'keys': {'categoria': 'Aluguel'}, 'count': 2, 'total': 150.5, 'average': 75.25, 'min': 50.5, 'max': 100},
+        {'keys': {'categoria': 'Luz'}, 'count': 1, 'total': 30.0, 'average': 30.0, 'min': 30, 'max': 30}
+    ]
+
+
+def test_groupby_route(api):
+    client, _ = api
+    client.post('/api/state', json={'state': {'financeiro_records': [
+        {'id': 1, 'categoria': 'Aluguel', 'valor': 100.0, 'data': '2024-01-05'},
+        {'id': 2, 'categoria': 'Luz', 'valor': 30.0, 'data': '2024-01-20'},
+        {'id': 3, 'categoria': 'Luz', 'valor': 40.0, 'data': '2024-02-02'}
+    ]}})
+
+    body = client.get('/api/analytics/groupby?keys=categoria,data:month&limit=2').get_json()
+    assert body['groupby']['groups'] == 3
+    assert [(item['keys'], item['total']) for item in body['groupby']['items']] == [
+        ({'categoria': 'Aluguel', 'data:month': '2024-01'}, 100.0),
+        ({'categoria': 'Luz', 'data:month': '2024-02'}, 40.0)
+    ]
+
+    assert client.get('/api/analytics/groupby?sort=mediana').status_code == 400
+    assert client.get('/api/analytics/groupby?keys=data:decade').status_code == 400
+    assert client.get('/api/analytics/groupby?keys=a,b,c,d,e').status_code == 400
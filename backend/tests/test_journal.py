@@ -0,0 +1,72 @@
+"""
+Tests for utils/journal.py and the journaled state of utils/storage.py
+"""
+import pytest
+
+from utils.journal import apply_delta
+from utils.storage import DataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DataStore(str(tmp_path))
+
+
+def test_apply_delta():
+    state = {'evolucoes': [{'id': 1, 'v': 'a'}, {'id': 2, 'v': 'b'}, {'id': 3, 'v': 'c'}], 'tema': 'claro'}
+    apply_delta(state, {
+        'set': {'tema': 'escuro'},
+        'collection': 'evolucoes',
+        'updated': [{'id': 2, 'v': 'B'}, {'id': 9, 'v': 'novo'}],
+        'removed': [3],
+        'added': [{'id': 4, 'v': 'd'}]
+    })
+    assert state == {
+        'evolucoes': [{'id': 1, 'v': 'a'}, {'id': 2, 'v': 'B'}, {'id': 9, 'v': 'novo'}, {'id': 4, 'v': 'd'}],
+        'tema': 'escuro'
+    }
+
+
+def test_replay_snapshot_plus_journal(store):
+    store.save_state({'evolucoes': [{'id': 1}]})
+    store.append_state_delta({'collection': 'evolucoes', 'added': [{'id': 2}]})
+    seq = store.append_state_delta({'collection': 'evolucoes', 'removed': [1]})
+
+    state, loaded_seq = store.load_state_versioned()
+    assert state == {'evolucoes': [{'id': 2}]}
+    assert loaded_seq == seq
+
+
+def test_compaction_keeps_state(store):
+    store.save_state({'evolucoes': []})
+    for record_id in range(10):
+        store.append_state_delta({'collection': 'evolucoes', 'added': [{'id': record_id}]})
+    before = store.load_state_versioned()
+
+    store.compact_state()
+
+    assert store._journal.read()[1] == []
+    assert store.load_state_versioned() == before
+    next_seq = store.append_state_delta({'collection': 'evolucoes', 'removed': [0]})
+    assert next_seq == before[1] + 1
+    assert len(store.load_state()['evolucoes']) == 9
+
+
+def test_torn_trailing_line_is_ignored_and_truncated(store):
+    store.save_state({'evolucoes': []})
+    store.append_state_delta({'collection': 'evolucoes', 'added': [{'id': 1}]})
+    with open(store._journal.filepath, 'ab') as handle:
+        handle.write(b'{"collection": "evolucoes", "added": [{"id"')
+
+    assert store.load_state() == {'evolucoes': [{'id': 1}]}
+
+    seq = store.append_state_delta({'collection': 'evolucoes', 'added': [{'id': 2}]})
+    assert store.load_state() == {'evolucoes': [{'id': 1}, {'id': 2}]}
+    assert [entry['seq'] for entry in store._journal.read()[1]] == [seq - 1, seq]
+
+
+def test_full_save_is_a_new_version(store):
+    _, first = store.save_state_versioned({'a': 1})
+    _, second = store.save_state_versioned({'a': 2})
+    assert second == first + 1
+    assert store.load_state_versioned() == ({'a': 2}, second)
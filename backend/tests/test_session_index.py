@@ -0,0 +1,73 @@
+"""
+Tests for utils/session_index.py and session retention in DataStore
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.session_index import SessionIndex, timestamp_from_filename
+from utils.storage import DataStore
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SessionIndex(str(tmp_path / 'sessions.sqlite3'))
+    for session_id, created_at in [
+        ('a.json', '2024-01-01T09:59:59'),
+        ('b.json', '2024-01-01T10:00:00.250000'),
+        ('c.json', '2024-01-01T23:59:59.999999'),
+        ('d.json', '2024-01-02T00:00:00')
+    ]:
+        index.register(session_id, created_at, 'csv', {'financeiro': 1}, 10)
+    return index
+
+
+def _ids(index, **filters):
+    return [entry['id'] for entry in index.query(**filters)[1]]
+
+
+@pytest.mark.parametrize('date_from', ['2024-01-01T10:00', '2024-01-01 10:00', '2024-01-01 10:00:00'])
+def test_time_bounds_accept_any_iso_separator(index, date_from):
+    assert _ids(index, date_from=date_from) == ['b.json', 'c.json', 'd.json']
+
+
+def test_bare_end_date_includes_the_whole_day(index):
+    assert _ids(index, date_to='2024-01-01') == ['a.json', 'b.json', 'c.json']
+    assert _ids(index, date_from='2024-01-02', date_to='2024-01-02') == ['d.json']
+
+
+def test_end_time_is_a_moment_not_a_day(index):
+    assert _ids(index, date_to='2024-01-01 10:00') == ['a.json']
+
+
+def test_query_pages_and_counts(index):
+    total, entries = index.query(limit=2, offset=1, date_to='2024-01-01')
+    assert total == 3
+    assert [entry['id'] for entry in entries] == ['b.json', 'c.json']
+    assert entries[0]['financeiro'] == 1 and entries[0]['organizacional'] is None
+
+
+def test_timestamp_from_filename():
+    assert timestamp_from_filename('analise_20240102_030405.jsonl') == '2024-01-02T03:04:05'
+    assert timestamp_from_filename('estado.json') is None
+
+
+def test_prune_sessions(tmp_path):
+    storage_dir = tmp_path / 'output'
+    storage_dir.mkdir()
+    # Written before the catalog existed: imported with its filename timestamp
+    (storage_dir / 'antiga_20200101_120000.json').write_text('{}')
+    store = DataStore(str(storage_dir))
+
+    now = datetime.now()
+    for name, age in [('recente', 1), ('media', 10), ('velha', 40)]:
+        store.save_session(name, {'timestamp': (now - timedelta(days=age)).isoformat(), 'data': {}})
+
+    pruned = store.prune_sessions(older_than_days=30)
+    assert [name.split('_')[0] for name in pruned] == ['antiga', 'velha']
+
+    pruned = store.prune_sessions(keep_last=1)
+    assert [name.split('_')[0] for name in pruned] == ['media']
+    assert [name.split('_')[0] for name in store.list_sessions()] == ['recente']
+    assert sorted(name for name in os.listdir(storage_dir) if name.endswith('.json')) == store.list_sessions()
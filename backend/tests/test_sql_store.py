@@ -0,0 +1,101 @@
+"""
+Tests for utils/sql_store.py
+"""
+import copy
+import random
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from utils import serialization
+from utils.classifier import default_classifier
+from utils.journal import apply_delta
+from utils.sql_store import SQLiteRecordStore
+
+
+@pytest.fixture
+def sql_store(tmp_path):
+    return SQLiteRecordStore(str(tmp_path / 'records.sqlite3'), default_classifier)
+
+
+def _rows(store, table='financeiro'):
+    with closing(store._connect()) as conn:
+        return [serialization.loads(payload)
+                for (payload,) in conn.execute(f'SELECT payload FROM {table} ORDER BY row_id')]
+
+
+def _random_delta(rng, next_id):
+    ids = list(range(1, next_id))
+    delta = {'collection': 'financeiro_records'}
+    if rng.random() < 0.5:
+        delta['updated'] = [{'id': rng.choice(ids + [next_id + 100]), 'valor': rng.randint(1, 500)}
+                            for _ in range(rng.randint(1, 3))]
+    if rng.random() < 0.4:
+        delta['removed'] = rng.sample(ids, rng.randint(1, 2))
+    delta['added'] = [{'id': next_id + offset, 'valor': rng.randint(1, 500)}
+                      for offset in range(rng.randint(0, 3))]
+    return delta
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_apply_delta_matches_replayed_state(sql_store, seed):
+    rng = random.Random(seed)
+    records = [{'id': i, 'valor': rng.randint(1, 500)} for i in range(1, 20)]
+    # Duplicated id: only its first record is updated
+    records.append({'id': 5, 'valor': 1})
+    state = {'financeiro_records': copy.deepcopy(records)}
+    sql_store.replace('financeiro', records)
+
+    next_id = 20
+    for _ in range(40):
+        delta = _random_delta(rng, next_id)
+        next_id += 10
+        apply_delta(state, copy.deepcopy(delta))
+        sql_store.apply_delta('financeiro', delta)
+
+    assert _rows(sql_store) == state['financeiro_records']
+    summary = sql_store.query('financeiro')['summary']
+    assert summary['count'] == len(state['financeiro_records'])
+    assert summary['total'] == sum(record['valor'] for record in state['financeiro_records'])
+
+
+def test_apply_delta_writes_only_touched_rows(sql_store):
+    sql_store.replace('financeiro', [{'id': i, 'valor': i} for i in range(1, 6)])
+    with closing(sql_store._connect()) as conn:
+        before = dict(conn.execute('SELECT record_id, row_id FROM financeiro'))
+
+    sql_store.apply_delta('financeiro', {'updated': [{'id': 3, 'valor': 30}], 'removed': [5]})
+
+    with closing(sql_store._connect()) as conn:
+        after = dict(conn.execute('SELECT record_id, row_id FROM financeiro'))
+    assert after == {key: row for key, row in before.items() if key != 5}
+
+
+def test_missing_categories_share_one_label(sql_store):
+    sql_store.replace('financeiro', [
+        {'valor': 1, 'categoria': None},
+        {'valor': 2, 'categoria': ''},
+        {'valor': 4},
+        {'valor': 8, 'categoria': 'Aluguel'}
+    ])
+
+    by_category = sql_store.query('financeiro')['by_category']
+    assert by_category == {'Sem categoria': {'count': 3, 'total': 7}, 'Aluguel': {'count': 1, 'total': 8}}
+    assert sql_store.query('financeiro', categories=['Sem categoria'])['summary']['total'] == 7
+
+
+def test_tables_without_record_id_are_migrated(tmp_path):
+    path = str(tmp_path / 'records.sqlite3')
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute('CREATE TABLE financeiro (row_id INTEGER PRIMARY KEY, data TEXT, categoria TEXT, '
+                     'valor REAL, payload TEXT NOT NULL)')
+        conn.execute("INSERT INTO financeiro (categoria, valor, payload) VALUES ('None', 5, ?)",
+                     (serialization.dumps({'id': 7, 'valor': 5, 'categoria': None}).decode('utf-8'),))
+
+    store = SQLiteRecordStore(path, default_classifier)
+    assert store.query('financeiro')['by_category'] == {'Sem categoria': {'count': 1, 'total': 5}}
+
+    store.apply_delta('financeiro', {'updated': [{'id': 7, 'valor': 6}]})
+
+    assert _rows(store) == [{'id': 7, 'valor': 6}]
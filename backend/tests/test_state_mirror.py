@@ -0,0 +1,70 @@
+"""
+Tests for utils/state_mirror.py against utils.journal.apply_delta
+"""
+import copy
+import random
+
+import pytest
+
+from analytics.incremental import IncrementalAnalytics
+from utils.columnar import ColumnarStore
+from utils.journal import apply_delta
+from utils.state_mirror import StateMirror
+
+
+def _random_delta(rng, next_id):
+    ids = list(range(1, next_id))
+    delta = {'collection': 'financeiro_records'}
+    if ids and rng.random() < 0.5:
+        delta['updated'] = [{'id': rng.choice(ids + [next_id + 100]), 'valor': rng.randint(1, 500)}
+                            for _ in range(rng.randint(1, 3))]
+    if ids and rng.random() < 0.4:
+        delta['removed'] = rng.sample(ids, min(len(ids), rng.randint(1, 2)))
+    delta['added'] = [{'id': next_id + offset, 'valor': rng.randint(1, 500), 'categoria': rng.choice('ab')}
+                      for offset in range(rng.randint(0, 3))]
+    return delta
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_mirror_matches_replayed_state(seed):
+    rng = random.Random(seed)
+    state = {'financeiro_records': [{'id': i, 'valor': rng.randint(1, 500)} for i in range(1, 30)]}
+    # Duplicated id: only its first record is updated
+    state['financeiro_records'].append({'id': 5, 'valor': 1})
+
+    store = ColumnarStore(copy.deepcopy(state['financeiro_records']))
+    analytics = IncrementalAnalytics('financeiro')
+    analytics.reset(store)
+    mirror = StateMirror()
+    mirror.reset(0, ['financeiro_records'])
+
+    next_id = 30
+    for seq in range(1, 60):
+        delta = _random_delta(rng, next_id)
+        next_id += 10
+        assert mirror.follows(seq, ['financeiro_records'])
+        apply_delta(state, copy.deepcopy(delta))
+        mirror.apply('financeiro_records', store, analytics, delta)
+        mirror.seq = seq
+
+        assert store.to_records() == state['financeiro_records']
+
+    reference = IncrementalAnalytics('financeiro')
+    reference.reset(ColumnarStore(state['financeiro_records']))
+    snapshot, expected = analytics.snapshot(), reference.snapshot()
+    for key in ('total', 'average', 'stdev'):
+        assert snapshot[key] == pytest.approx(expected[key])
+    for key in ('count', 'min', 'max', 'median'):
+        assert snapshot[key] == expected[key]
+
+
+def test_organizational_counts_follow_removals():
+    store = ColumnarStore([{'id': 1, 'tipo': 'a'}, {'id': 2, 'tipo': 'b'}])
+    analytics = IncrementalAnalytics('organizacional')
+    analytics.reset(store)
+    mirror = StateMirror()
+    mirror.reset(0, ['evolucoes'])
+
+    mirror.apply('evolucoes', store, analytics, {'removed': [2], 'updated': [{'id': 1, 'tipo': 'c'}]})
+
+    assert analytics.snapshot()['distribution'] == {'c': 1}
@@ -0,0 +1,27 @@
+"""
+Tests for utils/validators.py
+"""
+import pytest
+
+from utils.validators import Validator
+
+
+@pytest.mark.parametrize('delta', [
+    {'collection': 'evolucoes', 'updated': [{'id': 1, 'valor': 2}]},
+    {'collection': 'evolucoes', 'updated': [{'id': 'a1'}], 'removed': ['b2', 3]},
+    {'set': {'financeiro_records': []}}
+])
+def test_valid_deltas(delta):
+    assert Validator.validate_state_delta(delta)[0]
+
+
+@pytest.mark.parametrize('delta', [
+    {'collection': 'evolucoes', 'updated': [{'valor': 2}]},
+    {'collection': 'evolucoes', 'updated': [{'id': [1]}]},
+    {'collection': 'evolucoes', 'updated': [{'id': {'a': 1}}]},
+    {'collection': 'evolucoes', 'updated': [{'id': None}]},
+    {'collection': 'evolucoes', 'removed': [[1]]},
+    {'collection': 'evolucoes', 'removed': [True]}
+])
+def test_unusable_ids_are_rejected(delta):
+    assert not Validator.validate_state_delta(delta)[0]
@@ -0,0 +1,124 @@
+"""
+Response cache - memoized, serialized results tied to a data version
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional, Tuple
+
+
+class CachedResult(NamedTuple):
+    """A serialized response body and its entity tag"""
+    etag: str
+    body: bytes
+
+
+class ResultCache:
+    """
+    LRU cache of serialized results
+
+    Entries are keyed by the current data version plus a caller key; writers
+    call bump() whenever the underlying data changes, which drops every entry.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, CachedResult]' = OrderedDict()
+        self._size = 0
+        self._version = 0
+        # Distinguishes entity tags issued by different server processes
+        self._epoch = os.urandom(4).hex()
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Current data version"""
+        return self._version
+
+    def bump(self) -> int:
+        """Mark the data as changed and invalidate every cached result"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._size = 0
+            return self._version
+
+    def etag_for(self, key: Hashable, version: Optional[int] = None) -> str:
+        """Entity tag of the result for key at a data version (default: current)"""
+        version = self._version if version is None else version
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+        return f"{self._epoch}-{version}-{digest}"
+
+    def get(self, key: Hashable) -> Optional[CachedResult]:
+        """Return a cached result, marking it as recently used"""
+        with self._lock:
+            entry = self._entries.get((self._version, key))
+            if entry is not None:
+                self._entries.move_to_end((self._version, key))
+            return entry
+
+    def put(self, key: Hashable, body: bytes, version: Optional[int] = None) -> CachedResult:
+        """
+        Store a serialized result, evicting least recently used entries
+
+        version is the data version the result was computed from; results
+        computed before a concurrent bump() are returned but not stored.
+        """
+        with self._lock:
+            version = self._version if version is None else version
+            entry = CachedResult(self.etag_for(key, version), body)
+
+            if version != self._version or len(body) > self.max_bytes:
+                return entry
+
+            previous = self._entries.pop((self._version, key), None)
+            if previous is not None:
+                self._size -= len(previous.body)
+
+            self._entries[(self._version, key)] = entry
+            self._size += len(body)
+
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+            return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VersionedCache:
+    """
+    Small LRU cache of Python objects computed from one data version
+
+    Callers pass the data version they read; an entry stored for an older
+    version is never returned.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[int, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Any:
+        """Cached value for key at version, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, version: int) -> None:
+        """Store a value computed from version, evicting the oldest entries"""
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,94 @@
+"""
+Record classifier - key lookups resolved once per distinct key shape
+
+The key lists can be overridden with comma-separated environment variables
+ZENFISIO_NUMERIC_KEYS and ZENFISIO_CATEGORY_KEYS.
+"""
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_NUMERIC_KEYS = ['valor', 'preco', 'custo', 'receita', 'despesa', 'amount', 'price']
+DEFAULT_CATEGORY_KEYS = ['categoria', 'tipo', 'category', 'type']
+
+# Distinct key shapes remembered before the cache starts over
+MAX_SHAPES = 4096
+
+
+def _keys_from_env(name: str, default: List[str]) -> List[str]:
+    keys = [key.strip() for key in os.getenv(name, '').split(',') if key.strip()]
+    return keys or list(default)
+
+
+NUMERIC_KEYS = _keys_from_env('ZENFISIO_NUMERIC_KEYS', DEFAULT_NUMERIC_KEYS)
+CATEGORY_KEYS = _keys_from_env('ZENFISIO_CATEGORY_KEYS', DEFAULT_CATEGORY_KEYS)
+
+
+class KeyShape(NamedTuple):
+    """What a set of record keys means for classification"""
+    financial: bool                  # a numeric key is present (any letter case)
+    value_keys: Tuple[str, ...]      # numeric keys present, in priority order
+    category_key: Optional[str]      # first category key present
+
+
+class RecordClassifier:
+    """
+    Classify records and resolve their value/category columns
+
+    Decisions are cached per key tuple, so a homogeneous dataset pays for
+    the key searches once.
+    """
+
+    def __init__(self, numeric_keys: Sequence[str] = NUMERIC_KEYS,
+                 category_keys: Sequence[str] = CATEGORY_KEYS):
+        self.numeric_keys = list(numeric_keys)
+        self.category_keys = list(category_keys)
+        self._financial_keys = frozenset(key.lower() for key in self.numeric_keys)
+        self._shapes: Dict[Tuple[str, ...], KeyShape] = {}
+
+    def shape(self, item: Dict) -> KeyShape:
+        """Cached KeyShape of an item's keys"""
+        keys = tuple(item)
+        shape = self._shapes.get(keys)
+
+        if shape is None:
+            shape = self._resolve(keys)
+            if len(self._shapes) >= MAX_SHAPES:
+                self._shapes.clear()
+            self._shapes[keys] = shape
+
+        return shape
+
+    def _resolve(self, keys: Tuple[str, ...]) -> KeyShape:
+        present = set(keys)
+        financial_keys = self._financial_keys
+
+        return KeyShape(
+            financial=any(key.lower() in financial_keys for key in keys),
+            value_keys=tuple(key for key in self.numeric_keys if key in present),
+            category_key=next((key for key in self.category_keys if key in present), None)
+        )
+
+    def is_financial(self, item: Dict) -> bool:
+        """True for financeiro records"""
+        return self.shape(item).financial
+
+    def value(self, item: Dict) -> Optional[float]:
+        """First numeric key value convertible to float, or None"""
+        for key in self.shape(item).value_keys:
+            value = item[key]
+            if type(value) is float or type(value) is int:
+                return float(value)
+            try:
+                return float(value)
+            except (ValueError, TypeError):
+                continue
+        return None
+
+    def category(self, item: Dict, default: Any = None) -> Any:
+        """Raw value of the first category key, or default"""
+        key = self.shape(item).category_key
+        return default if key is None else item[key]
+
+
+# Shared instance (one shape cache for the whole process)
+default_classifier = RecordClassifier()
@@ -0,0 +1,444 @@
+"""
+Columnar record storage - compact in-memory representation of parsed rows
+"""
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .dates import parse_date, format_ordinal
+
+# Per-row cell state kept in each column mask
+MISSING = 0
+PRESENT = 1
+NULL = 2
+
+# Rows decoded per block when iterating records
+ITER_BLOCK_SIZE = 4096
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+_FLOAT_EXACT_INT = 2 ** 53
+_SCALAR_TYPES = (str, int, float, bool)
+
+# Dictionary encoding only pays off when values repeat: a category column
+# whose distinct values exceed this share of its rows (counted from
+# CATEGORY_SAMPLE_ROWS on) is kept as plain objects instead
+CATEGORY_SAMPLE_ROWS = 1000
+CATEGORY_MAX_DISTINCT_RATIO = 0.5
+
+
+class Column:
+    """
+    A single typed column
+
+    Kinds: 'int' (array q), 'float' (array d), 'date' (day ordinals),
+    'category' (dictionary-encoded scalars) and 'object' (plain list).
+    A column starts with the narrowest kind that fits its first value and
+    is widened once when a value does not fit anymore, or when a category
+    column turns out to hold mostly distinct values (ids, free text).
+    """
+
+    __slots__ = ('kind', 'mask', 'data', '_int_rows', '_layouts', '_values', '_index')
+
+    def __init__(self, size: int = 0):
+        self.kind = None
+        self.mask = bytearray(size)
+        self.data = None
+        self._int_rows = None
+        self._layouts = None
+        self._values = None
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    @property
+    def complete(self) -> bool:
+        """True when every row holds a non-null value"""
+        return self.mask.count(PRESENT) == len(self.mask)
+
+    def append_missing(self) -> None:
+        """Add a row where the key was absent"""
+        self.mask.append(MISSING)
+        self._append_filler()
+
+    def append(self, value: Any) -> None:
+        """Add a row value, widening the column kind if needed"""
+        if value is None:
+            self.mask.append(NULL)
+            self._append_filler()
+            return
+
+        if self.kind is None:
+            self._reset_kind(self._kind_for(value))
+
+        if not self._encode(value):
+            self._widen(value)
+            self._encode(value)
+
+        self.mask.append(PRESENT)
+
+        if self.kind == 'category' and \
+                len(self._values) > CATEGORY_MAX_DISTINCT_RATIO * max(len(self.mask), CATEGORY_SAMPLE_ROWS):
+            self._convert('object')
+
+    def set(self, row: int, value: Any) -> None:
+        """Overwrite a row value (None for null), widening the column kind if needed"""
+        self.append(value)
+        self._move_last(row)
+
+    def set_missing(self, row: int) -> None:
+        """Mark a row as lacking the key"""
+        self.append_missing()
+        self._move_last(row)
+
+    def delete(self, row: int) -> None:
+        """Remove a row, shifting the following rows up"""
+        for buffer in self._buffers():
+            del buffer[row]
+
+    def _buffers(self) -> List:
+        """Per-row buffers, all of the same length"""
+        return [buffer for buffer in (self.mask, self.data, self._int_rows, self._layouts) if buffer is not None]
+
+    def _move_last(self, row: int) -> None:
+        """Move the last row into row (the last row is dropped)"""
+        for buffer in self._buffers():
+            buffer[row] = buffer[-1]
+            del buffer[-1]
+
+    def value(self, row: int) -> Any:
+        """Decode a single row value (None for missing or null)"""
+        if self.mask[row] != PRESENT:
+            return None
+        return self._decode(row)
+
+    def decode(self, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """Decode a range of rows; missing and null rows decode to None"""
+        stop = len(self.mask) if stop is None else stop
+        mask = self.mask
+        return [self._decode(row) if mask[row] == PRESENT else None for row in range(start, stop)]
+
+    def floats(self) -> Optional[array]:
+        """Return the column as a float array when it is complete and numeric"""
+        if self.kind == 'float' and self.complete:
+            return self.data
+        if self.kind == 'int' and self.complete:
+            return array('d', self.data)
+        return None
+
+    def dictionary(self) -> Optional[List[Any]]:
+        """
+        Distinct values of a complete category column, indexed by code
+
+        data then holds one code per row, so rows can be grouped by code
+        without decoding them.
+        """
+        if self.kind == 'category' and self.complete:
+            return self._values
+        return None
+
+    def _kind_for(self, value: Any) -> str:
+        value_type = type(value)
+
+        if value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+            return 'int'
+        if value_type is float:
+            return 'float'
+        if value_type is str and parse_date(value):
+            return 'date'
+        if value_type in _SCALAR_TYPES:
+            return 'category'
+        return 'object'
+
+    def _reset_kind(self, kind: str) -> None:
+        """Switch to an empty storage of the given kind, filled for existing rows"""
+        size = len(self.mask)
+        self.kind = kind
+        self._int_rows = None
+        self._layouts = None
+        self._values = None
+        self._index = None
+
+        if kind == 'int':
+            self.data = array('q', bytes(8 * size))
+        elif kind == 'float':
+            self.data = array('d', bytes(8 * size))
+        elif kind == 'date':
+            self.data = array('i', bytes(4 * size))
+            self._layouts = bytearray(size)
+        elif kind == 'category':
+            self.data = array('I', bytes(4 * size))
+            self._values = []
+            self._index = {}
+        else:
+            self.data = [None] * size
+
+    def _append_filler(self) -> None:
+        kind = self.kind
+        if kind is None:
+            return
+        if kind == 'object':
+            self.data.append(None)
+            return
+
+        self.data.append(0)
+        if self._int_rows is not None:
+            self._int_rows.append(0)
+        if self._layouts is not None:
+            self._layouts.append(0)
+
+    def _encode(self, value: Any) -> bool:
+        """Append value to storage; return False if it does not fit this kind"""
+        kind = self.kind
+        value_type = type(value)
+
+        if kind == 'int':
+            if value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+                self.data.append(value)
+                return True
+            return False
+
+        if kind == 'float':
+            if value_type is float:
+                self.data.append(value)
+                if self._int_rows is not None:
+                    self._int_rows.append(0)
+                return True
+            if value_type is int and -_FLOAT_EXACT_INT <= value <= _FLOAT_EXACT_INT:
+                if self._int_rows is None:
+                    self._int_rows = bytearray(len(self.data))
+                self.data.append(value)
+                self._int_rows.append(1)
+                return True
+            return False
+
+        if kind == 'date':
+            parsed = parse_date(value)
+            if parsed is None:
+                return False
+            self.data.append(parsed[0])
+            self._layouts.append(parsed[1])
+            return True
+
+        if kind == 'category':
+            if value_type not in _SCALAR_TYPES:
+                return False
+            key = (value_type, value)
+            code = self._index.get(key)
+            if code is None:
+                code = self._index[key] = len(self._values)
+                self._values.append(value)
+            self.data.append(code)
+            return True
+
+        self.data.append(value)
+        return True
+
+    def _decode(self, row: int) -> Any:
+        kind = self.kind
+
+        if kind == 'float':
+            value = self.data[row]
+            if self._int_rows is not None and self._int_rows[row]:
+                return int(value)
+            return value
+        if kind == 'date':
+            return format_ordinal(self.data[row], self._layouts[row])
+        if kind == 'category':
+            return self._values[self.data[row]]
+        return self.data[row]
+
+    def _widen(self, value: Any) -> None:
+        """Re-encode existing rows into a kind that also fits value"""
+        if self.kind == 'int' and type(value) is float:
+            target = 'float'
+        elif self.kind != 'object' and type(value) in _SCALAR_TYPES:
+            target = 'category'
+        else:
+            target = 'object'
+
+        self._convert(target)
+
+    def _convert(self, target: str) -> None:
+        """Re-encode existing rows as the target kind"""
+        existing = self.decode()
+        mask = self.mask
+        self._reset_kind(target)
+        self.data = self.data[:0]
+
+        for row, current in enumerate(existing):
+            if mask[row] == PRESENT:
+                self._encode(current)
+            else:
+                self._append_filler()
+
+
+class ColumnarStore:
+    """Column-oriented collection of records with a list-of-dicts facade"""
+
+    def __init__(self, records: Optional[Iterable[Dict[str, Any]]] = None):
+        self._columns: Dict[str, Column] = {}
+        self._size = 0
+
+        if records is not None:
+            self.extend(records)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_records()
+
+    @property
+    def columns(self) -> List[str]:
+        """Column names in first-seen order"""
+        return list(self._columns)
+
+    def column(self, name: str) -> Optional[Column]:
+        """Return a column by name"""
+        return self._columns.get(name)
+
+    def schema(self) -> Dict[str, Optional[str]]:
+        """Map each column to its storage kind"""
+        return {name: column.kind for name, column in self._columns.items()}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append a single record"""
+        columns = self._columns
+        size = self._size
+
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = Column(size)
+            column.append(value)
+
+        self._size = size + 1
+
+        if len(record) != len(columns):
+            for column in columns.values():
+                if len(column) == size:
+                    column.append_missing()
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append many records"""
+        for record in records:
+            self.append(record)
+
+    def replace(self, row: int, record: Dict[str, Any]) -> None:
+        """Overwrite the record at row in place"""
+        row = self._row_index(row)
+        columns = self._columns
+
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = Column(self._size)
+            column.set(row, value)
+
+        if len(record) != len(columns):
+            for key, column in columns.items():
+                if key not in record:
+                    column.set_missing(row)
+
+    def delete(self, row: int) -> None:
+        """Remove the record at row; later rows move up by one"""
+        row = self._row_index(row)
+        for column in self._columns.values():
+            column.delete(row)
+        self._size -= 1
+
+    def _row_index(self, row: int) -> int:
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError('Índice fora do intervalo')
+        return row
+
+    def clear(self) -> None:
+        """Drop every record"""
+        self._columns = {}
+        self._size = 0
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Rebuild a single record as a dict"""
+        row = self._row_index(row)
+
+        return {
+            name: column.value(row)
+            for name, column in self._columns.items()
+            if column.mask[row] != MISSING
+        }
+
+    def iter_records(self, start: int = 0, stop: Optional[int] = None,
+                     fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records as dicts, decoding the columns block by block
+
+        When fields is given only those columns are decoded (projection).
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        names = list(self._columns) if fields is None else [name for name in fields if name in self._columns]
+        columns = [self._columns[name] for name in names]
+
+        for block_start in range(start, stop, ITER_BLOCK_SIZE):
+            block_stop = min(block_start + ITER_BLOCK_SIZE, stop)
+            decoded = [column.decode(block_start, block_stop) for column in columns]
+            masks = [column.mask for column in columns]
+
+            for offset in range(block_stop - block_start):
+                row = block_start + offset
+                yield {
+                    name: values[offset]
+                    for name, values, mask in zip(names, decoded, masks)
+                    if mask[row] != MISSING
+                }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize every record as a list of dicts"""
+        return list(self.iter_records())
+
+    def first_numeric(self, keys: Iterable[str]) -> array:
+        """
+        Collect, per row, the first value among keys that converts to float
+
+        Uses the column buffer directly when a single complete numeric column
+        answers for every row.
+        """
+        present = [self._columns[key] for key in keys if key in self._columns]
+
+        if not present:
+            return array('d')
+
+        if len(present) == 1:
+            values = present[0].floats()
+            if values is not None:
+                return values
+
+        values = array('d')
+        for row in range(self._size):
+            for column in present:
+                if column.mask[row] != PRESENT:
+                    continue
+                try:
+                    values.append(float(column._decode(row)))
+                    break
+                except (ValueError, TypeError):
+                    continue
+
+        return values
+
+    def iter_first_present(self, keys: Iterable[str], default: Any = None) -> Iterator[Any]:
+        """Yield, per row, the value of the first key present in the record"""
+        present = [self._columns[key] for key in keys if key in self._columns]
+
+        for row in range(self._size):
+            for column in present:
+                if column.mask[row] != MISSING:
+                    yield column.value(row)
+                    break
+            else:
+                yield default
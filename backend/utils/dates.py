@@ -0,0 +1,54 @@
+"""
+Date helpers shared by storage and analytics
+"""
+import re
+from datetime import date
+from typing import Any, Optional, Tuple
+
+# Same layouts accepted by Validator.is_valid_date
+ISO_DATE = 0   # YYYY-MM-DD
+BR_DATE = 1    # DD/MM/YYYY
+
+# Record keys holding a record's date, in lookup order
+DEFAULT_DATE_KEYS = ['data', 'dataAtendimento', 'date', 'dataProcessamento']
+
+_ISO_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})')
+_BR_PATTERN = re.compile(r'([0-9]{2})/([0-9]{2})/([0-9]{4})')
+
+
+def parse_date(value: Any) -> Optional[Tuple[int, int]]:
+    """Return (ordinal, layout) for a date string, or None if it is not a date"""
+    if type(value) is not str or len(value) != 10:
+        return None
+
+    match = _ISO_PATTERN.fullmatch(value)
+    if match:
+        year, month, day = match.groups()
+        layout = ISO_DATE
+    else:
+        match = _BR_PATTERN.fullmatch(value)
+        if not match:
+            return None
+        day, month, year = match.groups()
+        layout = BR_DATE
+
+    try:
+        return date(int(year), int(month), int(day)).toordinal(), layout
+    except ValueError:
+        return None
+
+
+def to_ordinal(value: Any) -> Optional[int]:
+    """Return the day ordinal for a date string, or None"""
+    parsed = parse_date(value)
+    return parsed[0] if parsed else None
+
+
+def format_ordinal(ordinal: int, layout: int = ISO_DATE) -> str:
+    """Render a day ordinal back into its original layout"""
+    day = date.fromordinal(ordinal)
+
+    if layout == BR_DATE:
+        return f"{day.day:02d}/{day.month:02d}/{day.year:04d}"
+
+    return f"{day.year:04d}-{day.month:02d}-{day.day:02d}"
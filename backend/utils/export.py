@@ -0,0 +1,109 @@
+"""
+Streaming export - CSV, JSON Lines and JSON produced in bounded chunks
+"""
+import csv
+import io
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .columnar import ColumnarStore
+from . import serialization
+
+# Output bytes buffered before a chunk is yielded
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'json': 'application/json'
+}
+
+
+def union_header(data: Iterable[Dict[str, Any]]) -> List[str]:
+    """Every key of every record, in first-seen order"""
+    if isinstance(data, ColumnarStore):
+        return data.columns
+
+    header = {}
+    for record in data:
+        for key in record:
+            if key not in header:
+                header[key] = None
+    return list(header)
+
+
+def _records(data: Any, fields: Optional[List[str]], stop: Optional[int]) -> Iterator[Dict[str, Any]]:
+    if isinstance(data, ColumnarStore):
+        return data.iter_records(0, stop, fields)
+    return iter(data if stop is None else data[:stop])
+
+
+def iter_csv(data: Any, fields: Optional[List[str]] = None, stop: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield a CSV export chunk by chunk
+
+    The header is the union of all record keys (or fields); missing values
+    are left empty. stop limits the export to the first stop rows.
+    """
+    header = fields or union_header(data)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=header, restval='', extrasaction='ignore')
+    writer.writeheader()
+
+    for record in _records(data, fields, stop):
+        writer.writerow(record)
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_jsonl(data: Any, fields: Optional[List[str]] = None, stop: Optional[int] = None) -> Iterator[bytes]:
+    """Yield a JSON Lines export chunk by chunk"""
+    parts = []
+    size = 0
+
+    for record in _records(data, fields, stop):
+        line = serialization.dumps(record) + b'\n'
+        parts.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield b''.join(parts)
+            parts = []
+            size = 0
+
+    yield b''.join(parts)
+
+
+def iter_json(data: Any, fields: Optional[List[str]] = None, stop: Optional[int] = None) -> Iterator[bytes]:
+    """Yield a JSON array export chunk by chunk"""
+    separator = b'['
+
+    for chunk in iter_jsonl(data, fields, stop):
+        if chunk:
+            # One record per line inside the array
+            yield separator + chunk.rstrip(b'\n').replace(b'\n', b',\n') + b'\n'
+            separator = b','
+
+    yield b'[]\n' if separator == b'[' else b']\n'
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a chunk stream into gzip format without buffering it"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+EXPORTERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+    'json': iter_json
+}
@@ -0,0 +1,176 @@
+"""
+File I/O helpers - atomic replacement and cross-process locks
+"""
+import os
+import stat
+import tempfile
+import time
+from typing import Iterable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# How long to keep retrying a contended lock or a busy rename (Windows)
+LOCK_TIMEOUT = 30.0
+_RETRY_DELAY = 0.05
+
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it; done once, at import
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+# Mode of new files, as open() would create them
+_NEW_FILE_MODE = 0o666 & ~_read_umask()
+
+
+def _fsync_dir(dirpath: str) -> None:
+    """Persist a rename by syncing its directory (not supported on Windows)"""
+    if fcntl is None:
+        return
+
+    fd = os.open(dirpath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace(source: str, target: str) -> None:
+    """os.replace, retried while Windows reports the target as in use"""
+    deadline = time.monotonic() + LOCK_TIMEOUT
+
+    while True:
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if fcntl is not None or time.monotonic() > deadline:
+                raise
+            time.sleep(_RETRY_DELAY)
+
+
+def atomic_write(filepath: str, data: bytes) -> None:
+    """
+    Write data to filepath so readers see either the old or the new content
+
+    The bytes go to a temporary file in the same directory, are fsynced and
+    then renamed over the target.
+    """
+    atomic_write_chunks(filepath, (data,))
+
+
+def _target_mode(filepath: str) -> int:
+    """Permissions of the file being replaced, or the umask default for a new one"""
+    try:
+        return stat.S_IMODE(os.stat(filepath).st_mode)
+    except FileNotFoundError:
+        return _NEW_FILE_MODE
+
+
+def atomic_write_chunks(filepath: str, chunks: Iterable[bytes]) -> None:
+    """atomic_write for content produced incrementally"""
+    dirpath = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix='.tmp', dir=dirpath)
+
+    try:
+        # mkstemp creates the file 0600; keep the permissions a plain write would give
+        os.chmod(temp_path, _target_mode(filepath))
+
+        with os.fdopen(fd, 'wb') as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        _replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    _fsync_dir(dirpath)
+
+
+def commit_file(temp_path: str, filepath: str) -> None:
+    """Atomically move an already written and fsynced file into place"""
+    _replace(temp_path, filepath)
+    _fsync_dir(os.path.dirname(os.path.abspath(filepath)))
+
+
+class FileLock:
+    """Exclusive advisory lock shared between processes, held on a lock file"""
+
+    def __init__(self, path: str, timeout: float = LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._handle = None
+
+    def acquire(self) -> None:
+        """Block until the lock is held (TimeoutError after timeout seconds)"""
+        handle = open(self.path, 'a+b')
+
+        try:
+            if fcntl is not None:
+                self._acquire_posix(handle)
+            else:
+                self._acquire_windows(handle)
+        except BaseException:
+            handle.close()
+            raise
+
+        self._handle = handle
+
+    def _acquire_posix(self, handle) -> None:
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Não foi possível obter o lock: {self.path}")
+                time.sleep(_RETRY_DELAY)
+
+    def _acquire_windows(self, handle) -> None:
+        deadline = time.monotonic() + self.timeout
+        handle.seek(0)
+
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Não foi possível obter o lock: {self.path}")
+                time.sleep(_RETRY_DELAY)
+
+    def release(self) -> None:
+        """Release the lock"""
+        handle = self._handle
+        if handle is None:
+            return
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
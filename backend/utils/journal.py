@@ -0,0 +1,141 @@
+"""
+State journal - append-only log of state deltas between snapshots
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .fileio import atomic_write
+from . import serialization
+
+# Bytes read from the end of the journal to find the last entry
+_TAIL_BYTES = 64 * 1024
+
+
+def apply_delta(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply one delta to a state dict in place
+
+    A delta may carry 'set' (top-level keys to overwrite) and, for a list
+    'collection', records 'added', 'updated' (matched by id, replacing the
+    whole record) and 'removed' (ids).
+    """
+    for key, value in (delta.get('set') or {}).items():
+        state[key] = value
+
+    collection = delta.get('collection')
+    if not collection:
+        return state
+
+    records = state.get(collection)
+    if not isinstance(records, list):
+        records = []
+
+    removed = set(delta.get('removed') or [])
+    updated = {record['id']: record for record in delta.get('updated') or []}
+
+    if removed or updated:
+        kept = []
+        for record in records:
+            record_id = record.get('id') if isinstance(record, dict) else None
+            if record_id in removed:
+                continue
+            if record_id in updated:
+                record = updated.pop(record_id)
+            kept.append(record)
+        # Updates for unknown ids behave as additions
+        kept.extend(updated.values())
+        records = kept
+
+    records.extend(delta.get('added') or [])
+    state[collection] = records
+    return state
+
+
+class StateJournal:
+    """
+    JSON Lines journal of state deltas
+
+    The first line is a header {"base": seq} naming the snapshot sequence the
+    journal continues from; every other line is a delta with its own "seq".
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+
+    def exists(self) -> bool:
+        """True when a journal file is present"""
+        return os.path.exists(self.filepath)
+
+    def reset(self, base: int) -> None:
+        """Start an empty journal continuing from snapshot sequence base"""
+        atomic_write(self.filepath, serialization.dumps({'base': base}) + b'\n')
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Durably append an entry (caller must hold the state lock)"""
+        if not self.exists():
+            self.reset(0)
+
+        with open(self.filepath, 'ab') as handle:
+            handle.write(serialization.dumps(entry) + b'\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def bounds(self) -> Optional[Tuple[int, int]]:
+        """
+        Return (base, last seq) reading only the first and last lines
+
+        Caller must hold the state lock. A torn trailing line left behind by
+        a crash during append is truncated away first.
+        """
+        try:
+            handle = open(self.filepath, 'r+b')
+        except FileNotFoundError:
+            return None
+
+        with handle:
+            base = serialization.loads(handle.readline())['base']
+            size = handle.seek(0, os.SEEK_END)
+            chunk_size = _TAIL_BYTES
+
+            while True:
+                start = max(0, size - chunk_size)
+                handle.seek(start)
+                tail = handle.read()
+                if tail.count(b'\n') > 1 or start == 0:
+                    break
+                chunk_size *= 2
+
+            if not tail.endswith(b'\n'):
+                cut = tail.rfind(b'\n') + 1
+                handle.truncate(start + cut)
+                tail = tail[:cut]
+
+        last_line = tail.rstrip(b'\n').rsplit(b'\n', 1)[-1]
+        return base, serialization.loads(last_line).get('seq', base)
+
+    def read(self) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """
+        Return (base, entries)
+
+        A torn last line (an append still in progress) is ignored.
+        """
+        try:
+            with open(self.filepath, 'rb') as handle:
+                lines = handle.read().split(b'\n')
+        except FileNotFoundError:
+            return None, []
+
+        base = serialization.loads(lines[0])['base']
+        entries = []
+
+        for index, line in enumerate(lines[1:], start=1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(serialization.loads(line))
+            except ValueError:
+                if index < len(lines) - 1:
+                    raise
+                break
+
+        return base, entries
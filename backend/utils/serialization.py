@@ -0,0 +1,60 @@
+"""
+JSON serialization - fast encoder when available, stdlib json otherwise
+"""
+import json
+from array import array
+from typing import Any
+
+from .columnar import ColumnarStore
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _default(obj: Any) -> Any:
+    """Encode the container types used across the backend"""
+    if isinstance(obj, ColumnarStore):
+        return obj.to_records()
+    if isinstance(obj, (array, set, tuple)):
+        return list(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def _stdlib_dumps(obj: Any, pretty: bool) -> bytes:
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, default=_default)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default)
+    return text.encode('utf-8')
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Encode obj as UTF-8 JSON (compact unless pretty is set)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder accepts
+            pass
+
+    return _stdlib_dumps(obj, pretty)
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_file(filepath: str) -> Any:
+    """Read a JSON document from filepath"""
+    with open(filepath, 'rb') as handle:
+        return loads(handle.read())
@@ -0,0 +1,162 @@
+"""
+Session catalog - SQLite index of saved analysis sessions
+"""
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    format TEXT,
+    financeiro INTEGER,
+    organizacional INTEGER,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# <name>_YYYYmmdd_HHMMSS.json[l], as written by DataStore
+_FILENAME_TIMESTAMP = re.compile(r'_(\d{8}_\d{6})\.jsonl?$')
+
+
+def timestamp_from_filename(filename: str) -> Optional[str]:
+    """ISO timestamp encoded in a session filename, if any"""
+    match = _FILENAME_TIMESTAMP.search(filename)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').isoformat()
+
+
+class SessionIndex:
+    """Catalog of sessions: id, timestamp, format, row counts and byte size"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def register(self, session_id: str, created_at: str, session_format: Optional[str] = None,
+                 counts: Optional[Dict[str, int]] = None, size: Optional[int] = None) -> None:
+        """Add or replace a catalog entry"""
+        counts = counts or {}
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (id, created_at, format, financeiro, organizacional, bytes) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (session_id, created_at, session_format, counts.get('financeiro'), counts.get('organizacional'), size)
+            )
+
+    def remove(self, session_ids: Iterable[str]) -> None:
+        """Drop catalog entries"""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('DELETE FROM sessions WHERE id = ?', [(session_id,) for session_id in session_ids])
+
+    @staticmethod
+    def _bound(value: str) -> Tuple[str, bool]:
+        """
+        A filter bound as stored in created_at, and whether it was a bare date
+
+        Any ISO form (space or 'T' separator, with or without seconds) is
+        normalized; aware timestamps are converted to local time, as
+        created_at is.
+        """
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is not None:
+            moment = moment.astimezone().replace(tzinfo=None)
+
+        try:
+            date.fromisoformat(value)
+            bare_date = True
+        except ValueError:
+            bare_date = False
+
+        return moment.isoformat(), bare_date
+
+    def _where(self, date_from: Optional[str], date_to: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses = []
+        params = []
+
+        if date_from:
+            clauses.append('created_at >= ?')
+            params.append(self._bound(date_from)[0])
+        if date_to:
+            bound, bare_date = self._bound(date_to)
+            if bare_date:
+                # A bare date includes the whole day
+                clauses.append('created_at < ?')
+                params.append((datetime.fromisoformat(bound) + timedelta(days=1)).isoformat())
+            else:
+                clauses.append('created_at <= ?')
+                params.append(bound)
+
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, limit: Optional[int] = None, offset: int = 0,
+              date_from: Optional[str] = None, date_to: Optional[str] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total matches, page of entries) ordered by id"""
+        where, params = self._where(date_from, date_to)
+
+        with closing(self._connect()) as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM sessions{where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT * FROM sessions{where} ORDER BY id LIMIT ? OFFSET ?',
+                params + [-1 if limit is None else limit, offset]
+            ).fetchall()
+
+        return total, [dict(row) for row in rows]
+
+    def older_than(self, created_before: str) -> List[str]:
+        """Ids of sessions created before a timestamp"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT id FROM sessions WHERE created_at < ?', (created_before,)).fetchall()
+        return [row['id'] for row in rows]
+
+    def beyond_newest(self, keep: int) -> List[str]:
+        """Ids of every session except the newest keep ones"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT id FROM sessions ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?', (keep,)
+            ).fetchall()
+        return [row['id'] for row in rows]
+
+    def is_bootstrapped(self) -> bool:
+        """True once existing session files were imported"""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'bootstrapped'").fetchone() is not None
+
+    def bootstrap(self, directory: str, filenames: Iterable[str]) -> None:
+        """Import session files that predate the catalog (one directory scan)"""
+        entries = []
+
+        for filename in filenames:
+            created_at = timestamp_from_filename(filename)
+            if created_at is None:
+                continue
+            size = os.path.getsize(os.path.join(directory, filename))
+            entries.append((filename, created_at, None, None, None, size))
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO sessions (id, created_at, format, financeiro, organizacional, bytes) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                entries
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bootstrapped', ?)",
+                         (datetime.now().isoformat(),))
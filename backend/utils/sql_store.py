@@ -0,0 +1,229 @@
+"""
+SQLite record storage - indexed tables for filtered queries on the server
+"""
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .classifier import RecordClassifier
+from .dates import DEFAULT_DATE_KEYS, ISO_DATE, format_ordinal, to_ordinal
+from . import serialization
+
+TABLES = ('financeiro', 'organizacional')
+
+# Columns extracted from each record; the full record is kept as JSON.
+# record_id has no type affinity so ids compare as they do in the state
+# (1 and '1' stay distinct).
+_TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    row_id INTEGER PRIMARY KEY,
+    record_id,
+    data TEXT,
+    categoria TEXT,
+    valor REAL,
+    payload TEXT NOT NULL
+);
+"""
+
+_INDEX_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_{table}_record_id ON {table} (record_id);
+CREATE INDEX IF NOT EXISTS idx_{table}_data ON {table} (data);
+CREATE INDEX IF NOT EXISTS idx_{table}_categoria ON {table} (categoria);
+CREATE INDEX IF NOT EXISTS idx_{table}_valor ON {table} (valor);
+"""
+
+_COLUMNS = 'record_id, data, categoria, valor, payload'
+_INSERT = 'INSERT INTO {table} (' + _COLUMNS + ') VALUES (?, ?, ?, ?, ?)'
+_ASSIGN = ', '.join(f'{column} = ?' for column in _COLUMNS.split(', '))
+
+MISSING_CATEGORY = 'Sem categoria'
+
+# Bound parameters per statement (SQLite's historical default limit)
+_MAX_PARAMS = 999
+
+
+class SQLiteRecordStore:
+    """
+    Financeiro/organizacional records in SQLite
+
+    Each row keeps its normalized date (YYYY-MM-DD), category and numeric
+    value in indexed columns so range and category filters run in SQL.
+    """
+
+    def __init__(self, db_path: str, classifier: RecordClassifier,
+                 date_keys: Sequence[str] = DEFAULT_DATE_KEYS):
+        self.db_path = db_path
+        self.classifier = classifier
+        self.date_keys = list(date_keys)
+
+        with closing(self._connect()) as conn:
+            for table in TABLES:
+                conn.executescript(_TABLE_SCHEMA.format(table=table))
+                self._migrate(conn, table)
+                conn.executescript(_INDEX_SCHEMA.format(table=table))
+
+    def _migrate(self, conn: sqlite3.Connection, table: str) -> None:
+        """Rebuild tables written before record_id existed from their payloads"""
+        columns = {name for _, name, *_ in conn.execute(f'PRAGMA table_info({table})')}
+        if 'record_id' in columns:
+            return
+
+        with conn:
+            records = [serialization.loads(payload)
+                       for (payload,) in conn.execute(f'SELECT payload FROM {table} ORDER BY row_id')]
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN record_id')
+            conn.execute(f'DELETE FROM {table}')
+            conn.executemany(_INSERT.format(table=table), map(self._row, records))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @staticmethod
+    def _table(data_type: str) -> str:
+        if data_type not in TABLES:
+            raise ValueError(f"Tipo inválido: {data_type}")
+        return data_type
+
+    @staticmethod
+    def _record_id(record: Dict[str, Any]) -> Any:
+        """The record's id as stored in record_id (None when it cannot be matched)"""
+        record_id = record.get('id')
+        return record_id if isinstance(record_id, (str, int, float)) else None
+
+    def _row(self, record: Dict[str, Any]) -> Tuple[Any, Optional[str], str, Optional[float], str]:
+        """Extract the indexed columns of a record"""
+        date = None
+        for key in self.date_keys:
+            ordinal = to_ordinal(record.get(key))
+            if ordinal is not None:
+                date = format_ordinal(ordinal, ISO_DATE)
+                break
+
+        shape = self.classifier.shape(record)
+        category = record[shape.category_key] if shape.category_key is not None else None
+        # Same label the analytics use for null, empty or absent categories
+        category = MISSING_CATEGORY if category is None or category == '' else str(category)
+
+        return (self._record_id(record), date, category, self.classifier.value(record),
+                serialization.dumps(record).decode('utf-8'))
+
+    def replace(self, data_type: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Swap every record of a type in one transaction"""
+        table = self._table(data_type)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f'DELETE FROM {table}')
+            conn.executemany(_INSERT.format(table=table), (self._row(record) for record in records))
+
+    def apply_delta(self, data_type: str, delta: Dict[str, Any]) -> None:
+        """
+        Write the record changes of a state delta in one transaction
+
+        Same semantics as utils.journal.apply_delta: an updated id replaces
+        its first row, removed ids drop every row, and updates for unknown
+        (or removed) ids are inserted before the added records. Only the
+        rows the delta touches are written.
+        """
+        table = self._table(data_type)
+        removed = [record_id for record_id in set(delta.get('removed') or [])
+                   if isinstance(record_id, (str, int, float))]
+        removed_ids = set(removed)
+        inserted = []
+
+        with closing(self._connect()) as conn, conn:
+            for start in range(0, len(removed), _MAX_PARAMS):
+                batch = removed[start:start + _MAX_PARAMS]
+                conn.execute(f"DELETE FROM {table} WHERE record_id IN ({', '.join('?' * len(batch))})", batch)
+
+            updated = {record['id']: record for record in delta.get('updated') or []}
+            for record_id, record in updated.items():
+                row = None
+                if record_id not in removed_ids and self._record_id(record) is not None:
+                    row = conn.execute(f'SELECT MIN(row_id) FROM {table} WHERE record_id = ?',
+                                       (record_id,)).fetchone()[0]
+                if row is None:
+                    inserted.append(record)
+                else:
+                    conn.execute(
+                        f'UPDATE {table} SET {_ASSIGN} WHERE row_id = ?',
+                        (*self._row(record), row)
+                    )
+
+            inserted.extend(delta.get('added') or [])
+            conn.executemany(_INSERT.format(table=table), map(self._row, inserted))
+
+    def _where(self, date_from: Optional[str], date_to: Optional[str], categories: Optional[List[str]],
+               min_value: Optional[float], max_value: Optional[float]) -> Tuple[str, List[Any]]:
+        clauses = []
+        params: List[Any] = []
+
+        for bound, operator in ((date_from, '>='), (date_to, '<=')):
+            if bound is not None:
+                ordinal = to_ordinal(bound)
+                if ordinal is None:
+                    raise ValueError(f"Data inválida: {bound}")
+                clauses.append(f'data {operator} ?')
+                params.append(format_ordinal(ordinal, ISO_DATE))
+
+        if categories:
+            clauses.append(f"categoria IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+
+        if min_value is not None:
+            clauses.append('valor >= ?')
+            params.append(min_value)
+        if max_value is not None:
+            clauses.append('valor <= ?')
+            params.append(max_value)
+
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, data_type: str, date_from: Optional[str] = None, date_to: Optional[str] = None,
+              categories: Optional[List[str]] = None, min_value: Optional[float] = None,
+              max_value: Optional[float] = None, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """
+        Filtered summary, per-category breakdown and (optionally) rows
+
+        Rows are only fetched when limit is given.
+        """
+        table = self._table(data_type)
+        where, params = self._where(date_from, date_to, categories, min_value, max_value)
+
+        with closing(self._connect()) as conn:
+            count, values, total, minimum, maximum, squares = conn.execute(
+                f'SELECT COUNT(*), COUNT(valor), SUM(valor), MIN(valor), MAX(valor), SUM(valor * valor) '
+                f'FROM {table}{where}', params
+            ).fetchone()
+
+            by_category = {
+                (category if category is not None else MISSING_CATEGORY): {'count': rows, 'total': amount or 0}
+                for category, rows, amount in conn.execute(
+                    f'SELECT categoria, COUNT(*), SUM(valor) FROM {table}{where} GROUP BY categoria', params
+                )
+            }
+
+            items = []
+            if limit is not None:
+                items = [
+                    serialization.loads(payload)
+                    for (payload,) in conn.execute(
+                        f'SELECT payload FROM {table}{where} ORDER BY row_id LIMIT ? OFFSET ?',
+                        params + [limit, offset]
+                    )
+                ]
+
+        summary = {'count': count, 'total': total or 0}
+        if values:
+            mean = total / values
+            variance = (squares - total * mean) / (values - 1) if values > 1 else 0
+            summary.update({
+                'average': mean,
+                'min': minimum,
+                'max': maximum,
+                'stdev': max(variance, 0) ** 0.5
+            })
+
+        return {'summary': summary, 'by_category': by_category, 'items': items}
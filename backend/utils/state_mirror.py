@@ -0,0 +1,103 @@
+"""
+State mirror - keeps in-memory datasets in step with the state journal
+
+app_data holds the state collections after GET/POST /api/state, until a
+parse replaces them. While it does, each journaled delta is applied to the
+store and its running analytics directly, as utils.journal.apply_delta
+applies it to the state, instead of replaying the whole journal.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from .columnar import ColumnarStore
+
+
+class StateMirror:
+    """Which state collections app_data mirrors, and as of which journal sequence"""
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        # collection -> {record id: rows}, built on first use
+        self._indexes: Dict[str, Optional[Dict[Any, List[int]]]] = {}
+
+    def reset(self, seq: Optional[int], collections: Iterable[str]) -> None:
+        """app_data now holds these collections of the state at seq"""
+        self.seq = seq
+        self._indexes = {collection: None for collection in collections}
+
+    def add(self, collection: str) -> None:
+        """app_data now also holds this collection, as of seq"""
+        self._indexes[collection] = None
+
+    def invalidate(self) -> None:
+        """app_data may be behind the state (e.g. another process wrote to it)"""
+        self.seq = None
+        self._indexes = {}
+
+    def forget(self, collection: str) -> None:
+        """app_data no longer holds this collection (e.g. replaced by a parse)"""
+        self._indexes.pop(collection, None)
+
+    def mirrors(self, collection: str) -> bool:
+        return self.seq is not None and collection in self._indexes
+
+    def is_current(self, seq: int, collections: Iterable[str]) -> bool:
+        """True when app_data already holds these collections as of seq"""
+        return self.seq == seq and all(collection in self._indexes for collection in collections)
+
+    def follows(self, seq: int, collections: Iterable[str]) -> bool:
+        """True when the delta numbered seq can be applied on top of app_data"""
+        return self.seq is not None and seq == self.seq + 1 and all(self.mirrors(c) for c in collections)
+
+    def _index(self, collection: str, store: ColumnarStore) -> Dict[Any, List[int]]:
+        index = self._indexes.get(collection)
+        if index is not None:
+            return index
+
+        index = {}
+        column = store.column('id')
+        if column is not None:
+            for row, record_id in enumerate(column.decode()):
+                try:
+                    index.setdefault(record_id, []).append(row)
+                except TypeError:
+                    continue
+
+        self._indexes[collection] = index
+        return index
+
+    def apply(self, collection: str, store: ColumnarStore, analytics, delta: Dict[str, Any]) -> None:
+        """
+        Apply the record changes of a delta to a store and its analytics
+
+        Same semantics as apply_delta: an updated id replaces its first
+        record, removed ids drop every record, and updates for unknown (or
+        removed) ids are appended before the added records.
+        """
+        removed = set(delta.get('removed') or [])
+        updated = {record['id']: record for record in delta.get('updated') or []}
+        index = self._index(collection, store)
+
+        for record_id in list(updated):
+            rows = index.get(record_id)
+            if rows and record_id not in removed:
+                record = updated.pop(record_id)
+                analytics.remove(store.record(rows[0]))
+                store.replace(rows[0], record)
+                analytics.add(record)
+
+        deleted = sorted((row for record_id in removed for row in index.get(record_id, ())), reverse=True)
+        for row in deleted:
+            analytics.remove(store.record(row))
+            store.delete(row)
+        if deleted:
+            # Rows moved up; the index is rebuilt when next needed
+            self._indexes[collection] = index = None
+
+        for record in [*updated.values(), *(delta.get('added') or [])]:
+            if index is not None:
+                try:
+                    index.setdefault(record.get('id'), []).append(len(store))
+                except TypeError:
+                    pass
+            store.append(record)
+            analytics.add(record)
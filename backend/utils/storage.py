@@ -1,35 +1,159 @@
 """
 Database/Storage utilities for persistence
 """
-import json
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .columnar import ColumnarStore
+from .export import iter_csv
+from .fileio import FileLock, atomic_write, atomic_write_chunks, commit_file
+from .journal import StateJournal, apply_delta
+from .session_index import SessionIndex
+from . import serialization
+
+class SessionWriter:
+    """
+    Incrementally write a session as JSON Lines
+
+    Items go to a hidden temporary file that only replaces filepath once the
+    session completes, so other workers never list a partial session.
+    """
+
+    def __init__(self, filepath: str, metadata: Dict[str, Any],
+                 on_commit: Optional[Callable[['SessionWriter'], None]] = None):
+        self.filepath = filepath
+        self.metadata = metadata
+        self.count = {'financeiro': 0, 'organizacional': 0}
+        self._on_commit = on_commit
+        directory, filename = os.path.split(filepath)
+        self._temp_path = os.path.join(directory, f".{filename}.{os.getpid()}.tmp")
+        self._handle = open(self._temp_path, 'wb')
+        self._write_line({'meta': metadata})
+
+    def _write_line(self, entry: Dict[str, Any]) -> None:
+        self._handle.write(serialization.dumps(entry))
+        self._handle.write(b'\n')
+
+    def write(self, category: str, item: Dict[str, Any]) -> None:
+        """Append a parsed item to the session"""
+        self._write_line({'tipo': category, 'item': item})
+        self.count[category] = self.count.get(category, 0) + 1
+
+    def close(self) -> None:
+        """Flush the session to disk and move it into place"""
+        if self._handle.closed:
+            return
+
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        commit_file(self._temp_path, self.filepath)
+
+        if self._on_commit is not None:
+            self._on_commit(self)
+
+    def discard(self) -> None:
+        """Drop an unfinished session"""
+        if not self._handle.closed:
+            self._handle.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
 
 class DataStore:
-    """Simple file-based data storage"""
+    """
+    Simple file-based data storage
+
+    Files are replaced atomically (temporary file, fsync, rename), and state
+    writers serialize on a lock file so several worker processes can share
+    the same storage directory. Readers never take the lock.
+
+    Application state is a snapshot (app_state.json) plus a journal of
+    deltas appended since; the journal is folded into a new snapshot in a
+    background thread once it grows past the compaction thresholds.
+    """
+
+    # Journal size that triggers a background compaction
+    COMPACT_ENTRIES = 500
+    COMPACT_BYTES = 8 * 1024 * 1024
+
+    # Lock-free read retries before falling back to the writers' lock
+    LOAD_ATTEMPTS = 5
+
+    # Snapshot key recording the last journal sequence it includes
+    _SEQ_KEY = '_journal_seq'
 
     def __init__(self, storage_dir: str = 'data/output'):
         self.storage_dir = storage_dir
         self._state_filename = 'app_state.json'
+        self._journal = StateJournal(os.path.join(storage_dir, 'app_state.journal'))
+        self._compacting = threading.Lock()
         self._ensure_dir()
 
+        self._sessions = SessionIndex(os.path.join(storage_dir, 'sessions.sqlite3'))
+        if not self._sessions.is_bootstrapped():
+            self._sessions.bootstrap(storage_dir, self._session_files())
+
     def _ensure_dir(self):
         """Ensure storage directory exists"""
-        if not os.path.exists(self.storage_dir):
-            os.makedirs(self.storage_dir)
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+    def _session_files(self) -> List[str]:
+        """Scan the storage directory for session files"""
+        return sorted([
+            filename for filename in os.listdir(self.storage_dir)
+            if filename.endswith(('.json', '.jsonl')) and filename != self._state_filename
+        ])
 
     def save_session(self, session_name: str, data: Dict[str, Any]) -> str:
         """Save analysis session"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{session_name}_{timestamp}.json"
         filepath = os.path.join(self.storage_dir, filename)
+        payload = serialization.dumps(data)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        atomic_write(filepath, payload)
+
+        parsed = data.get('data') or {}
+        self._sessions.register(
+            filename,
+            data.get('timestamp') or datetime.now().isoformat(),
+            data.get('format'),
+            {key: len(value) for key, value in parsed.items() if isinstance(value, list)},
+            len(payload)
+        )
 
         return filepath
 
+    def open_session_stream(self, session_name: str, metadata: Dict[str, Any]) -> SessionWriter:
+        """Open a session file that receives items as they are parsed"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"{session_name}_{timestamp}.jsonl"
+        filepath = os.path.join(self.storage_dir, filename)
+
+        return SessionWriter(filepath, metadata, on_commit=self._register_stream)
+
+    def _register_stream(self, writer: SessionWriter) -> None:
+        self._sessions.register(
+            os.path.basename(writer.filepath),
+            writer.metadata.get('timestamp') or datetime.now().isoformat(),
+            writer.metadata.get('format'),
+            writer.count,
+            os.path.getsize(writer.filepath)
+        )
+
     def load_session(self, filename: str) -> Dict[str, Any]:
         """Load analysis session"""
         filepath = os.path.join(self.storage_dir, filename)
@@ -37,22 +161,42 @@ class DataStore:
         if not os.path.exists(filepath):
             return None
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        if filename.endswith('.jsonl'):
+            return self._load_session_stream(filepath)
+
+        return serialization.read_file(filepath)
+
+    def _load_session_stream(self, filepath: str) -> Dict[str, Any]:
+        """Rebuild a session written by SessionWriter"""
+        session = {'data': {'financeiro': [], 'organizacional': []}}
+
+        with open(filepath, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                entry = serialization.loads(line)
+                if 'meta' in entry:
+                    session.update(entry['meta'])
+                else:
+                    session['data'].setdefault(entry['tipo'], []).append(entry['item'])
+
+        return session
 
     def list_sessions(self) -> List[str]:
         """List all saved sessions"""
-        if not os.path.exists(self.storage_dir):
-            return []
+        return [entry['id'] for entry in self._sessions.query()[1]]
 
-        return sorted([
-            filename for filename in os.listdir(self.storage_dir)
-            if filename.endswith('.json') and filename != self._state_filename
-        ])
+    def query_sessions(self, limit: Optional[int] = None, offset: int = 0,
+                       date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, Any]:
+        """Page through the session catalog, optionally within a date range"""
+        total, entries = self._sessions.query(limit, offset, date_from, date_to)
+        return {'total': total, 'sessions': entries}
 
     def delete_session(self, filename: str) -> bool:
         """Delete a session"""
         filepath = os.path.join(self.storage_dir, filename)
+        self._sessions.remove([filename])
 
         if os.path.exists(filepath):
             os.remove(filepath)
@@ -60,20 +204,31 @@ class DataStore:
 
         return False
 
+    def prune_sessions(self, older_than_days: Optional[int] = None, keep_last: Optional[int] = None) -> List[str]:
+        """Delete sessions past the retention window and/or beyond the newest keep_last"""
+        doomed = set()
+
+        if older_than_days is not None:
+            cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+            doomed.update(self._sessions.older_than(cutoff))
+        if keep_last is not None:
+            doomed.update(self._sessions.beyond_newest(keep_last))
+
+        for filename in doomed:
+            filepath = os.path.join(self.storage_dir, filename)
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+        self._sessions.remove(doomed)
+        return sorted(doomed)
+
     def export_csv(self, data: List[Dict], filename: str) -> str:
         """Export data to CSV"""
         if not data:
             return None
 
-        import csv
-
         filepath = os.path.join(self.storage_dir, filename)
-
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            headers = data[0].keys()
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(data)
+        atomic_write_chunks(filepath, iter_csv(data))
 
         return filepath
 
@@ -81,8 +236,8 @@ class DataStore:
         """Export data to JSON"""
         filepath = os.path.join(self.storage_dir, filename)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Exports are meant to be read by people, so keep them indented
+        atomic_write(filepath, serialization.dumps(data, pretty=True))
 
         return filepath
 
@@ -90,31 +245,134 @@ class DataStore:
         """Return absolute path for state persistence file"""
         return os.path.join(self.storage_dir, self._state_filename)
 
+    def _state_lock(self) -> FileLock:
+        """Cross-process lock guarding state writers"""
+        return FileLock(self._state_filepath() + '.lock')
+
+    def _current_seq(self) -> int:
+        """Last journal sequence persisted (caller must hold the state lock)"""
+        bounds = self._journal.bounds()
+        if bounds is not None:
+            return bounds[1]
+
+        snapshot = self._read_snapshot()
+        return snapshot.get(self._SEQ_KEY, 0) if snapshot else 0
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        try:
+            return serialization.read_file(self._state_filepath())
+        except FileNotFoundError:
+            return None
+
+    def _write_snapshot(self, state: Dict[str, Any], seq: int) -> None:
+        """Replace the snapshot and restart the journal (caller holds the lock)"""
+        atomic_write(self._state_filepath(), serialization.dumps(dict(state, **{self._SEQ_KEY: seq})))
+        self._journal.reset(seq)
+
     def save_state(self, state: Dict[str, Any]) -> str:
         """Persist current application state"""
+        return self.save_state_versioned(state)[0]
+
+    def save_state_versioned(self, state: Dict[str, Any]) -> Tuple[str, int]:
+        """Persist the whole state as a new version; returns (path, sequence number)"""
         filepath = self._state_filepath()
 
-        with open(filepath, 'w', encoding='utf-8') as file_handle:
-            json.dump(state, file_handle, ensure_ascii=False, indent=2)
+        with self._state_lock():
+            seq = self._current_seq() + 1
+            self._write_snapshot(state, seq)
 
-        return filepath
+        return filepath, seq
+
+    def append_state_delta(self, delta: Dict[str, Any]) -> int:
+        """
+        Append a state delta to the journal and return its sequence number
+
+        See utils.journal.apply_delta for the delta format.
+        """
+        with self._state_lock():
+            seq = self._current_seq() + 1
+            self._journal.append(dict(delta, seq=seq))
+            base = self._journal.bounds()[0]
+
+        if seq - base >= self.COMPACT_ENTRIES or \
+                os.path.getsize(self._journal.filepath) >= self.COMPACT_BYTES:
+            self._compact_in_background()
+
+        return seq
+
+    def _compact_in_background(self) -> None:
+        if not self._compacting.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.compact_state()
+            finally:
+                self._compacting.release()
+
+        threading.Thread(target=run, name='state-compaction', daemon=True).start()
+
+    def compact_state(self) -> None:
+        """Fold the journal into a new snapshot"""
+        with self._state_lock():
+            snapshot = self._read_snapshot() or {}
+            seq = snapshot.pop(self._SEQ_KEY, 0)
+            _, entries = self._journal.read()
+
+            for entry in entries:
+                if entry['seq'] > seq:
+                    apply_delta(snapshot, entry)
+                    seq = entry['seq']
+
+            self._write_snapshot(snapshot, seq)
+
+    def _read_state(self) -> tuple:
+        """
+        Read snapshot plus pending journal entries without locking
+
+        Returns (consistent, state, seq); consistent is False when a
+        compaction replaced the snapshot between both reads, and seq is the
+        sequence number of the last change included.
+        """
+        snapshot = self._read_snapshot()
+        seq = snapshot.pop(self._SEQ_KEY, 0) if snapshot else 0
+        base, entries = self._journal.read()
+        pending = [entry for entry in entries if entry['seq'] > seq]
+
+        if snapshot is None and not pending:
+            return True, None, seq
+
+        state = snapshot or {}
+        for entry in pending:
+            apply_delta(state, entry)
+
+        consistent = base is None or base <= seq
+        return consistent, state, pending[-1]['seq'] if pending else seq
 
     def load_state(self) -> Optional[Dict[str, Any]]:
-        """Retrieve persisted application state if present"""
-        filepath = self._state_filepath()
+        """Retrieve persisted application state (snapshot plus journal) if present"""
+        return self.load_state_versioned()[0]
 
-        if not os.path.exists(filepath):
-            return None
+    def load_state_versioned(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        """load_state plus the sequence number of the last change it includes"""
+        for _ in range(self.LOAD_ATTEMPTS):
+            consistent, state, seq = self._read_state()
+            if consistent:
+                return state, seq
 
-        with open(filepath, 'r', encoding='utf-8') as file_handle:
-            return json.load(file_handle)
+        # Persistent contention: read once while holding the writers' lock
+        with self._state_lock():
+            return self._read_state()[1:]
 
     def clear_state(self) -> bool:
         """Remove persisted state from disk"""
         filepath = self._state_filepath()
+        removed = False
 
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            return True
+        with self._state_lock():
+            for path in (filepath, self._journal.filepath):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed = True
 
-        return False
+        return removed
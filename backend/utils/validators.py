@@ -3,6 +3,11 @@ Data validators
 """
 from typing import Any, List, Dict
 
+
+def _is_record_id(value: Any) -> bool:
+    """Record ids are text or integers (bools excluded)"""
+    return type(value) is str or type(value) is int
+
 class Validator:
     """Validation utilities"""
 
@@ -69,3 +74,39 @@ class Validator:
             return False, "Todos os itens devem ser dicionários"
 
         return True, "Válido"
+
+    @staticmethod
+    def validate_state_delta(delta: Any) -> tuple[bool, str]:
+        """Validate a state delta (see utils.journal.apply_delta)"""
+        if not isinstance(delta, dict):
+            return False, "Delta deve ser um objeto"
+
+        if 'set' in delta and not isinstance(delta['set'], dict):
+            return False, "'set' deve ser um objeto"
+
+        collection = delta.get('collection')
+        changes = ('added', 'updated', 'removed')
+
+        if collection is None:
+            if any(key in delta for key in changes):
+                return False, "'collection' é obrigatório para alterações de registros"
+        elif not isinstance(collection, str) or not collection:
+            return False, "'collection' deve ser o nome de uma lista do estado"
+
+        for key in ('added', 'updated'):
+            records = delta.get(key, [])
+            if not isinstance(records, list) or not all(isinstance(item, dict) for item in records):
+                return False, f"'{key}' deve ser uma lista de registros"
+
+        # Ids are matched through a dict/set when the journal is replayed
+        if not all(_is_record_id(item.get('id')) for item in delta.get('updated', [])):
+            return False, "Registros em 'updated' precisam de 'id' (texto ou número inteiro)"
+
+        removed = delta.get('removed', [])
+        if not isinstance(removed, list) or not all(_is_record_id(item) for item in removed):
+            return False, "'removed' deve ser uma lista de ids"
+
+        if not delta.get('set') and not any(delta.get(key) for key in changes):
+            return False, "Delta vazio"
+
+        return True, "Válido"